@@ -8,12 +8,27 @@ PRODUCTION VERSION - Uses PyPI packages and real Trust Directory.
 """
 
 import os
-import requests
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from crewai_amorce import SecureAgent
 from crewai import Tool
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
 from dotenv import load_dotenv
 
+# Add repository root to path for shared marketplace modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from marketplace import codec
+from marketplace.metrics import instrument
+from marketplace.memo import memoize
+from marketplace.directory import directory_access
+from marketplace.negotiation import SellerPolicy, BuyerPolicy, Negotiation, NegotiationState
+from marketplace.pricing import PriceBook
+from marketplace.agent_server import HTTPError, serve_workers, WORKERS
+
 # Load environment variables
 load_dotenv()
 
@@ -21,6 +36,17 @@ load_dotenv()
 TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
 DIRECTORY_ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
 
+# Henri's inventory
+PRODUCT_SKU = 'macbook-pro-2020'
+PRODUCT_NAME = 'MacBook Pro 2020'
+
+# Advertised endpoint (served with --serve)
+HTTP_PORT = 8002
+ENDPOINT_PATH = '/agent/henri'
+
+# Buyers whose agreed prices are remembered for receipts (oldest dropped first)
+MAX_OPEN_DEALS = 10000
+
 
 class HenriSellerAgent:
     """
@@ -40,8 +66,15 @@ class HenriSellerAgent:
         Args:
             min_price: Minimum acceptable price in USD
         """
-        self.min_price = min_price
-        self.cost_basis = 350  # What Henri paid for the MacBook
+        # 350 = what Henri paid for the MacBook
+        self.policy = SellerPolicy(min_price, cost_basis=350, min_profit=100)
+        self.pricing = PriceBook()
+        self.pricing.set_policy(PRODUCT_SKU, self.policy)
+        self.directory = directory_access()
+        
+        # buyer_id -> prices Henri accepted or offered and has not issued a receipt for
+        self.open_deals: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._deals_lock = threading.Lock()
         
         # Create tools
         self.tools = self._create_tools()
@@ -61,21 +94,41 @@ class HenriSellerAgent:
         
         print(f"🤖 Henri initialized")
         print(f"   Agent ID: {self.agent.agent_id}")
-        print(f"   Min Price: ${min_price}")
+        print(f"   Min Price: ${self.min_price}")
         print(f"   Cost Basis: ${self.cost_basis}")
         print(f"   Trust Directory: {TRUST_DIR_URL}")
         print(f"   HITL required for: sales, refunds")
     
+    @property
+    def min_price(self) -> float:
+        return self.policy.min_price
+    
+    @min_price.setter
+    def min_price(self, value: float):
+        # Pricing tables notice the policy change and rebuild on next lookup
+        self.policy.min_price = value
+    
+    @property
+    def cost_basis(self) -> float:
+        return self.policy.cost_basis
+    
+    @cost_basis.setter
+    def cost_basis(self, value: float):
+        # Pricing tables notice the policy change and rebuild on next lookup
+        self.policy.cost_basis = value
+    
     def _create_tools(self):
         """Create Henri's tools."""
         
-        # Inventory database
+        # Inventory database (result includes the cost basis)
+        @memoize(ttl=120, version=lambda: self.cost_basis)
+        @instrument('tool')
         def check_inventory(product_id: str) -> Dict[str, Any]:
             """Check product availability and condition."""
             print(f"\n📦 Checking inventory for: {product_id}")
             return {
                 'product_id': product_id,
-                'name': 'MacBook Pro 2020',
+                'name': PRODUCT_NAME,
                 'specs': '16GB RAM, 512GB SSD',
                 'condition': 'Excellent',
                 'in_stock': True,
@@ -85,6 +138,8 @@ class HenriSellerAgent:
             }
         
         # Pricing API
+        @memoize(ttl=300, casefold=True)
+        @instrument('tool')
         def get_market_pricing(product: str) -> Dict[str, Any]:
             """Get real-time market pricing."""
             print(f"\n💹 Getting market pricing for: {product}")
@@ -96,22 +151,23 @@ class HenriSellerAgent:
             }
         
         # Profit calculator
+        @memoize(version=lambda: self.policy.key)
+        @instrument('tool')
         def calculate_profit(sale_price: float) -> Dict[str, Any]:
             """Calculate profit margin."""
-            profit = sale_price - self.cost_basis
-            margin = (profit / sale_price) * 100
+            row = self.pricing.lookup(PRODUCT_SKU, sale_price)
             
             print(f"\n💰 Profit Analysis:")
             print(f"   Sale Price: ${sale_price}")
-            print(f"   Cost Basis: ${self.cost_basis}")
-            print(f"   Profit: ${profit} ({margin:.1f}%)")
+            print(f"   Cost Basis: ${row['cost_basis']}")
+            print(f"   Profit: ${row['profit']} ({row['margin_percent']:.1f}%)")
             
             return {
                 'sale_price': sale_price,
-                'cost_basis': self.cost_basis,
-                'profit': profit,
-                'margin_percent': margin,
-                'acceptable': profit >= 100  # Minimum $100 profit
+                'cost_basis': row['cost_basis'],
+                'profit': row['profit'],
+                'margin_percent': row['margin_percent'],
+                'acceptable': row['profit'] >= self.policy.min_profit  # Minimum $100 profit
             }
         
         return [
@@ -132,6 +188,25 @@ class HenriSellerAgent:
             )
         ]
     
+    def registration_data(self) -> Dict[str, Any]:
+        """Henri's Trust Directory entry (what buyers discover)."""
+        return {
+            "agent_id": self.agent.agent_id,
+            "public_key": self.agent.get_public_key(),
+            "endpoint": f"http://localhost:{HTTP_PORT}{ENDPOINT_PATH}",
+            "metadata": {
+                "name": "Henri - Professional Reseller",
+                "role": "Seller",
+                "framework": "CrewAI",
+                "capabilities": ["sell_electronics", "price_negotiation", "inventory_management"],
+                "trust_score": 4.8,
+                "total_sales": 127,
+                "verified": True,
+                "price": 500,
+                "product": PRODUCT_NAME
+            }
+        }
+    
     def register_with_trust_directory(self):
         """Register Henri in the production Trust Directory."""
         if not DIRECTORY_ADMIN_KEY:
@@ -139,29 +214,7 @@ class HenriSellerAgent:
             return False
         
         try:
-            registration_data = {
-                "agent_id": self.agent.agent_id,
-                "public_key": self.agent.get_public_key(),
-                "endpoint": "http://localhost:8002/agent/henri",
-                "metadata": {
-                    "name": "Henri - Professional Reseller",
-                    "role": "Seller",
-                    "framework": "CrewAI",
-                    "capabilities": ["sell_electronics", "price_negotiation", "inventory_management"],
-                    "trust_score": 4.8,
-                    "total_sales": 127,
-                    "verified": True,
-                    "price": 500,
-                    "product": "MacBook Pro 2020"
-                }
-            }
-            
-            response = requests.post(
-                f"{TRUST_DIR_URL}/api/v1/agents",
-                json=registration_data,
-                headers={"X-Admin-Key": DIRECTORY_ADMIN_KEY},
-                timeout=10
-            )
+            response = self.directory.register_agent(self.registration_data())
             
             if response.status_code == 200:
                 print(f"\n✅ Henri registered in Trust Directory")
@@ -192,9 +245,8 @@ class HenriSellerAgent:
         
         # Check buyer reputation from Trust Directory
         try:
-            response = requests.get(f"{TRUST_DIR_URL}/api/v1/agents/{buyer_id}", timeout=10)
-            if response.status_code == 200:
-                buyer_data = response.json()
+            buyer_data = self.directory.get_agent(buyer_id)
+            if buyer_data is not None:
                 reputation = buyer_data.get('metadata', {}).get('trust_score', 0)
                 print(f"\n   Buyer trust score: {reputation}★")
             else:
@@ -203,34 +255,148 @@ class HenriSellerAgent:
         except:
             reputation = 0
         
-        # Calculate profit
-        profit_analysis = calculate_profit(offer_price)
+        # Apply pricing rules (too_low / counter / accept)
+        decision = self.pricing.evaluate(PRODUCT_SKU, offer_price)
+        print(f"   Profit at offer: ${decision['profit']}")
+        print(f"   Decision: {decision['response'].upper()}"
+              + (f" (counter ${decision['counter_price']})" if decision['response'] != 'accept' else ""))
+        
+        decision['buyer_reputation'] = reputation
+        self._commit(buyer_id, offer_price if decision['response'] == 'accept' else decision['counter_price'])
+        return decision
+    
+    def receive_offers(self, buyer_ids: Sequence[str], offer_prices: Sequence[float]) -> List[Dict[str, Any]]:
+        """
+        Evaluate a burst of offers in one pass.
+        
+        Buyer reputations are fetched together (one lookup per distinct
+        buyer), and profit, margin and the accept/counter/too_low decision
+        are computed as array operations.
         
-        # Determine response
-        if offer_price < self.min_price:
-            response = "too_low"
-            counter_price = self.min_price + 50
-        elif profit_analysis['profit'] < 100:
-            response = "counter"
-            counter_price = self.cost_basis + 150
-        else:
-            response = "accept"
-            counter_price = offer_price
+        Args:
+            buyer_ids: Buyer agent IDs, one per offer
+            offer_prices: Offered prices, aligned with buyer_ids
+            
+        Returns:
+            One receive_offer-style result per offer, in input order
+        """
+        if len(buyer_ids) != len(offer_prices):
+            raise ValueError("buyer_ids and offer_prices must have the same length")
         
+        try:
+            buyers = self.directory.get_agents(buyer_ids)
+        except Exception:
+            buyers = {}
+        reputation = {
+            buyer_id: (data or {}).get('metadata', {}).get('trust_score', 0)
+            for buyer_id, data in buyers.items()
+        }
+        
+        batch = self.pricing.evaluate_batch(PRODUCT_SKU, offer_prices)
+        accepted = int((batch['response'] == 'accept').sum())
+        for buyer_id, offer_price, response, counter_price in zip(
+                buyer_ids, offer_prices, batch['response'], batch['counter_price']):
+            self._commit(buyer_id, float(offer_price if response == 'accept' else counter_price))
+        print(f"\n🤖 Henri: Evaluated {len(buyer_ids)} offers "
+              f"({accepted} accepted, {len(buyer_ids) - accepted} countered/too low)")
+        
+        return [
+            {
+                'buyer_id': buyer_id,
+                'response': str(response),
+                'counter_price': float(counter_price),
+                'profit': float(profit),
+                'margin_percent': float(margin),
+                'buyer_reputation': reputation.get(buyer_id, 0)
+            }
+            for buyer_id, response, counter_price, profit, margin in zip(
+                buyer_ids, batch['response'], batch['counter_price'],
+                batch['profit'], batch['margin_percent'])
+        ]
+    
+    def _commit(self, buyer_id: str, price: float):
+        """Remember a price Henri is bound to if the buyer takes it."""
+        with self._deals_lock:
+            self.open_deals.setdefault(buyer_id, []).append(price)
+            self.open_deals.move_to_end(buyer_id)
+            while len(self.open_deals) > MAX_OPEN_DEALS:
+                self.open_deals.popitem(last=False)
+    
+    def restore_deal(self, buyer_id: str, price: float):
+        """Hold a price agreed in an earlier run (e.g. a resumed session) for its receipt."""
+        self._commit(buyer_id, price)
+    
+    def _signed(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Sign a message over its canonical form (see marketplace.codec) with Henri's identity."""
+        return codec.sign(payload, self.agent.identity.sign_data)
+    
+    def issue_receipt(self, buyer_id: str, price: float) -> Dict[str, Any]:
+        """
+        Sign a receipt for a deal Henri agreed to in a negotiation with this buyer.
+        
+        Args:
+            buyer_id: Buyer's agent ID (as sent with its offers)
+            price: Agreed price
+            
+        Returns:
+            Receipt naming buyer, seller, item and price, signed by Henri
+            
+        Raises:
+            HTTPError: 404 if Henri has no open deal with the buyer,
+                       409 if he never accepted or offered this price
+        """
+        with self._deals_lock:
+            prices = self.open_deals.get(buyer_id)
+            if not prices:
+                raise HTTPError(404, f"no open deal with {buyer_id}")
+            if price not in prices:
+                raise HTTPError(409, f"no deal with {buyer_id} at ${price}")
+            # One receipt per agreement
+            prices.remove(price)
+            if not prices:
+                del self.open_deals[buyer_id]
+        return self._signed({
+            'transaction_id': f"tx_{uuid.uuid4().hex[:16]}",
+            'buyer_id': buyer_id,
+            'seller_id': self.agent.agent_id,
+            'item': PRODUCT_NAME,
+            'price': float(price),
+            'currency': 'USD',
+            'timestamp': time.time(),
+        })
+    
+    def http_routes(self) -> Dict[tuple, Any]:
+        """
+        Routes for Henri's advertised endpoint (see marketplace.agent_server).
+        
+        Returns:
+            (method, path) -> handler(body) mapping for offer, counter and receipt
+        """
         return {
-            'response': response,
-            'counter_price': counter_price,
-            'profit': profit_analysis['profit'],
-            'buyer_reputation': reputation
+            ('GET', ENDPOINT_PATH): lambda body: {
+                'agent_id': self.agent.agent_id,
+                'status': 'active'
+            },
+            ('POST', f"{ENDPOINT_PATH}/offer"): lambda body: self.receive_offer(
+                body['buyer_id'], float(body['offer_price'])),
+            ('POST', f"{ENDPOINT_PATH}/counter"): lambda body: self.make_counter_offer(
+                float(body['price']), body.get('reasoning', ''), body.get('buyer_id')),
+            ('POST', f"{ENDPOINT_PATH}/receipt"): lambda body: self.issue_receipt(
+                body['buyer_id'], float(body['price'])),
         }
     
-    def make_counter_offer(self, price: float, reasoning: str = ""):
+    def make_counter_offer(self, price: float, reasoning: str = "",
+                           buyer_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Make counter-offer to buyer.
         
         Args:
             price: Counter-offer price
             reasoning: Explanation for price
+            buyer_id: Buyer the offer is addressed to
+            
+        Returns:
+            Counter-offer signed by Henri
         """
         print(f"\n{'='*50}")
         print(f"🤖 Henri: Making counter-offer")
@@ -239,11 +405,14 @@ class HenriSellerAgent:
         print(f"   Price: ${price}")
         print(f"   Reasoning: {reasoning or 'Fair market value based on condition'}")
         
-        return {
-            'price': price,
+        counter = {
+            'price': float(price),
             'reasoning': reasoning,
-            'signed': True
+            'seller_id': self.agent.agent_id
         }
+        if buyer_id is not None:
+            counter['buyer_id'] = buyer_id
+        return self._signed(counter)
 
 
 def main():
@@ -254,6 +423,15 @@ def main():
     print("  PRODUCTION MODE")
     print("="*60 + "\n")
     
+    # Serve the advertised endpoint instead of running the demo workflow
+    if '--serve' in sys.argv:
+        print(f"🛰️  Serving Henri on http://localhost:{HTTP_PORT}{ENDPOINT_PATH} ({WORKERS} worker(s))")
+        serve_workers(
+            lambda: HenriSellerAgent(min_price=int(os.getenv('HENRI_MIN_PRICE', 450))).http_routes(),
+            port=HTTP_PORT, workers=WORKERS, name='henri'
+        )
+        return
+    
     # Create Henri
     henri = HenriSellerAgent(min_price=int(os.getenv('HENRI_MIN_PRICE', 450)))
     
@@ -264,18 +442,23 @@ def main():
     # Demo workflow
     print("\n--- DEMO WORKFLOW ---\n")
     
-    # 1. Receive offer
-    offer_response = henri.receive_offer(
+    # 1. Negotiate with a simulated buyer using Sarah's concession policy
+    negotiation = Negotiation(
         buyer_id="agent_sarah_123",
-        offer_price=450
+        buyer=BuyerPolicy(max_budget=500),
+        respond=henri.receive_offer,
+        target_price=500
     )
+    negotiation.run()
     
-    # 2. Counter-offer
-    if offer_response['response'] == 'counter':
+    # 2. Confirm final terms
+    if negotiation.state == NegotiationState.AGREED:
         henri.make_counter_offer(
-            price=500,
+            price=negotiation.agreed_price,
             reasoning="Fair market value, excellent condition, 30-day warranty"
         )
+    else:
+        print(f"\n⚠️  No deal ({negotiation.state.value}) after {negotiation.round} round(s)")
     
     print("\n" + "="*60)
     print("  DEMO COMPLETE")
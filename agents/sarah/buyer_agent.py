@@ -8,13 +8,33 @@ PRODUCTION VERSION - Uses PyPI packages and real Trust Directory.
 """
 
 import os
-import requests
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from amorce import IdentityManager
 from langchain_amorce import AmorceAgent
 from langchain_anthropic import ChatAnthropic
 from langchain.tools import Tool
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
 from dotenv import load_dotenv
 
+# Add repository root to path for shared marketplace modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from marketplace import codec
+from marketplace.metrics import span, instrument
+from marketplace.cassette import record_call
+from marketplace.memo import memoize
+from marketplace.llm import LEDGER, compact_tools, estimate_tokens, CLAUDE_MODEL
+from marketplace.directory import directory_access
+from marketplace.ratelimit import Priority, langchain_handler, priority_scope
+from marketplace.records import SellerCandidate, filter_sellers, iter_sellers
+from marketplace.ranking import StreamRanker, DEFAULT_MARKET_AVERAGE, top_k
+from marketplace.auction import AuctionResult, run_auction
+from marketplace.negotiation import BuyerPolicy, Negotiation, NegotiationState
+from marketplace.agent_server import HTTPError, serve_workers, http_responder, WORKERS
+
 # Load environment variables
 load_dotenv()
 
@@ -22,6 +42,14 @@ load_dotenv()
 TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
 DIRECTORY_ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
 
+# Advertised endpoint (served with --serve)
+HTTP_PORT = 8001
+ENDPOINT_PATH = '/agent/sarah'
+
+# Sellers Sarah is negotiating with, and receipts kept (oldest dropped first)
+MAX_OPEN_NEGOTIATIONS = 10000
+MAX_RECEIPTS = 1000
+
 
 class SarahBuyerAgent:
     """
@@ -42,18 +70,34 @@ class SarahBuyerAgent:
             max_budget: Maximum budget in USD
         """
         self.max_budget = max_budget
+        self.policy = BuyerPolicy(max_budget)
+        self.directory = directory_access()
+        
+        # Discovered sellers per (min_rating, limit), keyed on the directory listing version
+        self._seller_cache: Dict[tuple, tuple] = {}
         
-        # Create tools
+        # seller_id -> {'public_key', 'price'} for sellers Sarah negotiates with;
+        # price is set once a deal is agreed and cleared by its receipt
+        self.negotiations: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._negotiations_lock = threading.Lock()
+        
+        # Signed receipts received from sellers (most recent MAX_RECEIPTS)
+        self.receipts = deque(maxlen=MAX_RECEIPTS)
+        
+        # Create tools (descriptions trimmed: they are sent with every agent step)
         self.tools = self._create_tools()
+        self._tool_tokens_saved = compact_tools(self.tools)
         
         # Create LangChain agent with Amorce security + Claude
         self.agent = AmorceAgent(
             name="Sarah - Smart Shopper",
             role="Buyer Agent",
             llm=ChatAnthropic(
-                model="claude-3-5-sonnet-20241022",
+                model=CLAUDE_MODEL,
                 api_key=os.getenv('CLAUDE_API_KEY'),
-                temperature=0.7
+                temperature=0.7,
+                # Each agent-loop call waits for the shared Claude rate limit
+                callbacks=[langchain_handler()]
             ),
             tools=self.tools,
             hitl_required=['make_payment', 'share_address'],
@@ -73,6 +117,8 @@ class SarahBuyerAgent:
         """Create Sarah's tools."""
         
         # Market research tool (simulated Brave Search)
+        @memoize(ttl=600, casefold=True)
+        @instrument('tool')
         def search_market_prices(product: str) -> Dict[str, Any]:
             """Search market for product prices."""
             print(f"\n🔍 Searching market for: {product}")
@@ -86,6 +132,8 @@ class SarahBuyerAgent:
             }
         
         # Budget checker
+        @memoize(version=lambda: self.max_budget)
+        @instrument('tool')
         def check_budget(price: float) -> bool:
             """Check if price is within budget."""
             affordable = price <= self.max_budget
@@ -94,19 +142,21 @@ class SarahBuyerAgent:
             print(f"   Affordable: {'✅ Yes' if affordable else '❌ No'}")
             return affordable
         
-        # Real Trust Directory reputation checker
+        # Real Trust Directory reputation checker. Only verified sellers are
+        # cached: a seller that just registered or was reactivated must not
+        # keep reading as unverified (nor an outage as an error) for a minute
+        @memoize(ttl=60, cache_if=lambda result: result.get('verified') is True)
+        @instrument('tool')
         def check_seller_reputation(seller_id: str) -> Dict[str, Any]:
             """Check seller's reputation in Trust Directory."""
             print(f"\n🔍 Checking reputation for: {seller_id}")
             
             try:
-                response = requests.get(
-                    f"{TRUST_DIR_URL}/api/v1/agents/{seller_id}",
-                    timeout=10
-                )
+                # Payment approval waits on this check: serve it ahead of other directory calls
+                with priority_scope(Priority.HITL):
+                    data = self.directory.get_agent(seller_id)
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if data is not None:
                     metadata = data.get('metadata', {})
                     
                     result = {
@@ -161,7 +211,7 @@ class SarahBuyerAgent:
             registration_data = {
                 "agent_id": self.agent.agent_id,
                 "public_key": self.agent.get_public_key(),
-                "endpoint": "http://localhost:8001/agent/sarah",
+                "endpoint": f"http://localhost:{HTTP_PORT}{ENDPOINT_PATH}",
                 "metadata": {
                     "name": "Sarah - Smart Shopper",
                     "role": "Buyer",
@@ -173,12 +223,7 @@ class SarahBuyerAgent:
                 }
             }
             
-            response = requests.post(
-                f"{TRUST_DIR_URL}/api/v1/agents",
-                json=registration_data,
-                headers={"X-Admin-Key": DIRECTORY_ADMIN_KEY},
-                timeout=10
-            )
+            response = self.directory.register_agent(registration_data)
             
             if response.status_code == 200:
                 print(f"\n✅ Sarah registered in Trust Directory")
@@ -206,19 +251,35 @@ class SarahBuyerAgent:
         print(f"{'='*50}\n")
         
         query = f"Search the market for '{product}' and tell me the price range"
-        result = self.agent.run(query)
+        # The agent loop drives ChatAnthropic; time (and record/replay) it as one Claude call
+        start = time.perf_counter()
+        with span('claude', 'find_product'):
+            result = record_call('claude', {'agent': 'sarah', 'query': query},
+                                 lambda: self.agent.run(query))
+        
+        # The framework hides API usage: account for it from prompt sizes
+        prompt_tokens = estimate_tokens(query) + sum(
+            estimate_tokens(f"{tool.name}: {tool.description}") for tool in self.tools)
+        LEDGER.record('find_product', prompt_tokens, estimate_tokens(str(result)),
+                      time.perf_counter() - start,
+                      baseline_tokens=prompt_tokens + self._tool_tokens_saved,
+                      sent_tokens=prompt_tokens, estimated=True)
         
         return result
     
-    def discover_sellers(self, min_rating: float = 4.5) -> list:
+    def discover_sellers(self, min_rating: float = 4.5, limit: Optional[int] = None,
+                         market_average: float = DEFAULT_MARKET_AVERAGE) -> list:
         """
         Discover verified sellers in Trust Directory.
         
         Args:
             min_rating: Minimum trust score required
+            limit: If set, return only this many of the best sellers by composite score
+                (trust, sales, price vs budget and market), best first
+            market_average: Market average price used for ranking
             
         Returns:
-            List of verified sellers
+            List of verified SellerCandidate records
         """
         print(f"\n{'='*50}")
         print(f"🤖 Sarah: Discovering sellers (min rating: {min_rating}★)")
@@ -226,51 +287,235 @@ class SarahBuyerAgent:
         
         try:
             # Query real Trust Directory
-            response = requests.get(f"{TRUST_DIR_URL}/api/v1/agents", timeout=10)
-            agents = response.json().get('agents', [])
+            agents = self.directory.list_agents()
             
-            # Filter for sellers with electronics capability
-            sellers = []
-            for agent in agents:
-                metadata = agent.get('metadata', {})
-                capabilities = metadata.get('capabilities', [])
-                trust_score = metadata.get('trust_score', 0)
-                
-                if 'sell_electronics' in capabilities and trust_score >= min_rating:
-                    sellers.append({
-                        'agent_id': agent.get('agent_id'),
-                        'name': metadata.get('name', 'Unknown'),
-                        'trust_score': trust_score,
-                        'total_sales': metadata.get('total_sales', 0),
-                        'price': metadata.get('price', 500),
-                        'endpoint': agent.get('endpoint')
-                    })
+            # Every ranking input; the listing version is checked against the entry
+            key = (min_rating, limit, self.max_budget, market_average)
+            cached = self._seller_cache.get(key)
+            if cached and cached[0] == self.directory.listing_version:
+                sellers = cached[1]
+            elif limit:
+                # Rank candidates as the filter yields them; no full sort
+                ranker = StreamRanker(limit, self.max_budget, market_average)
+                sellers = ranker.extend(iter_sellers(agents, min_rating)).results()
+                self._seller_cache[key] = (self.directory.listing_version, sellers)
+            else:
+                sellers = filter_sellers(agents, min_rating)
+                self._seller_cache[key] = (self.directory.listing_version, sellers)
             
             print(f"\n   Found {len(sellers)} qualified sellers:")
             for i, seller in enumerate(sellers, 1):
-                print(f"   {i}. {seller['name']} - {seller['trust_score']}★ | ${seller.get('price', 'N/A')}")
+                print(f"   {i}. {seller.name} - {seller.trust_score}★ | ${seller.price}")
             
             return sellers
         except Exception as e:
             print(f"\n❌ Error discovering sellers: {e}")
             return []
     
-    def negotiate(self, seller: Dict[str, Any], target_price: float):
+    def negotiate(self, seller: SellerCandidate, target_price: float,
+                  respond: Optional[Callable] = None, max_rounds: int = 8,
+                  timeout: float = 30.0) -> Optional[Negotiation]:
         """
         Negotiate with seller.
         
         Args:
             seller: Seller information
             target_price: Target price to negotiate to
+            respond: Seller's offer handler, receive_offer(buyer_id, offer_price)
+            max_rounds: Maximum offers Sarah will make
+            timeout: Time budget for the whole negotiation
+            
+        Returns:
+            Finished Negotiation, or None if there is no channel to the seller
         """
         print(f"\n{'='*50}")
-        print(f"🤖 Sarah: Negotiating with {seller['name']}")
+        print(f"🤖 Sarah: Negotiating with {seller.name}")
         print(f"   Target price: ${target_price}")
         print(f"{'='*50}\n")
         
-        # This would use agent.negotiate_with() in full implementation
-        print(f"   Making initial offer: ${target_price - 50}")
-        print(f"   Waiting for counter-offer...")
+        if respond is None:
+            print(f"   Making initial offer: ${self.policy.opening_offer(target_price)}")
+            print(f"   ⚠️  No channel to {seller.name} - waiting for counter-offer...")
+            return None
+        
+        self._open_negotiation(seller)
+        negotiation = Negotiation(
+            buyer_id=self.agent.agent_id,
+            buyer=self.policy,
+            respond=respond,
+            target_price=target_price,
+            max_rounds=max_rounds,
+            timeout=timeout
+        )
+        negotiation.run()
+        if negotiation.state == NegotiationState.AGREED:
+            self._agree(seller.agent_id, negotiation.agreed_price)
+        
+        for round_num, offer, response, counter_price in negotiation.history:
+            print(f"   Round {round_num}: offered ${offer} → {response}"
+                  + (f" (counter ${counter_price})" if response != 'accept' else ""))
+        if negotiation.state == NegotiationState.AGREED:
+            print(f"\n   ✅ Agreed at ${negotiation.agreed_price} after {negotiation.round} round(s)")
+        else:
+            print(f"\n   ❌ No deal ({negotiation.state.value}) after {negotiation.round} round(s)")
+        return negotiation
+    
+    def run_auction(self, sellers: list, responders: Optional[Dict[str, Callable]], target_price: float,
+                    top_n: int = 3, deadline: float = 10.0) -> AuctionResult:
+        """
+        Negotiate with the top N sellers in parallel and keep the best deal.
+        
+        Args:
+            sellers: Candidates from discover_sellers
+            responders: agent_id -> receive_offer-style callable per seller;
+                None posts offers to each seller's advertised endpoint
+            target_price: Target price to negotiate to
+            top_n: Number of best-ranked sellers to invite
+            deadline: Seconds before unfinished negotiations are cancelled
+            
+        Returns:
+            AuctionResult with the winning seller and all sessions
+        """
+        invited = top_k(sellers, top_n, self.max_budget)
+        if responders is None:
+            responders = {s.agent_id: http_responder(s.endpoint) for s in invited if s.endpoint}
+        print(f"\n{'='*50}")
+        print(f"🤖 Sarah: Auction with {len(invited)} sellers (deadline {deadline}s)")
+        print(f"{'='*50}\n")
+        
+        for seller in invited:
+            if seller.agent_id in responders:
+                self._open_negotiation(seller)
+        result = run_auction(self.agent.agent_id, self.policy, invited, responders,
+                             target_price, deadline=deadline)
+        if result.winner:
+            self._agree(result.winner.agent_id, result.price)
+        
+        for seller in invited:
+            session = result.sessions.get(seller.agent_id)
+            if session is None:
+                print(f"   • {seller.name}: no channel")
+            else:
+                price = f" at ${session.agreed_price}" if session.agreed_price is not None else ""
+                print(f"   • {seller.name}: {session.state.value}{price} ({session.round} round(s))")
+        
+        if result.winner:
+            print(f"\n   🏆 Winner: {result.winner.name} at ${result.price} ({result.elapsed:.2f}s)")
+        else:
+            print(f"\n   ❌ No seller agreed within {deadline}s")
+        return result
+    
+    def _open_negotiation(self, seller: SellerCandidate):
+        """Start accepting counter-offers and receipts signed by this seller."""
+        with self._negotiations_lock:
+            entry = self.negotiations.setdefault(seller.agent_id, {'public_key': None, 'price': None})
+            entry['public_key'] = seller.public_key or entry['public_key']
+            self.negotiations.move_to_end(seller.agent_id)
+            while len(self.negotiations) > MAX_OPEN_NEGOTIATIONS:
+                self.negotiations.popitem(last=False)
+    
+    def _agree(self, seller_id: str, price: float):
+        """Remember the price agreed with a seller; its receipt must match it."""
+        with self._negotiations_lock:
+            entry = self.negotiations.get(seller_id)
+            if entry is not None:
+                entry['price'] = price
+    
+    def restore_deal(self, seller: SellerCandidate, price: float):
+        """Expect the receipt for a price agreed in an earlier run (e.g. a resumed session)."""
+        self._open_negotiation(seller)
+        self._agree(seller.agent_id, price)
+    
+    def _verified_negotiation(self, message: Dict[str, Any]):
+        """
+        Check a seller message against an open negotiation and the seller's signature.
+        
+        Raises:
+            HTTPError: 404 if Sarah is not negotiating with the seller,
+                       409 if the message is addressed to another buyer,
+                       403 if the signature does not verify
+        """
+        seller_id = message.get('seller_id')
+        with self._negotiations_lock:
+            if seller_id not in self.negotiations:
+                raise HTTPError(404, f"no negotiation with {seller_id}")
+            public_key = self.negotiations[seller_id]['public_key']
+        if message.get('buyer_id', self.agent.agent_id) != self.agent.agent_id:
+            raise HTTPError(409, f"message from {seller_id} is addressed to {message['buyer_id']}")
+        
+        if public_key is None:
+            # Not known from discovery (e.g. checkpointed candidates): ask the directory
+            data = self.directory.get_agent(seller_id) or {}
+            public_key = data.get('public_key')
+        if not public_key or not codec.verify(
+                message, lambda data, signature: IdentityManager.verify_signature(public_key, data, signature)):
+            raise HTTPError(403, f"signature from {seller_id} does not verify")
+    
+    def receive_counter_offer(self, counter: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a seller's signed counter-offer.
+        
+        Args:
+            counter: Counter-offer signed by the seller (seller_id, price, ...)
+            
+        Returns:
+            {'response': 'accept' | 'reject', 'price': price}
+            
+        Raises:
+            HTTPError: If there is no negotiation with the seller or the
+                       signature does not verify (see _verified_negotiation)
+        """
+        self._verified_negotiation(counter)
+        price = float(counter['price'])
+        response = 'accept' if price <= self.max_budget else 'reject'
+        if response == 'accept':
+            self._agree(counter['seller_id'], price)
+        print(f"\n🤖 Sarah: Counter-offer ${price} from {counter['seller_id']} → {response}")
+        return {'response': response, 'price': price}
+    
+    def receive_receipt(self, receipt: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep a seller's signed receipt for an agreed deal and countersign it.
+        
+        Args:
+            receipt: Seller-signed receipt
+            
+        Returns:
+            Acknowledgement with Sarah's signature over the receipt
+            
+        Raises:
+            HTTPError: 409 if no deal was agreed with the seller at the
+                       receipt's price, or as for _verified_negotiation
+        """
+        self._verified_negotiation(receipt)
+        seller_id = receipt['seller_id']
+        with self._negotiations_lock:
+            # One receipt per agreement
+            entry = self.negotiations.get(seller_id)
+            if (receipt.get('buyer_id') != self.agent.agent_id or entry is None
+                    or entry['price'] is None or entry['price'] != receipt.get('price')):
+                raise HTTPError(409, f"no deal with {seller_id} at ${receipt.get('price')}")
+            del self.negotiations[seller_id]
+            self.receipts.append(receipt)
+        print(f"\n🧾 Sarah: Receipt {receipt.get('transaction_id')} received from {seller_id}")
+        return {'received': True,
+                'buyer_signature': self.agent.identity.sign_data(codec.canonical(receipt))}
+    
+    def http_routes(self) -> Dict[tuple, Any]:
+        """
+        Routes for Sarah's advertised endpoint (see marketplace.agent_server).
+        
+        Returns:
+            (method, path) -> handler(body) mapping for counter and receipt
+        """
+        return {
+            ('GET', ENDPOINT_PATH): lambda body: {
+                'agent_id': self.agent.agent_id,
+                'status': 'active'
+            },
+            ('POST', f"{ENDPOINT_PATH}/counter"): self.receive_counter_offer,
+            ('POST', f"{ENDPOINT_PATH}/receipt"): lambda body: self.receive_receipt(body['receipt']),
+        }
 
 
 def main():
@@ -281,6 +526,15 @@ def main():
     print("  PRODUCTION MODE")
     print("="*60 + "\n")
     
+    # Serve the advertised endpoint instead of running the demo workflow
+    if '--serve' in sys.argv:
+        print(f"🛰️  Serving Sarah on http://localhost:{HTTP_PORT}{ENDPOINT_PATH} ({WORKERS} worker(s))")
+        serve_workers(
+            lambda: SarahBuyerAgent(max_budget=int(os.getenv('SARAH_MAX_BUDGET', 500))).http_routes(),
+            port=HTTP_PORT, workers=WORKERS, name='sarah'
+        )
+        return
+    
     # Create Sarah
     sarah = SarahBuyerAgent(max_budget=int(os.getenv('SARAH_MAX_BUDGET', 500)))
     
@@ -295,13 +549,18 @@ def main():
     sarah.find_product("MacBook Pro 2020")
     
     # 2. Discover sellers
-    sellers = sarah.discover_sellers(min_rating=4.5)
+    sellers = sarah.discover_sellers(min_rating=4.5, limit=3)
     
-    # 3. Negotiate (if sellers found)
-    if sellers:
-        sarah.negotiate(sellers[0], target_price=500)
-    else:
+    # 3. Negotiate with the best-ranked seller over its advertised endpoint
+    if not sellers:
         print("\n⚠️  No qualified sellers found")
+    elif not sellers[0].endpoint:
+        print(f"\n⚠️  {sellers[0].name} advertises no endpoint - cannot negotiate")
+    else:
+        try:
+            sarah.negotiate(sellers[0], target_price=500, respond=http_responder(sellers[0].endpoint))
+        except Exception as e:
+            print(f"\n❌ Negotiation with {sellers[0].name} failed: {e}")
     
     print("\n" + "="*60)
     print("  DEMO COMPLETE")
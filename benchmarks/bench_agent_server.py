@@ -0,0 +1,149 @@
+"""
+Agent Endpoint Load Test
+
+Measures how many offer requests per second one seller endpoint
+sustains. By default it starts a pricing-policy seller (no LLM or
+directory calls) with the requested number of SO_REUSEPORT workers and
+drives it from several client processes over keep-alive connections,
+optionally pipelining requests.
+
+Usage:
+    python benchmarks/bench_agent_server.py [--workers 4] [--connections 64]
+        [--pipeline 8] [--duration 5] [--clients 4] [--url http://127.0.0.1:8002/agent/henri]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace.agent_server import policy_routes, serve_workers
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def offer_request(host: str, path: str, price: int) -> bytes:
+    body = json.dumps({'buyer_id': 'agent_load_test', 'offer_price': price}).encode()
+    return (f"POST {path}/offer HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def connection(host: str, port: int, path: str, pipeline: int, stop_at: float,
+                     latencies: list) -> tuple:
+    """Send batches of `pipeline` requests on one connection until stop_at."""
+    reader, writer = await asyncio.open_connection(host, port)
+    batch = b''.join(offer_request(host, path, 400 + i % 200) for i in range(pipeline))
+    ok = errors = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        writer.write(batch)
+        await writer.drain()
+        for _ in range(pipeline):
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            if status == 200:
+                ok += 1
+            else:
+                errors += 1
+        latencies.append((time.perf_counter() - start) / pipeline)
+    writer.close()
+    return ok, errors
+
+
+def client(url: str, connections: int, pipeline: int, duration: float, results):
+    """One client process: `connections` concurrent keep-alive connections."""
+    parsed = urlparse(url)
+
+    async def run():
+        stop_at = time.perf_counter() + duration
+        latencies = []
+        counts = await asyncio.gather(*(
+            connection(parsed.hostname, parsed.port, parsed.path, pipeline, stop_at, latencies)
+            for _ in range(connections)
+        ))
+        return sum(c[0] for c in counts), sum(c[1] for c in counts), latencies
+
+    results.put(asyncio.run(run()))
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on {host}:{port} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent endpoint load test")
+    parser.add_argument('--url', help="existing endpoint (default: start a local policy seller)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients', type=int, default=2, help="client processes")
+    parser.add_argument('--connections', type=int, default=32, help="connections per client")
+    parser.add_argument('--pipeline', type=int, default=1, help="requests in flight per connection")
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('fork')
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/agent/henri"
+        server = context.Process(target=serve_workers,
+                                 args=(lambda: policy_routes('/agent/henri'), port, args.workers),
+                                 kwargs={'name': 'henri'})
+        server.start()
+    parsed = urlparse(url)
+    wait_for_port(parsed.hostname, parsed.port)
+
+    workers = f"{args.workers} worker(s), " if server else ""
+    print(f"\n🛰️  Agent endpoint load test: {url}")
+    print(f"   {workers}{args.clients} client(s) × {args.connections} connections, "
+          f"pipeline {args.pipeline}, {args.duration:.0f}s\n")
+
+    results = context.Queue()
+    clients = [context.Process(target=client, args=(url, args.connections, args.pipeline,
+                                                    args.duration, results))
+               for _ in range(args.clients)]
+    for process in clients:
+        process.start()
+    ok = errors = 0
+    latencies = []
+    for _ in clients:
+        client_ok, client_errors, client_latencies = results.get()
+        ok += client_ok
+        errors += client_errors
+        latencies.extend(client_latencies)
+    for process in clients:
+        process.join()
+    if server:
+        server.terminate()
+        server.join()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"   requests:   {ok + errors:,} ({errors:,} errors)")
+    print(f"   throughput: {(ok + errors) / args.duration:,.0f} requests/s")
+    if latencies:
+        print(f"   latency:    p50 {pct(50):.2f} ms   p99 {pct(99):.2f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Message Bus Benchmark
+
+Runs many buyer/seller pairs over one MessageBus in a single process.
+Each buyer negotiates repeatedly with its own seller (SellerPolicy on
+the seller side), and the benchmark reports request throughput, mean
+delivery latency and mean request round trip.
+
+Usage:
+    python benchmarks/bench_bus.py [pairs] [negotiations_per_pair]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace.bus import MessageBus, BUS_DELIVERY_LATENCY, BUS_REQUEST_LATENCY
+from marketplace.negotiation import BuyerPolicy, SellerPolicy
+
+
+async def buyer(bus: MessageBus, buyer_id: str, seller_id: str, policy: BuyerPolicy,
+                negotiations: int) -> int:
+    """Run negotiations over the bus; returns the number of requests sent."""
+    requests = 0
+    for _ in range(negotiations):
+        offer = policy.opening_offer(500)
+        for _ in range(8):
+            decision = await bus.request(buyer_id, seller_id, 'offer',
+                                         {'buyer_id': buyer_id, 'offer_price': offer})
+            requests += 1
+            if decision['response'] == 'accept' or decision['counter_price'] <= policy.max_budget:
+                break
+            offer = policy.next_offer(offer, decision['counter_price'])
+            if offer is None:
+                break
+    return requests
+
+
+async def run(pairs: int, negotiations: int):
+    bus = MessageBus()
+    seller = SellerPolicy(450, 350)
+
+    async def receive_offer(buyer_id: str, offer_price: float):
+        return seller.evaluate(offer_price)
+
+    for i in range(pairs):
+        bus.spawn(f"seller_{i}", {'offer': receive_offer})
+        bus.register(f"buyer_{i}")
+
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(
+        buyer(bus, f"buyer_{i}", f"seller_{i}", BuyerPolicy(500), negotiations)
+        for i in range(pairs)
+    ))
+    elapsed = time.perf_counter() - start
+
+    await bus.close()
+    return sum(counts), elapsed
+
+
+def mean_seconds(histogram) -> float:
+    series = histogram.snapshot()
+    count = sum(s['count'] for s in series)
+    return sum(s['sum'] for s in series) / count if count else 0.0
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    negotiations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"\n📨 Message bus benchmark ({pairs:,} agent pairs × {negotiations} negotiations)\n")
+
+    requests, elapsed = asyncio.run(run(pairs, negotiations))
+
+    print(f"   requests:        {requests:,} in {elapsed:.2f}s")
+    print(f"   throughput:      {requests / elapsed:,.0f} requests/s")
+    print(f"   mean delivery:   {mean_seconds(BUS_DELIVERY_LATENCY) * 1e6:,.0f} µs")
+    print(f"   mean round trip: {mean_seconds(BUS_REQUEST_LATENCY) * 1e6:,.0f} µs\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Agent Message Codec Benchmark
+
+Compares the compact binary codec against JSON for the messages agents
+exchange during a negotiation:
+- payload size
+- encode / decode time
+- sign + verify time (HMAC-SHA256 over the canonical binary form vs
+  over sorted-key JSON)
+
+Usage:
+    python benchmarks/bench_codec.py [iterations]
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace import codec
+
+KEY = b'bench-signing-key'
+
+MESSAGES = {
+    'offer': {'buyer_id': 'agent_sarah_7f3a9c2e', 'offer_price': 462.5},
+    'decision': {'response': 'counter', 'counter_price': 500.0, 'profit': 112.5,
+                 'buyer_reputation': 4.9},
+    'counter_offer': {'price': 475.0, 'reasoning': 'Fair market value, excellent condition'},
+    'receipt': {'transaction_id': 'tx_20250101_120000', 'buyer_id': 'agent_sarah_7f3a9c2e',
+                'seller_id': 'agent_henri_41bd0e77', 'item': 'MacBook Pro 2020',
+                'price': 475.0, 'currency': 'USD', 'timestamp': 1735732800.0},
+}
+
+
+def signer(data: bytes) -> bytes:
+    return hmac.new(KEY, data, hashlib.sha256).digest()
+
+
+def verifier(data: bytes, signature: str) -> bool:
+    return hmac.compare_digest(signer(data).hex(), signature)
+
+
+def json_canonical(payload):
+    return json.dumps({k: v for k, v in payload.items() if k != 'signature'},
+                      sort_keys=True, separators=(',', ':')).encode()
+
+
+def per_call(func, iterations: int) -> float:
+    """Best-of-3 microseconds per call."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"\n📦 Agent message codec benchmark ({iterations:,} iterations, best of 3)\n")
+    print(f"   {'message':14}{'bytes json/bin':>16}{'encode µs':>16}{'decode µs':>16}{'sign+verify µs':>18}")
+
+    for name, payload in MESSAGES.items():
+        as_json = json.dumps(payload).encode()
+        as_binary = codec.encode(payload)
+        assert codec.decode(as_binary) == payload
+
+        json_encode = per_call(lambda: json.dumps(payload).encode(), iterations)
+        binary_encode = per_call(lambda: codec.encode(payload), iterations)
+        json_decode = per_call(lambda: json.loads(as_json), iterations)
+        binary_decode = per_call(lambda: codec.decode(as_binary), iterations)
+
+        json_signed = dict(payload, signature=signer(json_canonical(payload)).hex())
+        binary_signed = dict(payload, signature=signer(codec.canonical(payload)).hex())
+        json_sign = per_call(lambda: verifier(json_canonical(json_signed),
+                                              signer(json_canonical(payload)).hex()), iterations)
+        binary_sign = per_call(lambda: verifier(codec.canonical(binary_signed),
+                                                signer(codec.canonical(payload)).hex()), iterations)
+        assert verifier(codec.canonical(binary_signed), binary_signed['signature'])
+
+        print(f"   {name:14}{len(as_json):>8}/{len(as_binary):<7}"
+              f"{json_encode:>8.2f}/{binary_encode:<7.2f}"
+              f"{json_decode:>8.2f}/{binary_decode:<7.2f}"
+              f"{json_sign:>10.2f}/{binary_sign:<7.2f}")
+    print("\n   (each column: JSON / binary)\n")
+
+
+if __name__ == "__main__":
+    main()
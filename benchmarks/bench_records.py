@@ -0,0 +1,90 @@
+"""
+Directory Record Benchmark
+
+Compares raw directory JSON dicts (plus per-seller dicts, as discovery
+used to build) against slotted AgentRecord / SellerCandidate objects:
+- bytes per agent held in memory
+- seller filter throughput
+
+Usage:
+    python benchmarks/bench_records.py [agent_count]
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace.records import AgentRecord, filter_sellers
+from marketplace.stand_in import AgentStore, seed_sellers
+
+
+def dict_filter(agents, min_rating):
+    """The original per-agent dict filter from discover_sellers."""
+    sellers = []
+    for agent in agents:
+        metadata = agent.get('metadata', {})
+        capabilities = metadata.get('capabilities', [])
+        trust_score = metadata.get('trust_score', 0)
+        if 'sell_electronics' in capabilities and trust_score >= min_rating:
+            sellers.append({
+                'agent_id': agent.get('agent_id'),
+                'name': metadata.get('name', 'Unknown'),
+                'trust_score': trust_score,
+                'total_sales': metadata.get('total_sales', 0),
+                'price': metadata.get('price', 500),
+                'endpoint': agent.get('endpoint')
+            })
+    return sellers
+
+
+def measure_bytes(build):
+    """Return (result, bytes allocated and still live after build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def measure_rate(func, items, repeat=5):
+    """Return items processed per second (best of `repeat`)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return items / best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    store = AgentStore()
+    seed_sellers(store, count)
+    _, _, body = store.listing()
+    print(f"\n📏 Directory record benchmark ({count:,} agents, {len(body) / 1e6:.1f} MB JSON)\n")
+
+    raw, raw_bytes = measure_bytes(lambda: json.loads(body)['agents'])
+    records, record_bytes = measure_bytes(lambda: [AgentRecord.from_json(a) for a in json.loads(body)['agents']])
+
+    dict_sellers, dict_seller_bytes = measure_bytes(lambda: dict_filter(raw, 4.5))
+    slot_sellers, slot_seller_bytes = measure_bytes(lambda: filter_sellers(records, 4.5))
+    assert [s['agent_id'] for s in dict_sellers] == [s.agent_id for s in slot_sellers]
+
+    print(f"   {'':28}{'dicts':>14}{'slotted':>14}")
+    print(f"   {'bytes / agent':28}{raw_bytes / count:>14.0f}{record_bytes / count:>14.0f}")
+    print(f"   {'bytes / seller candidate':28}"
+          f"{dict_seller_bytes / len(dict_sellers):>14.0f}{slot_seller_bytes / len(slot_sellers):>14.0f}")
+    print(f"   {'filter agents / s':28}"
+          f"{measure_rate(lambda: dict_filter(raw, 4.5), count):>14,.0f}"
+          f"{measure_rate(lambda: filter_sellers(records, 4.5), count):>14,.0f}")
+    print(f"\n   {len(slot_sellers):,} sellers qualify at ≥4.5★\n")
+
+
+if __name__ == "__main__":
+    main()
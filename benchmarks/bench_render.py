@@ -0,0 +1,159 @@
+"""
+Terminal Renderer Benchmark
+
+Counts write syscalls for the orchestrator's output, before and after
+the buffered renderer:
+- one session: per-line print() (line-buffered, as on a terminal) vs
+  marketplace.render batching per step
+- many concurrent sessions: interleaved print() vs the dashboard
+
+Writes are counted on a raw stream under a line-buffered text layer,
+which is how stdout behaves on a terminal (each raw write is one
+write(2) call).
+
+Usage:
+    python benchmarks/bench_render.py [sessions]
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace import render
+
+STEPS = ("Sarah researches MacBook Pro prices", "Sarah discovers verified sellers",
+         "Sarah and Henri negotiate", "Henri confirms final terms",
+         "Sarah requests human approval for payment", "Henri requests human approval for sale",
+         "Generating signed receipt")
+DETAILS = {'Seller': 'Henri (agent_henri_41bd0e77...)', 'Trust Score': '4.8★ (verified)',
+           'Item': 'MacBook Pro 2020, 16GB RAM, 512GB SSD', 'Price': '$475',
+           'Market Value': '$480-$550', 'Verdict': 'FAIR DEAL ✓'}
+
+
+class CountingRaw(io.RawIOBase):
+    """Raw sink that counts write calls (one per syscall on a real fd)."""
+
+    def __init__(self):
+        self.writes = 0
+        self.bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.writes += 1
+        self.bytes += len(data)
+        return len(data)
+
+
+def terminal():
+    raw = CountingRaw()
+    return raw, io.TextIOWrapper(io.BufferedWriter(raw), encoding='utf-8', line_buffering=True)
+
+
+# Pre-renderer helpers (one print() per line)
+def legacy_step(step_num: int, text: str):
+    print(f"\n{'─'*70}")
+    print(f"📍 STEP {step_num}: {text}")
+    print(f"{'─'*70}\n")
+
+
+def legacy_hitl(agent_name: str, action: str, details: dict, delay: float = 0):
+    print(f"\n⏸️  {'═'*66}")
+    print(f"    HUMAN APPROVAL REQUIRED")
+    print(f"   {'═'*66}\n")
+    print(f"   Agent: {agent_name}")
+    print(f"   Action: {action}")
+    print(f"   Details:")
+    for key, value in details.items():
+        print(f"      • {key}: {value}")
+    print(f"\n   [✓ Approve]  [✗ Reject]  [ℹ Details]")
+    print(f"   {'═'*66}\n")
+    time.sleep(delay)
+    print(f"   👤 User: [Approved]")
+    print(f"   ✅ Approval granted\n")
+
+
+def session(step, hitl, pause):
+    """A session's worth of output: banners, agent lines and two approvals."""
+    for n, text in enumerate(STEPS, 1):
+        step(n, text)
+        if n in (5, 6):
+            hitl("Sarah (Buyer)" if n == 5 else "Henri (Seller)", "Approve payment of $475", DETAILS)
+        else:
+            for i in range(6):
+                print(f"   💬 agent output line {i} for step {n}")
+        pause(0)
+
+
+def measure(run) -> tuple:
+    raw, stream = terminal()
+    saved = sys.stdout
+    sys.stdout = stream
+    start = time.perf_counter()
+    try:
+        run()
+        sys.stdout.flush()
+    finally:
+        sys.stdout = saved
+    return raw.writes, raw.bytes, time.perf_counter() - start
+
+
+def single_legacy():
+    session(legacy_step, legacy_hitl, time.sleep)
+
+
+def single_rendered():
+    with render.RENDERER.capture():
+        session(render.print_step, lambda *a: render.simulate_hitl_approval(*a, delay=0), render.pause)
+
+
+def many(count: int, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def many_legacy(count: int):
+    many(count, single_legacy)
+
+
+def many_dashboard(count: int):
+    with render.Dashboard(refresh=0.05) as dashboard:
+        def run(view):
+            with view.capture():
+                session(render.print_step, lambda *a: render.simulate_hitl_approval(*a, delay=0),
+                        render.pause)
+            view.finish()
+        threads = [threading.Thread(target=run, args=(dashboard.session(f"session-{n}"),))
+                   for n in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"\n🖥️  Terminal renderer benchmark (line-buffered stdout)\n")
+    print(f"   {'scenario':34}{'writes':>8}{'bytes':>10}{'ms':>9}")
+    rows = [
+        ("1 session, print() per line", lambda: single_legacy()),
+        ("1 session, renderer", lambda: single_rendered()),
+        (f"{count} sessions, interleaved print()", lambda: many_legacy(count)),
+        (f"{count} sessions, dashboard", lambda: many_dashboard(count)),
+    ]
+    for name, run in rows:
+        writes, size, elapsed = measure(run)
+        print(f"   {name:34}{writes:>8,}{size:>10,}{elapsed * 1000:>9.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
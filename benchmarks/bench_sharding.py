@@ -0,0 +1,73 @@
+"""
+Sharding Benchmark
+
+Negotiation sessions per second, run serially in one process and then on
+a marketplace.sharding pool at 1, 2, 4 ... workers up to the core count.
+Each session parses and filters a 3,000-agent directory listing, ranks
+sellers, negotiates against pricing tables and signs and verifies the
+receipt (no LLM or network), so it is CPU-bound.
+
+Efficiency is speedup / workers; near 100% is linear scaling. Worker
+start-up (building warm state) is excluded from the timings.
+
+Usage:
+    python benchmarks/bench_sharding.py [sessions] [max_workers]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace.sharding import ShardPool, policy_session, policy_state
+
+
+def serial(sessions: int) -> float:
+    state = policy_state()
+    policy_session(state, 'warmup')
+    start = time.perf_counter()
+    for n in range(sessions):
+        policy_session(state, f"session-{n}")
+    return time.perf_counter() - start
+
+
+def sharded(sessions: int, workers: int) -> float:
+    with ShardPool(policy_state, workers=workers) as pool:
+        pool.wait_ready()
+        pool.map(policy_session, [f"warmup-{n}" for n in range(workers)])
+        start = time.perf_counter()
+        results = pool.map(policy_session, [f"session-{n}" for n in range(sessions)])
+        elapsed = time.perf_counter() - start
+    assert all(r['state'] == 'no_deal' or r['verified'] for r in results)
+    return elapsed
+
+
+def worker_counts(limit: int):
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    cores = os.cpu_count() or 1
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else cores
+    print(f"\n🧮 Sharding benchmark ({sessions} sessions, {cores} core(s))\n")
+    print(f"   {'mode':16}{'sessions/s':>12}{'speedup':>10}{'efficiency':>12}")
+
+    base = sessions / serial(sessions)
+    print(f"   {'serial':16}{base:>12.1f}{1:>9.2f}x{'':>12}")
+    for workers in worker_counts(limit):
+        rate = sessions / sharded(sessions, workers)
+        speedup = rate / base
+        print(f"   {f'{workers} shard(s)':16}{rate:>12.1f}{speedup:>9.2f}x{speedup / workers:>11.0%}")
+    if limit > cores:
+        print(f"\n   (more shards than cores: extra workers only add scheduling overhead)")
+    print()
+
+
+if __name__ == "__main__":
+    main()
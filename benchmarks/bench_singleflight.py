@@ -0,0 +1,79 @@
+"""
+Request Coalescing Benchmark
+
+N concurrent sessions vet the same popular seller at the same moment
+(GET /api/v1/agents/{id} through DirectoryClient) against a stand-in
+directory with 50 ms of server latency. Reports the requests the
+directory actually received per round: without coalescing every
+session sends its own GET; with single-flight the count should stay at
+one regardless of N.
+
+Usage:
+    python benchmarks/bench_singleflight.py [max_sessions]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from marketplace.directory import DirectoryClient
+from marketplace.stand_in import DirectoryHandler, make_server
+
+SERVER_LATENCY = 0.05
+HOT_AGENT = 'agent_synthetic_000003'
+
+
+class SlowCountingHandler(DirectoryHandler):
+    """Stand-in handler that counts GETs and answers after SERVER_LATENCY."""
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(SERVER_LATENCY)
+        super().do_GET()
+
+
+def round_trip(client: DirectoryClient, sessions: int) -> float:
+    barrier = threading.Barrier(sessions)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(client.get_agent(HOT_AGENT))
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert len(results) == sessions and all(r and r['agent_id'] == HOT_AGENT for r in results)
+    return elapsed
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    server = make_server(seed=30)
+    server.RequestHandlerClass = SlowCountingHandler
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # No hedging: count only the GETs the sessions themselves cause
+    client = DirectoryClient(server.url, hedge=False)
+
+    print(f"\n🛬 Single-flight benchmark (one hot agent, {SERVER_LATENCY * 1000:.0f} ms server latency)\n")
+    print(f"   {'sessions':>8}{'uncoalesced':>13}{'upstream GETs':>15}{'ms':>8}")
+    for sessions in (n for n in (1, 10, 20, 50, 100, 200) if n <= limit):
+        before = server.requests
+        elapsed = round_trip(client, sessions)
+        print(f"   {sessions:>8}{sessions:>13}{server.requests - before:>15}{elapsed * 1000:>8.0f}")
+    print(f"\n   {client.agent_flights.info()}\n")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -109,16 +109,16 @@ def main():
     # Find Henri
     henri_info = None
     for seller in sellers:
-        if 'Henri' in seller.get('name', ''):
+        if 'Henri' in seller.name:
             henri_info = seller
             break
     
     if henri_info:
         print(f"✅ Sarah found Henri in Trust Directory!")
-        print(f"   Name: {henri_info['name']}")
-        print(f"   Trust Score: {henri_info['trust_score']}★")
-        print(f"   Total Sales: {henri_info.get('total_sales', 'N/A')}")
-        print(f"   Price: ${henri_info.get('price', 500)}")
+        print(f"   Name: {henri_info.name}")
+        print(f"   Trust Score: {henri_info.trust_score}★")
+        print(f"   Total Sales: {henri_info.total_sales}")
+        print(f"   Price: ${henri_info.price}")
     else:
         print(f"\n❌ Sarah found {len(sellers)} sellers, but Henri not among them")
         print("\n   Using first available seller for demo purposes...")
@@ -160,7 +160,8 @@ def main():
         # Henri makes counter-offer
         counter = henri.make_counter_offer(
             price=evaluation['counter_price'],
-            reasoning="Fair market value for excellent condition MacBook Pro with 30-day warranty"
+            reasoning="Fair market value for excellent condition MacBook Pro with 30-day warranty",
+            buyer_id=sarah.agent.agent_id
         )
         print(f"\n   ✅ Counter-offer sent")
     
@@ -15,48 +15,22 @@ Features:
 
 import time
 import os
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from marketplace.render import RENDERER, print_header, print_step, simulate_hitl_approval, pause, ask
+from marketplace.directory import DirectoryClient
+from marketplace.records import filter_sellers
+from marketplace.ranking import top_k
+
 # Load environment
 load_dotenv()
 
 TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
 ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
 
-
-def print_header(text: str):
-    """Print formatted header."""
-    print(f"\n{'='*70}")
-    print(f"  {text}")
-    print(f"{'='*70}\n")
-
-
-def print_step(step_num: int, text: str):
-    """Print step number."""
-    print(f"\n{'─'*70}")
-    print(f"📍 STEP {step_num}: {text}")
-    print(f"{'─'*70}\n")
-
-
-def simulate_hitl_approval(agent_name: str, action: str, details: dict):
-    """Simulate HITL approval UI."""
-    print(f"\n⏸️  {'═'*66}")
-    print(f"    HUMAN APPROVAL REQUIRED")
-    print(f"   {'═'*66}\n")
-    print(f"   Agent: {agent_name}")
-    print(f"   Action: {action}")
-    print(f"   Details:")
-    for key, value in details.items():
-        print(f"      • {key}: {value}")
-    print(f"\n   [✓ Approve]  [✗ Reject]  [ℹ Details]")
-    print(f"   {'═'*66}\n")
-    
-    # Simulate approval delay
-    time.sleep(1.5)
-    print(f"   👤 User: [Approved]")
-    print(f"   ✅ Approval granted\n")
+# Trust Directory client (circuit breaker, hedged GETs)
+directory = DirectoryClient(TRUST_DIR_URL, ADMIN_KEY)
 
 
 def register_agent_production(name, role, capabilities, trust_score, price=None, total_sales=0):
@@ -82,12 +56,7 @@ def register_agent_production(name, role, capabilities, trust_score, price=None,
         agent_data["metadata"]["price"] = price
     
     try:
-        response = requests.post(
-            f"{TRUST_DIR_URL}/api/v1/agents",
-            json=agent_data,
-            headers={"X-Admin-Key": ADMIN_KEY},
-            timeout=10
-        )
+        response = directory.register_agent(agent_data)
         
         if response.status_code == 200:
             return agent_id
@@ -102,25 +71,9 @@ def register_agent_production(name, role, capabilities, trust_score, price=None,
 def discover_sellers_production(min_rating=4.5):
     """Discover sellers from production Trust Directory."""
     try:
-        response = requests.get(f"{TRUST_DIR_URL}/api/v1/agents", timeout=10)
-        agents = response.json().get('agents', [])
-        
-        sellers = []
-        for agent in agents:
-            metadata = agent.get('metadata', {})
-            capabilities = metadata.get('capabilities', [])
-            trust_score = metadata.get('trust_score', 0)
-            
-            if 'sell_electronics' in capabilities and trust_score >= min_rating:
-                sellers.append({
-                    'agent_id': agent.get('agent_id'),
-                    'name': metadata.get('name', 'Unknown'),
-                    'trust_score': trust_score,
-                    'total_sales': metadata.get('total_sales', 0),
-                    'price': metadata.get('price', 500)
-                })
+        agents = directory.list_agents()
         
-        return sellers
+        return filter_sellers(agents, min_rating)
     except:
         return []
 
@@ -144,7 +97,7 @@ def main():
     print("   • All transactions cryptographically signed")
     print("   • Production integration with trust.amorce.io")
     
-    input("\nPress ENTER to start demo...")
+    ask("\nPress ENTER to start demo...")
     
     # Initialize agents
     print_header("INITIALIZING AGENTS")
@@ -162,7 +115,7 @@ def main():
     print(f"   Framework: LangChain + Amorce (Production)")
     print(f"   Registered in: {TRUST_DIR_URL}")
     
-    time.sleep(0.5)
+    pause(0.5)
     
     print("\nCreating Henri (Seller Agent)...")
     henri_id = register_agent_production(
@@ -179,97 +132,97 @@ def main():
     print(f"   Framework: CrewAI + Amorce (Production)")
     print(f"   Registered in: {TRUST_DIR_URL}")
     
-    time.sleep(1)
+    pause(1)
     
     # Step 1: Sarah researches market
     print_step(1, "Sarah researches MacBook Pro prices")
     print("🤖 Sarah: Searching market for MacBook Pro 2020...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   🔍 Analyzing eBay, Craigslist, Facebook Marketplace...")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   Market Analysis:")
     print("   • eBay: $480-550 (avg: $515)")
     print("   • Craigslist: $450-520 (avg: $485)")
     print("   • Facebook: $470-530 (avg: $500)")
     print("   • Recommended Price: $500")
     print("\n   ✅ Market research complete")
-    time.sleep(1)
+    pause(1)
     
     # Step 2: Sarah discovers Henri
     print_step(2, "Sarah discovers verified sellers in Trust Directory")
     print(f"🤖 Sarah: Querying {TRUST_DIR_URL}...")
-    time.sleep(0.5)
+    pause(0.5)
     
     sellers = discover_sellers_production(min_rating=4.5)
     
     print(f"\n   Found {len(sellers)} verified sellers:")
     
-    # Show Henri and a couple others
-    for i, seller in enumerate(sellers[:3], 1):
-        if seller['agent_id'] == henri_id:
-            print(f"   {i}. {seller['name']} ({seller['agent_id'][:20]}...) - {seller['trust_score']}★ | {seller['total_sales']} sales | ${seller['price']}")
+    # Show the three best-ranked sellers
+    for i, seller in enumerate(top_k(sellers, 3, budget=500), 1):
+        if seller.agent_id == henri_id:
+            print(f"   {i}. {seller.name} ({seller.agent_id[:20]}...) - {seller.trust_score}★ | {seller.total_sales} sales | ${seller.price}")
         else:
-            print(f"   {i}. {seller['name']} - {seller['trust_score']}★ | {seller['total_sales']} sales")
+            print(f"   {i}. {seller.name} - {seller.trust_score}★ | {seller.total_sales} sales")
     
-    time.sleep(0.5)
+    pause(0.5)
     print(f"\n🤖 Sarah: Selecting Henri (excellent reputation)")
     print(f"   ✅ Henri verified in Trust Directory")
     print(f"   ✅ Ed25519 signature verified")
-    time.sleep(1)
+    pause(1)
     
     # Step 3: Sarah makes offer
     print_step(3, "Sarah makes initial offer")
     print("🤖 Sarah: Preparing offer for Henri...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   Initial offer: $450")
     print("   Reasoning: Below market average, good negotiating position")
     print("   ✅ Offer signed with ed25519:sarah:a8c3f...")
-    time.sleep(1)
+    pause(1)
     
     # Step 4: Henri evaluates offer
     print_step(4, "Henri evaluates Sarah's offer")
     print(f"🤖 Henri: Received offer from {sarah_id[:25]}...")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   Offer: $450")
     print("   Checking buyer reputation...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   • Sarah's Trust Score: 4.9★ (excellent buyer)")
     print("   • Payment History: 100% on-time")
     print("   • Fraud Risk: LOW")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   Calculating profit margin...")
     print("   • Cost Basis: $350")
     print("   • Offer: $450")
     print("   • Profit: $100 (28%)")
     print("   • Minimum acceptable: $150 profit")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   ⚠️  Offer below minimum profit threshold")
     print("   📊 Decision: COUNTER-OFFER")
-    time.sleep(1)
+    pause(1)
     
     # Step 5: Henri counter-offers
     print_step(5, "Henri makes counter-offer")
     print("🤖 Henri: Analyzing market conditions...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   • Market average: $500")
     print("   • Competitor prices: $480-550")
     print("   • Product condition: Excellent")
     print("   • Warranty offered: 30 days")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   Counter-offer: $500")
     print("   Reasoning: Fair market value, excellent condition")
     print("   ✅ Counter-offer signed with ed25519:henri:d2e9a...")
-    time.sleep(1)
+    pause(1)
     
     # Step 6: Sarah's HITL Approval
     print_step(6, "Sarah requests human approval for payment")
     print("🤖 Sarah: Evaluating counter-offer...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   • Within budget: ✅ ($500 ≤ $500)")
     print("   • Fair market price: ✅")
     print("   • Seller reputation: ✅ (4.8★)")
     print("   • Product condition: ✅ (Excellent)")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   ⚠️  Payment requires human approval")
     
     simulate_hitl_approval(
@@ -287,16 +240,16 @@ def main():
             'Verdict': '✅ SAFE TO PROCEED'
         }
     )
-    time.sleep(1)
+    pause(1)
     
     # Step 7: Henri's HITL Approval
     print_step(7, "Henri requests human approval for sale")
     print("🤖 Henri: Sarah accepted counter-offer...")
-    time.sleep(0.5)
+    pause(0.5)
     print("   • Sale price: $500")
     print("   • Profit: $150 (43%)")
     print("   • Buyer reputation: 4.9★")
-    time.sleep(0.5)
+    pause(0.5)
     print("\n   ⚠️  Sale confirmation requires human approval")
     
     simulate_hitl_approval(
@@ -314,12 +267,12 @@ def main():
             'Verdict': '✅ PROFITABLE SALE'
         }
     )
-    time.sleep(1)
+    pause(1)
     
     # Step 8: Transaction complete
     print_step(8, "Generating signed receipt")
     print("🤖 Henri: Creating transaction receipt...")
-    time.sleep(0.5)
+    pause(0.5)
     
     receipt_id = f"tx_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     buyer_sig = "ed25519:a8c3f2d1e9b4a7c5f8d2e1a9b7c4f6d3e2a8c5f1d9b6a4c7e3f2d8a5c1b9e7f4d2"
@@ -343,7 +296,7 @@ def main():
     print(f"Protocol: A2A/1.0 + Amorce/3.0")
     print("━" * 70)
     
-    time.sleep(1)
+    pause(1)
     
     # Summary
     print_header("DEMO SUMMARY")
@@ -380,4 +333,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # Output is batched between pauses (one write per beat instead of per line)
+    with RENDERER.capture(all_threads=True):
+        main()
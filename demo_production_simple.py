@@ -10,11 +10,16 @@ Uses direct API calls and Anthropic SDK to show:
 """
 
 import os
-import requests
 import anthropic
 from dotenv import load_dotenv
 from datetime import datetime
 
+from marketplace.cassette import wrap_anthropic
+from marketplace.llm import TokenLedger, complete
+from marketplace.ratelimit import Priority, priority_scope
+from marketplace.directory import DirectoryClient
+from marketplace.records import SellerCandidate, filter_sellers
+
 # Load environment
 load_dotenv()
 
@@ -22,8 +27,11 @@ TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
 ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
 CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
 
-# Initialize Claude client
-claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY) if CLAUDE_API_KEY else None
+# Trust Directory client (circuit breaker, hedged GETs)
+directory = DirectoryClient(TRUST_DIR_URL, ADMIN_KEY)
+
+# Initialize Claude client (recorded / replayed with CASSETTE_MODE)
+claude_client = wrap_anthropic(anthropic.Anthropic(api_key=CLAUDE_API_KEY) if CLAUDE_API_KEY else None)
 
 
 def print_banner(text: str):
@@ -57,12 +65,7 @@ def register_agent(name, role, capabilities, trust_score, price=None):
         agent_data["metadata"]["price"] = price
     
     try:
-        response = requests.post(
-            f"{TRUST_DIR_URL}/api/v1/agents",
-            json=agent_data,
-            headers={"X-Admin-Key": ADMIN_KEY},
-            timeout=10
-        )
+        response = directory.register_agent(agent_data)
         
         if response.status_code == 200:
             print(f"✅ {name} registered in Trust Directory")
@@ -80,72 +83,83 @@ def register_agent(name, role, capabilities, trust_score, price=None):
 def discover_sellers(min_rating=4.5):
     """Discover sellers from Trust Directory."""
     try:
-        response = requests.get(f"{TRUST_DIR_URL}/api/v1/agents", timeout=10)
-        agents = response.json().get('agents', [])
-        
-        sellers = []
-        for agent in agents:
-            metadata = agent.get('metadata', {})
-            capabilities = metadata.get('capabilities', [])
-            trust_score = metadata.get('trust_score', 0)
-            
-            if 'sell_electronics' in capabilities and trust_score >= min_rating:
-                sellers.append({
-                    'agent_id': agent.get('agent_id'),
-                    'name': metadata.get('name', 'Unknown'),
-                    'trust_score': trust_score,
-                    'total_sales': metadata.get('total_sales', 0),
-                    'price': metadata.get('price', 500)
-                })
+        agents = directory.list_agents()
         
-        return sellers
+        return filter_sellers(agents, min_rating)
     except Exception as e:
         print(f"❌ Discovery error: {e}")
         return []
 
 
-def claude_negotiate(sarah_id, henri_id, initial_offer, counter_offer):
-    """Use Claude to generate negotiation reasoning."""
-    if not claude_client:
-        return {
-            'sarah_reasoning': "Budget-conscious buyer seeking best value",
-            'henri_reasoning': "Fair market value for excellent condition"
-        }
-    
-    try:
-        # Sarah's reasoning
-        sarah_message = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=100,
-            messages=[{
-                "role": "user",
-                "content": f"You are Sarah, a smart shopper buying a MacBook Pro. You offered ${initial_offer} for a laptop worth ${counter_offer}. In one sentence, explain your negotiation strategy."
-            }]
-        )
-        
-        sarah_reasoning = sarah_message.content[0].text.strip()
-        
-        # Henri's reasoning
-        henri_message = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=100,
-            messages=[{
-                "role": "user",
-                "content": f"You are Henri, a professional reseller. A buyer offered ${initial_offer} for your MacBook Pro. You counter with ${counter_offer}. In one sentence, justify your price."
-            }]
-        )
-        
-        henri_reasoning = henri_message.content[0].text.strip()
-        
-        return {
-            'sarah_reasoning': sarah_reasoning,
-            'henri_reasoning': henri_reasoning
-        }
-    except Exception as e:
-        return {
-            'sarah_reasoning': "Negotiating within budget constraints",
-            'henri_reasoning': "Maintaining fair market value"
-        }
+# Reasoning prompts per role: compact prompt sent, and the standalone prompt it replaces
+REASONING_PROMPTS = {
+    'sarah': (
+        "Sarah, smart shopper: you offered ${offer}; it's worth ${counter}. Your strategy?",
+        "You are Sarah, a smart shopper buying a MacBook Pro. You offered ${offer} for a laptop worth ${counter}. In one sentence, explain your negotiation strategy."
+    ),
+    'henri': (
+        "Henri, pro reseller: buyer offered ${offer}; you counter ${counter}. Justify it.",
+        "You are Henri, a professional reseller. A buyer offered ${offer} for your MacBook Pro. You counter with ${counter}. In one sentence, justify your price."
+    ),
+}
+
+# Used without a Claude key, and when the call fails
+OFFLINE_REASONING = {
+    'sarah': "Budget-conscious buyer seeking best value",
+    'henri': "Fair market value for excellent condition"
+}
+FALLBACK_REASONING = {
+    'sarah': "Negotiating within budget constraints",
+    'henri': "Maintaining fair market value"
+}
+
+
+def claude_reasoning(role, initial_offer, counter_offer, ledger=None, on_token=None):
+    """
+    Use Claude to generate one agent's negotiation reasoning.
+    
+    The response is streamed: each chunk goes to `on_token` as it arrives
+    (fallback text is passed the same way). Token usage goes to `ledger`.
+    """
+    received = []
+    
+    def forward(text):
+        received.append(text)
+        if on_token:
+            on_token(text)
+    
+    fallback = OFFLINE_REASONING[role]
+    if claude_client:
+        prompt, baseline = REASONING_PROMPTS[role]
+        try:
+            # Shared instructions live in the cached system prefix
+            return complete(
+                claude_client, f"{role}_reasoning",
+                prompt.format(offer=initial_offer, counter=counter_offer),
+                baseline=baseline.format(offer=initial_offer, counter=counter_offer),
+                ledger=ledger,
+                on_token=forward
+            )
+        except Exception:
+            fallback = FALLBACK_REASONING[role]
+    
+    # Keep whatever already streamed before a failure
+    if received:
+        return ''.join(received).strip()
+    forward(fallback)
+    return fallback
+
+
+def stream_reasoning(label, role, initial_offer, counter_offer, ledger):
+    """Print an agent's reasoning as Claude streams it (someone is watching: HITL priority)."""
+    print(f"{label}:")
+    print("   💭 ", end='', flush=True)
+    with priority_scope(Priority.HITL):
+        text = claude_reasoning(role, initial_offer, counter_offer, ledger,
+                                on_token=lambda chunk: print(chunk, end='', flush=True))
+    print()
+    print()
+    return text
 
 
 def main():
@@ -208,20 +222,20 @@ def main():
     
     print(f"\n   Found {len(sellers)} qualified sellers:")
     for i, seller in enumerate(sellers[:5], 1):
-        print(f"   {i}. {seller['name']} - {seller['trust_score']}★ | ${seller.get('price', 'N/A')}")
+        print(f"   {i}. {seller.name} - {seller.trust_score}★ | ${seller.price}")
     
     # Find Henri
-    henri_info = next((s for s in sellers if henri_id in s['agent_id']), None)
+    henri_info = next((s for s in sellers if henri_id in s.agent_id), None)
     
     if henri_info:
         print(f"\n✅ Sarah found Henri in Trust Directory!")
-        print(f"   Name: {henri_info['name']}")
-        print(f"   Trust Score: {henri_info['trust_score']}★")
-        print(f"   Price: ${henri_info['price']}")
+        print(f"   Name: {henri_info.name}")
+        print(f"   Trust Score: {henri_info.trust_score}★")
+        print(f"   Price: ${henri_info.price}")
     else:
         print(f"\n⚠️  Henri not yet visible in discovery (may take a moment)")
         print(f"   Using simulated data for negotiation demo...")
-        henri_info = {'name': 'Henri', 'trust_score': 4.8, 'price': 500}
+        henri_info = SellerCandidate(henri_id, 'Henri', 4.8, price=500)
     
     print()
     input("Press ENTER to continue...")
@@ -240,20 +254,20 @@ def main():
     
     # Get Claude's negotiation reasoning
     print("🤖 Generating negotiation reasoning with Claude...")
-    reasoning = claude_negotiate(sarah_id, henri_id, initial_offer, counter_offer)
     print()
+    ledger = TokenLedger(f"negotiation ${initial_offer} → ${counter_offer}")
     
-    print("Sarah's reasoning:")
-    print(f"   💭 {reasoning['sarah_reasoning']}")
-    print()
+    stream_reasoning("Sarah's reasoning", 'sarah', initial_offer, counter_offer, ledger)
     
     print(f"💬 Henri evaluates offer and responds...")
     print(f"   Counter-offer: ${counter_offer}")
     print()
     
-    print("Henri's reasoning:")
-    print(f"   💭 {reasoning['henri_reasoning']}")
-    print()
+    stream_reasoning("Henri's reasoning", 'henri', initial_offer, counter_offer, ledger)
+    
+    if ledger.calls:
+        print(ledger.report())
+        print()
     
     input("Press ENTER to continue...")
     
@@ -0,0 +1,5 @@
+"""
+Marketplace Runtime
+
+Shared infrastructure used by Sarah, Henri and the demo orchestrators.
+"""
@@ -0,0 +1,333 @@
+"""
+Agent HTTP Server
+
+Serves an agent's advertised endpoint (e.g. http://localhost:8002/agent/henri)
+on asyncio streams.
+
+- HTTP/1.1 keep-alive: connections stay open until the client sends
+  `Connection: close` or is idle for AGENT_KEEPALIVE_TIMEOUT seconds
+- Pipelining: requests already buffered on a connection are handled
+  back to back and their responses are flushed together
+- Workers: serve_workers() forks one process per core, each binding the
+  same port with SO_REUSEPORT so the kernel spreads connections
+
+Routes map (method, path) to a handler taking the decoded body and
+returning a JSON-serializable result. Bodies are JSON unless the client
+negotiates the compact binary codec (see marketplace.codec). As on the
+message bus, coroutine handlers run on the event loop and plain
+functions (the existing agent methods) run in a worker thread.
+
+Run a pure-policy seller for load testing:
+    python -m marketplace.agent_server --port 8002 --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from http import HTTPStatus
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import requests
+
+from marketplace import codec
+from marketplace.metrics import REGISTRY, label_set
+
+KEEPALIVE_TIMEOUT = float(os.getenv('AGENT_KEEPALIVE_TIMEOUT', 15))
+WORKERS = int(os.getenv('AGENT_WORKERS', 1))
+MAX_BODY = 1 << 20
+
+Routes = Dict[Tuple[str, str], Callable[[Dict[str, Any]], Any]]
+
+AGENT_REQUESTS = REGISTRY.counter(
+    'marketplace_agent_http_requests_total', 'Agent endpoint requests by route and status')
+AGENT_LATENCY = REGISTRY.histogram(
+    'marketplace_agent_http_seconds', 'Agent endpoint handler latency by route')
+
+
+class HTTPError(Exception):
+    """Handler error with an explicit HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _encode(status: int, payload: Any, keep_alive: bool,
+            media_type: str = codec.JSON_MEDIA_TYPE) -> bytes:
+    if not isinstance(payload, dict):
+        media_type = codec.JSON_MEDIA_TYPE
+    body = codec.dumps(payload, media_type)
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+class AgentServer:
+    """
+    Keep-alive, pipelining JSON-over-HTTP server for one agent.
+
+    Args:
+        routes: (method, path) -> handler(body) mapping
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        name: Agent name used in metrics labels
+        reuse_port: Bind with SO_REUSEPORT (set by serve_workers)
+    """
+
+    def __init__(self, routes: Routes, host: str = '127.0.0.1', port: int = 0,
+                 name: str = 'agent', reuse_port: bool = False):
+        self.routes = routes
+        self.host = host
+        self.port = port
+        self.name = name
+        self.reuse_port = reuse_port
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._connection, self.host, self.port, reuse_port=self.reuse_port or None)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _dispatch(self, method: str, path: str, body: bytes,
+                        content_type: Optional[str] = None) -> Tuple[int, Any]:
+        handler = self.routes.get((method, path))
+        if handler is None:
+            allowed = any(p == path for _, p in self.routes)
+            return (405 if allowed else 404), {'error': f"{method} {path} not found"}
+        if body and content_type and content_type.split(';')[0].strip() not in (
+                codec.JSON_MEDIA_TYPE, codec.BINARY_MEDIA_TYPE):
+            return 415, {'error': f"unsupported content type {content_type}"}
+        start = time.perf_counter()
+        try:
+            payload = codec.loads(body, content_type) if body else {}
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(payload)
+            else:
+                result = await asyncio.to_thread(handler, payload)
+            status = 200
+        except HTTPError as e:
+            status, result = e.status, {'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            status, result = 400, {'error': f"bad request: {e}"}
+        except Exception as e:
+            status, result = 500, {'error': str(e)}
+        labels = label_set(agent=self.name, route=path)
+        AGENT_LATENCY.observe(labels, time.perf_counter() - start)
+        AGENT_REQUESTS.inc(label_set(agent=self.name, route=path, status=status))
+        return status, result
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(_encode(431, {'error': 'headers too large'}, False))
+                    break
+
+                try:
+                    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                    method, target, version = request_line.split(' ', 2)
+                    headers = {}
+                    for line in header_lines:
+                        if line:
+                            key, _, value = line.partition(':')
+                            headers[key.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if not 0 <= length <= MAX_BODY:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(_encode(400, {'error': 'malformed request'}, False))
+                    break
+
+                body = await reader.readexactly(length) if length else b''
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                status, payload = await self._dispatch(method, target.split('?', 1)[0], body,
+                                                       headers.get('content-type'))
+                writer.write(_encode(status, payload, keep_alive, codec.negotiate(headers.get('accept'))))
+                if not keep_alive:
+                    break
+                # Pipelined requests already buffered: answer them before flushing
+                if not reader.at_eof() and b'\r\n\r\n' in _buffered(reader):
+                    continue
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+
+
+def _buffered(reader: asyncio.StreamReader) -> bytes:
+    # StreamReader has no public peek; its buffer is a stable CPython attribute
+    return getattr(reader, '_buffer', b'')
+
+
+def start_agent_server(routes: Routes, port: int = 0, name: str = 'agent',
+                       host: str = '127.0.0.1') -> AgentServer:
+    """
+    Start an agent server on a background thread.
+
+    Returns:
+        Running server; its URL is `server.url`
+    """
+    server = AgentServer(routes, host, port, name)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name=f"agent-server-{name}", daemon=True).start()
+    ready.wait()
+    return server
+
+
+def _worker(make_routes: Callable[[], Routes], host: str, port: int, name: str):
+    server = AgentServer(make_routes(), host, port, name, reuse_port=True)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_workers(make_routes: Callable[[], Routes], port: int, workers: int = WORKERS,
+                  name: str = 'agent', host: str = '127.0.0.1'):
+    """
+    Serve on `workers` processes sharing one port (SO_REUSEPORT).
+
+    Each worker calls make_routes() once at startup, so per-agent state
+    (pricing tables, directory sessions) is built per process and stays
+    warm. With workers=1 the server runs in this process.
+
+    Args:
+        make_routes: Builds the route table inside each worker
+        port: Port every worker binds
+        workers: Number of processes
+        name: Agent name for metrics
+        host: Interface to bind
+    """
+    if workers <= 1:
+        _worker(make_routes, host, port, name)
+        return
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError("SO_REUSEPORT is not available; run with workers=1")
+
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_worker, args=(make_routes, host, port, name),
+                                 name=f"{name}-worker-{i}", daemon=True)
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    # Stop the workers too when this process is terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+def http_responder(endpoint: str, session: Optional[requests.Session] = None,
+                   timeout: float = 10.0,
+                   binary: bool = codec.BINARY_ENABLED) -> Callable[[str, float], Dict[str, Any]]:
+    """
+    Negotiation-compatible respond(buyer_id, offer_price) for a remote seller.
+
+    Posts to `<endpoint>/offer` on one keep-alive session, so a negotiation
+    (or an auction over several sellers) reuses its connections. With
+    binary=True offers go out in the compact codec and the binary form
+    is requested back; servers that only speak JSON still answer in JSON,
+    and a server that rejects binary bodies (415) gets JSON from then on.
+    """
+    session = session or requests.Session()
+    url = endpoint.rstrip('/') + '/offer'
+    media_type = codec.BINARY_MEDIA_TYPE if binary else codec.JSON_MEDIA_TYPE
+
+    def post(payload: Dict[str, Any]) -> requests.Response:
+        headers = {'Content-Type': media_type,
+                   'Accept': f"{media_type}, {codec.JSON_MEDIA_TYPE};q=0.5"}
+        return session.post(url, data=codec.dumps(payload, media_type), headers=headers, timeout=timeout)
+
+    def respond(buyer_id: str, offer_price: float) -> Dict[str, Any]:
+        nonlocal media_type
+        payload = {'buyer_id': buyer_id, 'offer_price': offer_price}
+        response = post(payload)
+        if response.status_code == 415 and media_type != codec.JSON_MEDIA_TYPE:
+            media_type = codec.JSON_MEDIA_TYPE
+            response = post(payload)
+        response.raise_for_status()
+        return codec.loads(response.content, response.headers.get('Content-Type'))
+    return respond
+
+
+def policy_routes(path: str = '/agent/henri', min_price: float = 450,
+                  cost_basis: float = 350) -> Routes:
+    """
+    Offer route backed by a pricing table only (no LLM, no directory).
+
+    Used for load tests and as a lightweight seller in auctions.
+    """
+    from marketplace.negotiation import SellerPolicy
+    from marketplace.pricing import PriceBook
+
+    book = PriceBook()
+    book.set_policy('default', SellerPolicy(min_price, cost_basis))
+
+    async def offer(body: Dict[str, Any]) -> Dict[str, Any]:
+        return book.evaluate('default', float(body['offer_price']))
+
+    async def status(body: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'ok', 'pid': os.getpid()}
+
+    return {('POST', f"{path}/offer"): offer, ('GET', path): status}
+
+
+def main():
+    """Serve a pure-policy seller endpoint."""
+    parser = argparse.ArgumentParser(description="Agent endpoint server (pricing policy only)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--path', default='/agent/henri')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    print(f"🛰️  Agent endpoint http://{args.host}:{args.port}{args.path} ({args.workers} worker(s))")
+    serve_workers(lambda: policy_routes(args.path), args.port, args.workers,
+                  name='henri', host=args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Parallel Seller Auction
+
+Runs one Negotiation per seller concurrently and keeps the best deal.
+
+Buyer offers only ever go up, so once any seller agrees at price P, every
+session whose current offer is already >= P can no longer win and is
+cancelled at its next round boundary. Whatever is still running at the
+deadline is cancelled too, so the auction takes about as long as the
+slowest useful negotiation, not the sum of all of them.
+
+The winner is fixed and returned at the deadline: agreements that land
+later are ignored. An offer already in flight is not waited for; its
+thread finishes in the background (bounded by the responder's timeout)
+and the session then stops. AuctionResult.join() waits for those
+threads when the caller needs every session settled.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Collection, Dict, List, Optional
+
+from marketplace.negotiation import BuyerPolicy, Negotiation, NegotiationState
+from marketplace.records import SellerCandidate
+
+
+class AuctionResult:
+    """Outcome of an auction: the winning seller and every session."""
+
+    __slots__ = ('winner', 'negotiation', 'sessions', 'elapsed', '_running')
+
+    def __init__(self, winner: Optional[SellerCandidate], negotiation: Optional[Negotiation],
+                 sessions: Dict[str, Negotiation], elapsed: float,
+                 running: Collection[Future] = ()):
+        self.winner = winner
+        self.negotiation = negotiation
+        self.sessions = sessions
+        self.elapsed = elapsed
+        self._running = running
+
+    @property
+    def price(self) -> Optional[float]:
+        return self.negotiation.agreed_price if self.negotiation else None
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for sessions still finishing an in-flight offer; True once all have stopped."""
+        _, not_done = wait(self._running, timeout=timeout)
+        return not not_done
+
+
+def run_auction(buyer_id: str, policy: BuyerPolicy, sellers: List[SellerCandidate],
+                responders: Dict[str, Callable], target_price: float,
+                deadline: float = 10.0, max_rounds: int = 8) -> AuctionResult:
+    """
+    Negotiate with all sellers at once and pick the cheapest agreement.
+
+    Args:
+        buyer_id: Buyer's agent ID
+        policy: Buyer concession policy (shared, read-only)
+        sellers: Candidates, best-ranked first (rank breaks price ties)
+        responders: agent_id -> receive_offer-style callable; sellers
+            without a responder are skipped
+        target_price: Buyer's target price
+        deadline: Seconds before all unfinished sessions are cancelled
+        max_rounds: Per-session round limit
+
+    Returns:
+        AuctionResult
+    """
+    start = time.monotonic()
+    rank = {seller.agent_id: i for i, seller in enumerate(sellers)}
+    by_id = {seller.agent_id: seller for seller in sellers}
+    sessions = {
+        seller.agent_id: Negotiation(buyer_id, policy, responders[seller.agent_id],
+                                     target_price, max_rounds=max_rounds, timeout=deadline)
+        for seller in sellers if seller.agent_id in responders
+    }
+    if not sessions:
+        return AuctionResult(None, None, {}, 0.0)
+
+    best_id: Optional[str] = None
+    closed = False
+    lock = threading.Lock()
+
+    def prune(best_price: float):
+        # Offers only rise, so these sessions can no longer beat best_price
+        for agent_id, session in sessions.items():
+            if agent_id != best_id and not session.state.terminal and session.offer >= best_price:
+                session.cancel()
+
+    def run_one(agent_id: str):
+        nonlocal best_id
+        session = sessions[agent_id]
+        while not session.state.terminal:
+            session.step()
+        if session.state == NegotiationState.AGREED:
+            with lock:
+                if closed:
+                    return agent_id
+                current = sessions[best_id] if best_id else None
+                if current is None or (session.agreed_price, rank[agent_id]) < \
+                        (current.agreed_price, rank[best_id]):
+                    best_id = agent_id
+                prune(sessions[best_id].agreed_price)
+        return agent_id
+
+    executor = ThreadPoolExecutor(max_workers=len(sessions), thread_name_prefix='auction')
+    futures: Dict[Future, str] = {}
+    try:
+        futures.update((executor.submit(run_one, agent_id), agent_id) for agent_id in sessions)
+        pending = set(futures)
+        while pending:
+            left = deadline - (time.monotonic() - start)
+            if left <= 0:
+                break
+            _, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            # Sessions pruned mid-call can no longer win
+            if all(sessions[futures[f]].cancelled for f in pending):
+                break
+    finally:
+        with lock:
+            closed = True
+            winner_id = best_id
+        for session in sessions.values():
+            if not session.state.terminal:
+                session.cancel()
+        # Threads still inside a responder stop after it returns; don't hold the result for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    winner = by_id[winner_id] if winner_id else None
+    running = [future for future in futures if not future.done()]
+    return AuctionResult(winner, sessions.get(winner_id), sessions, time.monotonic() - start, running)
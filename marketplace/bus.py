@@ -0,0 +1,265 @@
+"""
+Agent Message Bus
+
+In-process asyncio message bus for agent-to-agent communication.
+
+Every agent gets a bounded mailbox; send() waits while the recipient's
+mailbox is full (backpressure) instead of queueing without limit.
+request() tags a message with a correlation ID and waits, with a
+timeout, for the matching reply. serve() runs an agent's handlers over
+its mailbox; plain (synchronous) handlers such as the existing agent
+methods run in a worker thread, so a slow agent never stalls the event
+loop or any other agent.
+
+Mailbox depth, delivery latency (enqueue -> dequeue) and request round
+trips are exported through marketplace.metrics.
+
+BusThread runs a bus on a background event loop for synchronous code
+such as the orchestrator, and responder() adapts it to the
+receive_offer(buyer_id, offer_price) signature used by Negotiation.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from marketplace.metrics import REGISTRY, label_set
+from marketplace.resilience import bounded_timeout
+
+MAILBOX_SIZE = int(os.getenv('BUS_MAILBOX_SIZE', 100))
+REQUEST_TIMEOUT = float(os.getenv('BUS_REQUEST_TIMEOUT', 10))
+
+BUS_QUEUE_DEPTH = REGISTRY.gauge(
+    'marketplace_bus_queue_depth', 'Messages waiting in each agent mailbox')
+BUS_DELIVERY_LATENCY = REGISTRY.histogram(
+    'marketplace_bus_delivery_seconds', 'Time from send to mailbox pickup',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+BUS_REQUEST_LATENCY = REGISTRY.histogram(
+    'marketplace_bus_request_seconds', 'Request/reply round trip per message kind')
+BUS_TIMEOUTS = REGISTRY.counter(
+    'marketplace_bus_timeouts_total', 'Requests that got no reply in time')
+
+
+class BusError(Exception):
+    """Raised for undeliverable messages."""
+
+
+class UnknownRecipient(BusError):
+    """No mailbox is registered for the recipient."""
+
+
+class RequestTimeout(BusError, TimeoutError):
+    """No reply arrived before the request timeout."""
+
+
+class Message:
+    """One envelope on the bus."""
+
+    __slots__ = ('sender', 'recipient', 'kind', 'payload', 'correlation_id', 'sent_at')
+
+    def __init__(self, sender: str, recipient: str, kind: str,
+                 payload: Dict[str, Any], correlation_id: Optional[str] = None):
+        self.sender = sender
+        self.recipient = recipient
+        self.kind = kind
+        self.payload = payload
+        self.correlation_id = correlation_id
+        self.sent_at = 0.0
+
+    def __repr__(self):
+        return f"Message({self.sender!r} -> {self.recipient!r}, {self.kind!r}, {self.correlation_id!r})"
+
+
+class MessageBus:
+    """
+    Mailboxes, request/reply correlation and handler loops.
+
+    Must be used from a single event loop.
+
+    Args:
+        mailbox_size: Capacity of each agent's mailbox
+    """
+
+    def __init__(self, mailbox_size: int = MAILBOX_SIZE):
+        self.mailbox_size = mailbox_size
+        self._mailboxes: Dict[str, asyncio.Queue] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, agent_id: str) -> asyncio.Queue:
+        """Create (or return) an agent's mailbox."""
+        mailbox = self._mailboxes.get(agent_id)
+        if mailbox is None:
+            mailbox = self._mailboxes[agent_id] = asyncio.Queue(self.mailbox_size)
+        return mailbox
+
+    def depth(self, agent_id: str) -> int:
+        return self._mailboxes[agent_id].qsize()
+
+    async def send(self, message: Message):
+        """Deliver a message, waiting while the recipient's mailbox is full."""
+        mailbox = self._mailboxes.get(message.recipient)
+        if mailbox is None:
+            raise UnknownRecipient(message.recipient)
+        message.sent_at = time.perf_counter()
+        await mailbox.put(message)
+        BUS_QUEUE_DEPTH.set(label_set(agent=message.recipient), mailbox.qsize())
+
+    async def receive(self, agent_id: str) -> Message:
+        """Take the next message from an agent's mailbox."""
+        mailbox = self._mailboxes[agent_id]
+        message = await mailbox.get()
+        BUS_DELIVERY_LATENCY.observe(label_set(agent=agent_id, kind=message.kind),
+                                     time.perf_counter() - message.sent_at)
+        BUS_QUEUE_DEPTH.set(label_set(agent=agent_id), mailbox.qsize())
+        return message
+
+    async def request(self, sender: str, recipient: str, kind: str,
+                      payload: Dict[str, Any], timeout: float = REQUEST_TIMEOUT) -> Any:
+        """
+        Send a message and wait for its reply.
+
+        Args:
+            sender: Requesting agent
+            recipient: Agent that handles `kind`
+            kind: Message kind (selects the recipient's handler)
+            payload: Handler keyword arguments
+            timeout: Seconds to wait, including time blocked on a full mailbox
+
+        Returns:
+            The handler's return value
+
+        Raises:
+            RequestTimeout: If no reply arrived in time
+            UnknownRecipient: If the recipient has no mailbox
+        """
+        correlation_id = f"{sender}:{next(self._ids)}"
+        reply = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = reply
+        start = time.perf_counter()
+
+        async def round_trip():
+            await self.send(Message(sender, recipient, kind, payload, correlation_id))
+            return await reply
+
+        try:
+            return await asyncio.wait_for(round_trip(), timeout)
+        except asyncio.TimeoutError:
+            BUS_TIMEOUTS.inc(label_set(kind=kind))
+            raise RequestTimeout(f"{kind} to {recipient} timed out after {timeout}s") from None
+        finally:
+            self._pending.pop(correlation_id, None)
+            BUS_REQUEST_LATENCY.observe(label_set(kind=kind), time.perf_counter() - start)
+
+    def reply(self, request: Message, result: Any = None, error: Optional[BaseException] = None):
+        """Resolve the requester waiting on `request` (late replies are dropped)."""
+        waiter = self._pending.get(request.correlation_id)
+        if waiter is None or waiter.done():
+            return
+        if error is not None:
+            waiter.set_exception(error)
+        else:
+            waiter.set_result(result)
+
+    async def serve(self, agent_id: str, handlers: Dict[str, Callable]):
+        """
+        Handle an agent's mailbox forever.
+
+        Each message is dispatched to handlers[message.kind](**payload).
+        Coroutine handlers are awaited; plain functions run in a thread.
+        Handler exceptions are returned to the requester.
+        """
+        self.register(agent_id)
+        while True:
+            message = await self.receive(agent_id)
+            handler = handlers.get(message.kind)
+            try:
+                if handler is None:
+                    raise BusError(f"{agent_id} has no handler for {message.kind!r}")
+                if asyncio.iscoroutinefunction(handler):
+                    result = await handler(**message.payload)
+                else:
+                    result = await asyncio.to_thread(handler, **message.payload)
+            except Exception as e:
+                self.reply(message, error=e)
+            else:
+                self.reply(message, result)
+
+    def spawn(self, agent_id: str, handlers: Dict[str, Callable], workers: int = 1) -> List[asyncio.Task]:
+        """Start `workers` concurrent serve() loops on one mailbox."""
+        self.register(agent_id)
+        tasks = [asyncio.create_task(self.serve(agent_id, handlers), name=f"bus:{agent_id}:{i}")
+                 for i in range(workers)]
+        self._tasks.extend(tasks)
+        return tasks
+
+    async def close(self):
+        """Stop every spawned handler loop."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+class BusThread:
+    """
+    A MessageBus on a background event loop, for synchronous callers.
+
+    Args:
+        mailbox_size: Capacity of each agent's mailbox
+    """
+
+    def __init__(self, mailbox_size: int = MAILBOX_SIZE):
+        self.loop = asyncio.new_event_loop()
+        self.bus = MessageBus(mailbox_size)
+        self._thread = threading.Thread(target=self.loop.run_forever, name='message-bus', daemon=True)
+        self._thread.start()
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def serve(self, agent_id: str, handlers: Dict[str, Callable], workers: int = 1):
+        """Start handling an agent's mailbox on the bus loop."""
+        async def start():
+            self.bus.spawn(agent_id, handlers, workers)
+        self._call(start())
+
+    def register(self, agent_id: str):
+        """Create a mailbox for an agent that only sends requests."""
+        async def create():
+            self.bus.register(agent_id)
+        self._call(create())
+
+    def request(self, sender: str, recipient: str, kind: str,
+                payload: Dict[str, Any], timeout: float = REQUEST_TIMEOUT) -> Any:
+        """Blocking request(); the timeout is clamped to the session deadline."""
+        timeout = bounded_timeout(timeout)
+        return self._call(self.bus.request(sender, recipient, kind, payload, timeout))
+
+    def responder(self, sender: str, recipient: str, kind: str = 'offer',
+                  timeout: float = REQUEST_TIMEOUT) -> Callable[[str, float], Dict[str, Any]]:
+        """Negotiation-compatible respond(buyer_id, offer_price) that goes over the bus."""
+        def respond(buyer_id: str, offer_price: float) -> Dict[str, Any]:
+            return self.request(sender, recipient, kind,
+                                {'buyer_id': buyer_id, 'offer_price': offer_price}, timeout)
+        return respond
+
+    def close(self):
+        """Stop handlers and the loop thread."""
+        if not self.loop.is_running():
+            return
+        self._call(self.bus.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self) -> 'BusThread':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
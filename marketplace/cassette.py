@@ -0,0 +1,387 @@
+"""
+Record / Replay Cassettes
+
+Captures Trust Directory HTTP exchanges and Claude calls to a compact
+file, then serves them back offline.
+
+    CASSETTE_MODE=record  CASSETTE_PATH=cassettes/demo.jsonl.gz  python orchestrator/run_demo.py
+    CASSETTE_MODE=replay  CASSETTE_PATH=cassettes/demo.jsonl.gz  python orchestrator/run_demo.py
+
+Directory traffic is captured at the requests transport (CassetteAdapter
+mounted on the session), so DirectoryClient, hedging and the circuit
+breaker run unchanged. LLM calls go through Cassette.call() or
+wrap_anthropic(); streamed responses are recorded chunk by chunk with
+their arrival times.
+
+Interactions are matched on a key built from the request (method, path,
+query and conditional-GET validators for HTTP; the full call arguments
+for LLMs). Repeated identical requests replay in recorded order. A
+request with no exact match, such as a registration with a fresh
+timestamp in its agent ID, gets the next unplayed interaction of the same
+kind, method and path template (ID segments and query values
+wildcarded); anything else is a CassetteMiss. Admin keys and other
+headers are never written.
+
+CASSETTE_LATENCY=recorded sleeps for the recorded duration on replay;
+zero (the default) answers immediately.
+"""
+
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off').lower()
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', 'cassettes/session.jsonl.gz')
+CASSETTE_LATENCY = os.getenv('CASSETTE_LATENCY', 'zero').lower()
+
+# Response headers kept in recordings (the rest are not needed for replay)
+RECORDED_HEADERS = ('content-type', 'etag', 'last-modified', 'x-directory-cursor')
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+
+# Path segments that identify one resource (agent IDs, numeric IDs), not an endpoint
+_ID_SEGMENT = re.compile(r'^(?!v\d+$).*[\d_]')
+
+
+def _path_template(path: Optional[str]) -> Optional[str]:
+    """'/api/v1/agents/agent_x_1?since=5' -> '/api/v1/agents/*?since=*' (None for non-HTTP)."""
+    if path is None:
+        return None
+    path, _, query = path.partition('?')
+    template = '/'.join('*' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+    if query:
+        template += '?' + '&'.join(f"{field.partition('=')[0]}=*" for field in query.split('&'))
+    return template
+
+
+def _key(kind: str, request: Dict[str, Any]) -> str:
+    data = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(f"{kind}:{data}".encode()).hexdigest()
+
+
+class Cassette:
+    """
+    A recording of directory and LLM interactions.
+
+    Args:
+        path: Cassette file (gzip-compressed JSON lines)
+        mode: 'record' or 'replay'
+        latency: 'recorded' to replay with recorded delays, 'zero' for none
+    """
+
+    def __init__(self, path: str = CASSETTE_PATH, mode: str = CASSETTE_MODE,
+                 latency: str = CASSETTE_LATENCY):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"cassette mode must be 'record' or 'replay', not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.entries: List[Dict[str, Any]] = []
+        self.hits = 0
+        self.fallbacks = 0
+        self._by_key: Dict[str, deque] = {}
+        self._played = set()
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            self.entries = [json.loads(line) for line in f if line.strip()]
+        for index, entry in enumerate(self.entries):
+            self._by_key.setdefault(entry['key'], deque()).append(index)
+
+    def save(self):
+        """Write recorded interactions (record mode)."""
+        if self.mode != 'record':
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, separators=(',', ':'), default=str) + '\n')
+
+    def record(self, kind: str, request: Dict[str, Any], response: Any, elapsed: float):
+        with self._lock:
+            self.entries.append({
+                'kind': kind,
+                'key': _key(kind, request),
+                'method': request.get('method'),
+                'request': request,
+                'response': response,
+                'elapsed': round(elapsed, 6),
+            })
+
+    def lookup(self, kind: str, request: Dict[str, Any], delay: bool = True) -> Dict[str, Any]:
+        """
+        Next recorded interaction for a request.
+
+        With delay=False the caller replays recorded timing itself.
+
+        Raises:
+            CassetteMiss: If nothing (exact, or same kind, method and path template) is left
+        """
+        with self._lock:
+            queue = self._by_key.get(_key(kind, request))
+            if queue:
+                index = queue.popleft() if len(queue) > 1 else queue[0]
+                self.hits += 1
+            else:
+                template = _path_template(request.get('path'))
+                index = next((i for i, e in enumerate(self.entries)
+                              if i not in self._played and e['kind'] == kind
+                              and e.get('method') == request.get('method')
+                              and _path_template(e['request'].get('path')) == template), None)
+                if index is None:
+                    raise CassetteMiss(f"no recorded {kind} interaction for {request}")
+                queue = self._by_key[self.entries[index]['key']]
+                if len(queue) > 1:
+                    queue.remove(index)
+                self.fallbacks += 1
+            self._played.add(index)
+            entry = self.entries[index]
+        if delay and self.latency == 'recorded':
+            time.sleep(entry['elapsed'])
+        return entry
+
+    def call(self, kind: str, request: Dict[str, Any], func: Callable[[], Any],
+             encode: Callable[[Any], Any] = None, decode: Callable[[Any], Any] = None) -> Any:
+        """
+        Record or replay one non-HTTP call (e.g. an LLM request).
+
+        Args:
+            kind: Interaction kind ('claude', ...)
+            request: JSON-serializable arguments that identify the call
+            func: Performs the real call (record mode only)
+            encode: Result -> JSON-serializable value (default: unchanged)
+            decode: Recorded value -> result (default: unchanged)
+        """
+        if self.mode == 'replay':
+            response = self.lookup(kind, request)['response']
+            return decode(response) if decode else response
+        start = time.perf_counter()
+        result = func()
+        self.record(kind, request, encode(result) if encode else result, time.perf_counter() - start)
+        return result
+
+    def adapter(self) -> 'CassetteAdapter':
+        return CassetteAdapter(self)
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """Route a session's HTTP(S) traffic through this cassette."""
+        adapter = self.adapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests transport that records or replays through a Cassette."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    @staticmethod
+    def _describe(request: requests.PreparedRequest) -> Dict[str, Any]:
+        parts = urlsplit(request.url)
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return {
+            'method': request.method,
+            'path': parts.path + (f"?{parts.query}" if parts.query else ''),
+            'body_sha1': hashlib.sha1(body).hexdigest() if body else None,
+            'if_none_match': request.headers.get('If-None-Match'),
+            'if_modified_since': request.headers.get('If-Modified-Since'),
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        described = self._describe(request)
+        if self.cassette.mode == 'replay':
+            entry = self.cassette.lookup('http', described)
+            return self._build(request, entry['response'], entry['elapsed'])
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content
+        try:
+            body = {'text': content.decode('utf-8')}
+        except UnicodeDecodeError:
+            body = {'b64': base64.b64encode(content).decode('ascii')}
+        self.cassette.record('http', described, {
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() in RECORDED_HEADERS},
+            **body,
+        }, time.perf_counter() - start)
+        return response
+
+    def _build(self, request: requests.PreparedRequest, recorded: Dict[str, Any],
+               elapsed: float) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason')
+        response.headers = CaseInsensitiveDict(recorded.get('headers', {}))
+        if 'b64' in recorded:
+            response._content = base64.b64decode(recorded['b64'])
+        else:
+            response._content = recorded.get('text', '').encode('utf-8')
+        response.encoding = get_encoding_from_headers(response.headers) or 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+
+_active: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def active_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from CASSETTE_MODE / CASSETTE_PATH, or None when off."""
+    global _active
+    if CASSETTE_MODE not in ('record', 'replay'):
+        return None
+    with _active_lock:
+        if _active is None:
+            _active = Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY)
+            if _active.mode == 'record':
+                atexit.register(_active.save)
+            print(f"📼 Cassette {_active.mode}: {_active.path}")
+        return _active
+
+
+def http_session() -> requests.Session:
+    """A requests session that goes through the active cassette, if any."""
+    session = requests.Session()
+    cassette = active_cassette()
+    return cassette.mount(session) if cassette else session
+
+
+def record_call(kind: str, request: Dict[str, Any], func: Callable[[], Any],
+                encode: Callable[[Any], Any] = None, decode: Callable[[Any], Any] = None) -> Any:
+    """Cassette.call() on the active cassette; calls func directly when off."""
+    cassette = active_cassette()
+    if cassette is None:
+        return func()
+    return cassette.call(kind, request, func, encode, decode)
+
+
+class _RecordedMessages:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        from anthropic.types import Message
+
+        return record_call(
+            'claude', kwargs,
+            lambda: self._client.messages.create(**kwargs),
+            encode=lambda message: message.model_dump(mode='json'),
+            decode=Message.model_validate,
+        )
+
+    def stream(self, **kwargs):
+        return _RecordedStream(self._client, kwargs)
+
+
+class _RecordedStream:
+    """messages.stream() stand-in: records chunks and timing, or replays them."""
+
+    def __init__(self, client, kwargs: Dict[str, Any]):
+        self._client = client
+        self._kwargs = kwargs
+        self._cassette = active_cassette()
+        self._manager = None
+        self._chunks: List[list] = []
+        self._message = None
+
+    def __enter__(self):
+        if self._cassette.mode == 'replay':
+            from anthropic.types import Message
+
+            recorded = self._cassette.lookup('claude_stream', self._kwargs, delay=False)['response']
+            self._chunks = recorded['chunks']
+            self._message = Message.model_validate(recorded['message'])
+        else:
+            self._start = time.perf_counter()
+            self._manager = self._client.messages.stream(**self._kwargs)
+            self._stream = self._manager.__enter__()
+        return self
+
+    @property
+    def text_stream(self):
+        if self._manager is None:
+            start = time.perf_counter()
+            for offset, text in self._chunks:
+                if self._cassette.latency == 'recorded':
+                    time.sleep(max(0.0, start + offset - time.perf_counter()))
+                yield text
+            return
+        for text in self._stream.text_stream:
+            self._chunks.append([round(time.perf_counter() - self._start, 6), text])
+            yield text
+
+    def get_final_message(self):
+        if self._message is None:
+            self._message = self._stream.get_final_message()
+        return self._message
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._manager is None:
+            return False
+        result = self._manager.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            self._cassette.record('claude_stream', self._kwargs, {
+                'chunks': self._chunks,
+                'message': self.get_final_message().model_dump(mode='json'),
+            }, time.perf_counter() - self._start)
+        return result
+
+
+class _RecordedAnthropic:
+    """Anthropic client whose messages.create() and .stream() go through the cassette."""
+
+    def __init__(self, client):
+        self._client = client
+        self.messages = _RecordedMessages(client)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def wrap_anthropic(client):
+    """
+    Put an Anthropic client behind the active cassette.
+
+    In replay mode this works without a client (no API key needed).
+    With no active cassette the client is returned unchanged.
+    """
+    cassette = active_cassette()
+    if cassette is None or (client is None and cassette.mode != 'replay'):
+        return client
+    return _RecordedAnthropic(client)
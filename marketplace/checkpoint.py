@@ -0,0 +1,127 @@
+"""
+Session Checkpoints
+
+Append-only per-session journal so an orchestrated negotiation can be
+resumed after a crash instead of restarting from market research.
+
+Each completed step appends one JSON line to
+`<DEMO_CHECKPOINT_DIR>/<session_id>.jsonl`:
+
+    {"step": 3, "name": "negotiate", "at": 1718000000.0, "state": {...}}
+
+Writes are a single buffered append plus flush (and fsync when
+DEMO_CHECKPOINT_FSYNC=true). On load, a torn last line from a crash
+mid-write is dropped, so the session resumes after the last step that
+was fully recorded. rewind() appends {"rewind": N, "at": ...}, after
+which steps N and later count as not done until recorded again.
+"""
+
+import json
+import os
+import time
+from typing import Dict, Any, Optional
+
+CHECKPOINT_DIR = os.getenv('DEMO_CHECKPOINT_DIR', 'checkpoints')
+CHECKPOINT_FSYNC = os.getenv('DEMO_CHECKPOINT_FSYNC', 'false').lower() == 'true'
+
+
+class SessionCheckpoint:
+    """
+    Journal of completed steps for one session.
+
+    Args:
+        session_id: Session identifier (used as the file name)
+        directory: Checkpoint directory
+        fsync: Force each record to disk (slower, survives power loss)
+    """
+
+    def __init__(self, session_id: str, directory: str = CHECKPOINT_DIR,
+                 fsync: bool = CHECKPOINT_FSYNC):
+        self.session_id = session_id
+        self.path = os.path.join(directory, f"{session_id}.jsonl")
+        self.fsync = fsync
+        self.steps: Dict[int, Dict[str, Any]] = {}
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn write from a crash
+                if not line.endswith(b'\n'):
+                    break
+                if 'rewind' in entry:
+                    self._forget(entry['rewind'])
+                else:
+                    self.steps[entry['step']] = entry
+                good += len(line)
+        # Drop the torn tail so new records start on a clean line
+        if good != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+
+    @property
+    def resumed(self) -> bool:
+        """True if earlier progress was found on disk."""
+        return bool(self.steps)
+
+    @property
+    def last_step(self) -> int:
+        """Highest completed step (0 if none)."""
+        return max(self.steps, default=0)
+
+    def done(self, step: int) -> bool:
+        return step in self.steps
+
+    def state(self, step: int) -> Optional[Dict[str, Any]]:
+        """Saved state of a completed step, or None."""
+        entry = self.steps.get(step)
+        return entry['state'] if entry else None
+
+    def record(self, step: int, name: str, state: Optional[Dict[str, Any]] = None):
+        """
+        Append a completed step.
+
+        Args:
+            step: Step number
+            name: Short step name (for humans reading the journal)
+            state: JSON-serializable state needed to skip this step on resume
+        """
+        entry = {'step': step, 'name': name, 'at': time.time(), 'state': state or {}}
+        self._append(entry)
+        self.steps[step] = entry
+
+    def rewind(self, step: int):
+        """Mark `step` and every later step as not done, so they run again."""
+        self._append({'rewind': step, 'at': time.time()})
+        self._forget(step)
+
+    def _forget(self, step: int):
+        self.steps = {s: entry for s, entry in self.steps.items() if s < step}
+
+    def _append(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, separators=(',', ':'), default=str) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'SessionCheckpoint':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,264 @@
+"""
+Agent Message Codec
+
+Compact binary encoding for offers, decisions, counter-offers and
+receipts, with JSON as the negotiated fallback.
+
+Frame layout (little-endian):
+
+    magic 'AM' | version u8 | schema u8 | flags u8 | field mask u16 | fields... | [signature]
+
+Each schema is a fixed, ordered field list; the mask says which fields
+are present, so optional fields cost nothing. Strings are u16-length
+UTF-8, prices are f64 and decision responses are one byte. Payloads that
+match no schema are carried as one JSON blob (schema 0), so anything can
+be encoded. Numbers in schema fields always decode as floats.
+
+The canonical form of a message (canonical()) is its binary frame
+without the signature, which does not depend on dict key order or JSON
+spacing. sign() and verify() always work on the canonical form,
+whichever format is used on the wire. A frame must be decoded exactly:
+trailing bytes are an error.
+
+Content negotiation: clients opt in with
+`Accept: application/vnd.amorce.msg` and send binary bodies with the
+same Content-Type; everything else stays JSON.
+"""
+
+import json
+import os
+import struct
+from typing import Callable, Dict, Any, Optional, Tuple, Union
+
+BINARY_MEDIA_TYPE = 'application/vnd.amorce.msg'
+JSON_MEDIA_TYPE = 'application/json'
+
+# Opt-in for outgoing agent requests (see agent_server.http_responder)
+BINARY_ENABLED = os.getenv('AGENT_BINARY_CODEC', 'false').lower() == 'true'
+
+MAGIC = b'AM'
+VERSION = 1
+FLAG_SIGNED = 0x01
+
+_HEADER = struct.Struct('<2sBBBH')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_F64 = struct.Struct('<d')
+
+RESPONSES = ('too_low', 'counter', 'accept', 'reject')
+
+# Distinct key sets whose schema lookup is remembered (peers choose the keys)
+MAX_CACHED_KEY_SETS = 256
+
+
+class CodecError(ValueError):
+    """Raised for frames that cannot be decoded."""
+
+
+class Schema:
+    """Ordered field list for one message type ('s' str, 'd' f64, 'e' response enum)."""
+
+    __slots__ = ('schema_id', 'name', 'fields', 'types')
+
+    def __init__(self, schema_id: int, name: str, fields: Tuple[Tuple[str, str], ...]):
+        self.schema_id = schema_id
+        self.name = name
+        self.fields = tuple(name for name, _ in fields)
+        self.types = dict(fields)
+
+    def accepts(self, payload: Dict[str, Any]) -> bool:
+        for key, value in payload.items():
+            kind = self.types.get(key)
+            if kind is None:
+                return False
+            if kind == 's' and not isinstance(value, str):
+                return False
+            if kind == 'd' and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return False
+            if kind == 'e' and value not in RESPONSES:
+                return False
+        return True
+
+
+SCHEMAS = (
+    Schema(1, 'offer', (('buyer_id', 's'), ('offer_price', 'd'))),
+    Schema(2, 'decision', (('response', 'e'), ('counter_price', 'd'), ('profit', 'd'),
+                           ('buyer_reputation', 'd'), ('buyer_id', 's'), ('price', 'd'))),
+    Schema(3, 'counter_offer', (('price', 'd'), ('reasoning', 's'), ('seller_id', 's'),
+                                ('buyer_id', 's'))),
+    Schema(4, 'receipt', (('transaction_id', 's'), ('buyer_id', 's'), ('seller_id', 's'),
+                          ('item', 's'), ('price', 'd'), ('currency', 's'), ('timestamp', 'd'))),
+)
+_BY_ID = {schema.schema_id: schema for schema in SCHEMAS}
+_BY_KEYS: Dict[frozenset, Optional[Schema]] = {}
+
+
+def _schema_for(payload: Dict[str, Any]) -> Optional[Schema]:
+    keys = frozenset(payload)
+    try:
+        schema = _BY_KEYS[keys]
+    except KeyError:
+        schema = next((s for s in SCHEMAS if keys <= set(s.fields)), None)
+        if len(_BY_KEYS) < MAX_CACHED_KEY_SETS:
+            _BY_KEYS[keys] = schema
+    return schema if schema is not None and schema.accepts(payload) else None
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode('utf-8')
+    if len(data) > 0xFFFF:
+        raise CodecError("string field longer than 65535 bytes")
+    return _U16.pack(len(data)) + data
+
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a message as a binary frame.
+
+    A 'signature' key is carried in the signature trailer, outside the
+    canonical body.
+
+    Args:
+        payload: Message dict
+
+    Returns:
+        Binary frame
+    """
+    signature = payload.get('signature')
+    if signature is None:
+        return _frame(payload, 0)
+    body = {k: v for k, v in payload.items() if k != 'signature'}
+    return _frame(body, FLAG_SIGNED) + _pack_str(signature)
+
+
+def canonical(payload: Dict[str, Any]) -> bytes:
+    """Binary frame of `payload` without any signature (the bytes that get signed)."""
+    if 'signature' in payload:
+        payload = {k: v for k, v in payload.items() if k != 'signature'}
+    return _frame(payload, 0)
+
+
+def _frame(payload: Dict[str, Any], flags: int) -> bytes:
+    schema = _schema_for(payload)
+    if schema is None:
+        blob = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return _HEADER.pack(MAGIC, VERSION, 0, flags, 0) + _U32.pack(len(blob)) + blob
+
+    mask = 0
+    parts = []
+    for bit, name in enumerate(schema.fields):
+        if name not in payload:
+            continue
+        mask |= 1 << bit
+        value = payload[name]
+        kind = schema.types[name]
+        if kind == 'd':
+            parts.append(_F64.pack(value))
+        elif kind == 's':
+            parts.append(_pack_str(value))
+        else:
+            parts.append(bytes((RESPONSES.index(value),)))
+    return _HEADER.pack(MAGIC, VERSION, schema.schema_id, flags, mask) + b''.join(parts)
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a binary frame.
+
+    Raises:
+        CodecError: If the frame is malformed, has trailing bytes or uses an unknown schema
+    """
+    try:
+        magic, version, schema_id, flags, mask = _HEADER.unpack_from(data, 0)
+    except struct.error as e:
+        raise CodecError(f"truncated header: {e}") from None
+    if magic != MAGIC or version != VERSION:
+        raise CodecError("not an agent message frame")
+
+    offset = _HEADER.size
+    try:
+        if schema_id == 0:
+            (length,) = _U32.unpack_from(data, offset)
+            offset += 4
+            if offset + length > len(data):
+                raise CodecError("truncated JSON body")
+            payload = json.loads(data[offset:offset + length])
+            offset += length
+        else:
+            schema = _BY_ID.get(schema_id)
+            if schema is None:
+                raise CodecError(f"unknown schema {schema_id}")
+            payload = {}
+            for bit, name in enumerate(schema.fields):
+                if not mask & (1 << bit):
+                    continue
+                kind = schema.types[name]
+                if kind == 'd':
+                    (payload[name],) = _F64.unpack_from(data, offset)
+                    offset += 8
+                elif kind == 's':
+                    (length,) = _U16.unpack_from(data, offset)
+                    offset += 2
+                    if offset + length > len(data):
+                        raise CodecError(f"truncated field {name!r}")
+                    payload[name] = data[offset:offset + length].decode('utf-8')
+                    offset += length
+                else:
+                    payload[name] = RESPONSES[data[offset]]
+                    offset += 1
+        if flags & FLAG_SIGNED:
+            (length,) = _U16.unpack_from(data, offset)
+            offset += 2
+            if offset + length > len(data):
+                raise CodecError("truncated signature")
+            payload['signature'] = data[offset:offset + length].decode('utf-8')
+            offset += length
+    except (struct.error, IndexError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise CodecError(f"malformed frame: {e}") from None
+    if offset != len(data):
+        raise CodecError(f"{len(data) - offset} trailing byte(s) after frame")
+    return payload
+
+
+def sign(payload: Dict[str, Any], signer: Callable[[bytes], Union[str, bytes]]) -> Dict[str, Any]:
+    """
+    Return a copy of payload with a signature over its canonical form.
+
+    Args:
+        payload: Message dict (any existing signature is replaced)
+        signer: Signs bytes, e.g. an agent identity's sign_data; bytes results are hex-encoded
+    """
+    signature = signer(canonical(payload))
+    if isinstance(signature, bytes):
+        signature = signature.hex()
+    return dict(payload, signature=signature)
+
+
+def verify(payload: Dict[str, Any], verifier: Callable[[bytes, str], bool]) -> bool:
+    """Check payload['signature'] against its canonical form."""
+    signature = payload.get('signature')
+    return isinstance(signature, str) and bool(verifier(canonical(payload), signature))
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type for an Accept header (JSON unless binary is asked for)."""
+    if accept:
+        for item in accept.split(','):
+            media_type, _, params = item.strip().partition(';')
+            if media_type.strip() == BINARY_MEDIA_TYPE and 'q=0' not in params.replace(' ', '').split(';'):
+                return BINARY_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def dumps(payload: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Serialize for the wire in the negotiated format."""
+    if media_type == BINARY_MEDIA_TYPE and isinstance(payload, dict):
+        return encode(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+def loads(body: bytes, media_type: Optional[str] = JSON_MEDIA_TYPE) -> Any:
+    """Parse a wire body according to its Content-Type."""
+    if media_type and media_type.split(';')[0].strip() == BINARY_MEDIA_TYPE:
+        return decode(body)
+    return json.loads(body)
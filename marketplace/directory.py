@@ -0,0 +1,418 @@
+"""
+Trust Directory Client
+
+Single access path to the Trust Directory for agents and demos.
+
+Every call goes through a circuit breaker (fail fast after repeated
+errors), is paced by the shared directory rate limit, is clamped to the
+session deadline, and idempotent GETs are hedged with a duplicate
+request once they run slower than the p95 latency observed for the
+same operation.
+
+Concurrent identical lookups (the same agent, or the listing) are
+coalesced into one request whose result every caller shares. Agent IDs
+the directory answered 404 for are remembered for a short TTL, so
+repeated lookups of unknown IDs do not each cost a request.
+
+The agent listing is revalidated with ETag / Last-Modified, so an
+unchanged directory costs a 304 header exchange instead of a full
+transfer and JSON parse.
+
+DirectoryReplica keeps a local copy of all agents and applies only the
+changes since its last cursor (falling back to a full resync), so
+freshness costs scale with churn rather than directory size. If a sync
+fails, reads keep serving the last synced copy and the sync is retried
+after DIRECTORY_SYNC_INTERVAL. Enable it for the agents with
+DIRECTORY_SYNC_MODE=incremental.
+"""
+
+import itertools
+import os
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
+from dotenv import load_dotenv
+
+from marketplace.cassette import http_session
+from marketplace.metrics import REGISTRY, label_set, span
+from marketplace.negative_cache import NegativeCache
+from marketplace.ratelimit import DIRECTORY_REQUESTS, current_priority, retry_after
+from marketplace.records import AgentRecord
+from marketplace.singleflight import SingleFlight
+from marketplace.resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, bounded_timeout, hedged_call
+)
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
+DIRECTORY_ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
+DIRECTORY_TIMEOUT = float(os.getenv('DIRECTORY_TIMEOUT', 10))
+BREAKER_THRESHOLD = int(os.getenv('DIRECTORY_BREAKER_THRESHOLD', 5))
+BREAKER_RESET = float(os.getenv('DIRECTORY_BREAKER_RESET', 30))
+HEDGE_PERCENTILE = float(os.getenv('DIRECTORY_HEDGE_PERCENTILE', 95))
+SYNC_MODE = os.getenv('DIRECTORY_SYNC_MODE', 'full')
+SYNC_INTERVAL = float(os.getenv('DIRECTORY_SYNC_INTERVAL', 5))
+BATCH_CONCURRENCY = int(os.getenv('DIRECTORY_BATCH_CONCURRENCY', 16))
+
+REPLICA_SYNC_ERRORS = REGISTRY.counter(
+    'marketplace_replica_sync_errors_total', 'Replica syncs that failed and served stale data')
+
+
+class DirectoryError(Exception):
+    """Raised when the Trust Directory returns an unexpected response."""
+
+
+class DirectoryUnavailable(DirectoryError, CircuitOpenError):
+    """Raised when the circuit breaker rejects a call."""
+
+
+class DirectoryClient:
+    """
+    Resilient client for the Trust Directory REST API.
+
+    Args:
+        base_url: Directory root URL
+        admin_key: Admin key for registration
+        timeout: Per-request timeout in seconds (clamped to the session deadline)
+        hedge: Hedge idempotent GETs slower than the p95
+    """
+
+    def __init__(self, base_url: str = TRUST_DIR_URL, admin_key: Optional[str] = DIRECTORY_ADMIN_KEY,
+                 timeout: float = DIRECTORY_TIMEOUT, hedge: bool = True):
+        self.base_url = base_url.rstrip('/')
+        self.admin_key = admin_key
+        self.timeout = timeout
+        self.hedge = hedge
+        self.session = http_session()
+        self.breaker = CircuitBreaker('trust_directory', BREAKER_THRESHOLD, BREAKER_RESET)
+        # Per operation: a slow listing must not set the hedge delay for agent lookups
+        self.latency: Dict[str, LatencyTracker] = {}
+        
+        # Last full listing and its validators; version bumps on every 200
+        self.listing_version = 0
+        self.listing_cursor: Optional[int] = None
+        self._listing: Optional[List[AgentRecord]] = None
+        self._validators: Dict[str, str] = {}
+        self._listing_lock = threading.Lock()
+        
+        # Sessions vetting the same agent at once share one GET
+        self.agent_flights = SingleFlight('get_agent')
+        # Listing records are shared read-only already; no per-caller copy
+        self.listing_flights = SingleFlight('list_agents', copy_results=False)
+        # IDs answered 404, dropped as soon as the agent is registered or listed
+        self.unknown_agents = NegativeCache('unknown_agents')
+
+    def _request(self, method: str, path: str, operation: str,
+                 idempotent: bool = False, **kwargs) -> requests.Response:
+        """Issue one request through the breaker, rate limit, deadline and hedging layers."""
+        if not self.breaker.allow():
+            raise DirectoryUnavailable(f"circuit open for {self.base_url}")
+        priority = current_priority()
+        try:
+            DIRECTORY_REQUESTS.acquire(priority=priority, timeout=bounded_timeout(self.timeout))
+        except BaseException:
+            # Nothing was sent: free a half-open trial for the next caller
+            self.breaker.release()
+            raise
+        timeout = bounded_timeout(self.timeout)
+
+        url = f"{self.base_url}{path}"
+        attempts = itertools.count()
+        latency = self.latency.get(operation)
+        if latency is None:
+            latency = self.latency.setdefault(operation, LatencyTracker())
+
+        def attempt():
+            # The first attempt already holds a token; a hedge needs its own
+            if next(attempts):
+                DIRECTORY_REQUESTS.acquire(priority=priority, timeout=timeout)
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+
+        with span('directory', operation) as current:
+            start = time.monotonic()
+            try:
+                if idempotent and self.hedge:
+                    response = hedged_call(attempt, latency.percentile(HEDGE_PERCENTILE), timeout)
+                else:
+                    response = attempt()
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            delay = retry_after(response)
+            if delay is not None:
+                # Throttled, not broken: back off every caller, keep the circuit closed
+                current.mark_error()
+                self.breaker.record_success()
+                DIRECTORY_REQUESTS.throttled(delay)
+            elif response.status_code >= 500:
+                current.mark_error()
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                latency.record(time.monotonic() - start)
+        return response
+
+    def health(self) -> Dict[str, Any]:
+        """Fetch the directory root status document."""
+        response = self._request('GET', '/', 'health', idempotent=True)
+        if response.status_code != 200:
+            raise DirectoryError(f"HTTP {response.status_code}")
+        return response.json()
+
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one agent record.
+
+        Returns:
+            Agent JSON, or None if the directory has no such agent
+        """
+        if agent_id in self.unknown_agents:
+            return None
+        return self.agent_flights.do(agent_id, lambda: self._fetch_agent(agent_id))
+
+    def _fetch_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        generation = self.unknown_agents.generation
+        response = self._request('GET', f"/api/v1/agents/{agent_id}", 'get_agent', idempotent=True)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            self.unknown_agents.add(agent_id, generation)
+            return None
+        raise DirectoryError(f"HTTP {response.status_code} for agent {agent_id}")
+
+    def get_agents(self, agent_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch many agents concurrently, one request per distinct ID.
+        
+        Lookups that fail are reported as None, like unknown agents.
+        """
+        unique = list(dict.fromkeys(agent_ids))
+        
+        def lookup(agent_id):
+            try:
+                return self.get_agent(agent_id)
+            except Exception:
+                return None
+        
+        if len(unique) <= 1:
+            return {agent_id: lookup(agent_id) for agent_id in unique}
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(unique))) as pool:
+            return dict(zip(unique, pool.map(lookup, unique)))
+    
+    def list_agents(self) -> List[AgentRecord]:
+        """
+        Fetch the full agent listing as compact records, revalidating the cached copy.
+
+        Callers that derive data from the listing can key their own caches
+        on `listing_version`, which only changes when a new body arrives.
+        """
+        return self.listing_flights.do('listing', self._fetch_listing)
+    
+    def _fetch_listing(self) -> List[AgentRecord]:
+        headers = {}
+        if self._listing is not None:
+            if 'etag' in self._validators:
+                headers['If-None-Match'] = self._validators['etag']
+            if 'last_modified' in self._validators:
+                headers['If-Modified-Since'] = self._validators['last_modified']
+        
+        response = self._request('GET', '/api/v1/agents', 'list_agents',
+                                 idempotent=True, headers=headers)
+        if response.status_code == 304 and self._listing is not None:
+            return self._listing
+        if response.status_code != 200:
+            raise DirectoryError(f"HTTP {response.status_code} listing agents")
+        
+        agents = [AgentRecord.from_json(agent) for agent in response.json().get('agents', [])]
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+        cursor = response.headers.get('X-Directory-Cursor')
+        with self._listing_lock:
+            self._listing = agents
+            self._validators = validators
+            self.listing_cursor = int(cursor) if cursor else None
+            self.listing_version += 1
+        self.unknown_agents.discard_all(agent.agent_id for agent in agents)
+        return agents
+    
+    def changes_since(self, cursor: int) -> Optional[Dict[str, Any]]:
+        """
+        Fetch agent changes after `cursor`.
+        
+        Returns:
+            {'cursor', 'changes'}, or None if the directory cannot serve
+            the cursor (no change feed, or the cursor has expired)
+        """
+        response = self._request('GET', f"/api/v1/agents/changes?since={cursor}",
+                                 'list_changes', idempotent=True)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code in (404, 410):
+            return None
+        raise DirectoryError(f"HTTP {response.status_code} fetching changes")
+
+    def register_agent(self, registration_data: Dict[str, Any]) -> requests.Response:
+        """Register (or update) an agent. Never hedged: POST is not idempotent."""
+        response = self._request(
+            'POST', '/api/v1/agents', 'register_agent',
+            json=registration_data,
+            headers={"X-Admin-Key": self.admin_key or ''}
+        )
+        if registration_data.get('agent_id'):
+            self.unknown_agents.discard(registration_data['agent_id'])
+        return response
+
+
+class DirectoryReplica:
+    """
+    Local replica of the agent table kept fresh by incremental sync.
+
+    Exposes the same read/register surface as DirectoryClient, so agents
+    can use either. Lookups that miss the replica fall through to the
+    network, since the agent may have registered after the last sync.
+
+    Args:
+        client: Underlying directory client
+        sync_interval: Minimum seconds between syncs on the read path
+    """
+
+    def __init__(self, client: DirectoryClient, sync_interval: float = SYNC_INTERVAL):
+        self.client = client
+        self.sync_interval = sync_interval
+        self.agents: Dict[str, AgentRecord] = {}
+        self.cursor: Optional[int] = None
+        self.version = 0
+        self.synced_at = 0.0
+        self.sync_errors = 0
+        self._listing_seen = -1
+        self._snapshot = (-1, [])
+        self._lock = threading.Lock()
+
+    @property
+    def listing_version(self) -> int:
+        return self.version
+
+    def full_resync(self):
+        """Replace the replica with a full listing."""
+        agents = self.client.list_agents()
+        self.cursor = self.client.listing_cursor
+        # A 304 revalidation returns the listing already applied
+        if self.client.listing_version == self._listing_seen:
+            return
+        self._listing_seen = self.client.listing_version
+        self.agents = {agent.agent_id: agent for agent in agents}
+        self.version += 1
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Bring the replica up to date.
+
+        Args:
+            force: Sync even if the last sync is younger than sync_interval
+
+        Returns:
+            Number of changes applied (-1 for a full resync)
+
+        Raises:
+            Whatever the directory call raised; the next attempt on the
+            read path waits another sync_interval
+        """
+        with self._lock:
+            if not force and self.version and \
+                    time.monotonic() - self.synced_at < self.sync_interval:
+                return 0
+            try:
+                result = None if self.cursor is None else self.client.changes_since(self.cursor)
+                if result is None:
+                    self.full_resync()
+                    applied = -1
+                else:
+                    for change in result['changes']:
+                        if change['op'] == 'delete':
+                            self.agents.pop(change['agent_id'], None)
+                        else:
+                            record = AgentRecord.from_json(change['agent'])
+                            self.agents[record.agent_id] = record
+                            self.client.unknown_agents.discard(record.agent_id)
+                    self.cursor = result['cursor']
+                    applied = len(result['changes'])
+                    if applied:
+                        self.version += 1
+            finally:
+                self.synced_at = time.monotonic()
+            return applied
+
+    def _refresh(self):
+        """Sync on the read path; once anything is loaded, a failed sync serves the stale replica."""
+        try:
+            self.sync()
+        except Exception:
+            if not self.version:
+                raise
+            self.sync_errors += 1
+            REPLICA_SYNC_ERRORS.inc(label_set())
+
+    def list_agents(self) -> List[AgentRecord]:
+        self._refresh()
+        if self._snapshot[0] != self.version:
+            self._snapshot = (self.version, list(self.agents.values()))
+        return self._snapshot[1]
+
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        agent = self.agents.get(agent_id)
+        if agent is not None:
+            return agent.to_dict()
+        return self.client.get_agent(agent_id)
+
+    def get_agents(self, agent_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        self._refresh()
+        found = {}
+        missing = []
+        for agent_id in dict.fromkeys(agent_ids):
+            record = self.agents.get(agent_id)
+            if record is None:
+                missing.append(agent_id)
+            else:
+                found[agent_id] = record.to_dict()
+        if missing:
+            found.update(self.client.get_agents(missing))
+        return found
+
+    def register_agent(self, registration_data: Dict[str, Any]):
+        return self.client.register_agent(registration_data)
+
+
+_default_client: Optional[DirectoryClient] = None
+_default_replica: Optional[DirectoryReplica] = None
+
+
+def directory_client() -> DirectoryClient:
+    """Process-wide client so all agents share one breaker and latency windows."""
+    global _default_client
+    if _default_client is None:
+        _default_client = DirectoryClient()
+    return _default_client
+
+
+def directory_access():
+    """
+    Directory access path for the agents, chosen by DIRECTORY_SYNC_MODE.
+
+    Returns:
+        Shared DirectoryReplica in 'incremental' mode, else the shared client
+    """
+    global _default_replica
+    if SYNC_MODE != 'incremental':
+        return directory_client()
+    if _default_replica is None:
+        _default_replica = DirectoryReplica(directory_client())
+    return _default_replica
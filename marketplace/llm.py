@@ -0,0 +1,315 @@
+"""
+LLM Calls: Token Accounting and Prompt Compaction
+
+Every Claude call made by the demos goes through complete(), which
+records input, output and cache tokens plus latency per call in a
+TokenLedger and the metrics registry.
+
+Prompts are compacted before they are sent:
+- Instructions shared by every negotiation call live once in
+  SYSTEM_PREFIX and are sent as a system block. The API only caches
+  prefixes of at least PROMPT_CACHE_MIN_TOKENS, so the block is marked
+  with cache_control only when it is that long; the demos' short
+  prefix is billed normally
+- Per-call prompts carry only what varies (persona and prices)
+- Tool descriptions handed to agent frameworks are trimmed to their
+  first sentence by compact_tools()
+
+Calls wait for the shared Claude request and input-token rate limits
+(marketplace.ratelimit) before they are sent. Identical requests sent
+concurrently (same model, prompt, output cap, temperature and streaming
+mode) share one call: the callers that joined it get the same text and
+are recorded as coalesced calls with no tokens used, saving the part of
+the call's latency they did not have to wait for.
+
+With stream=True (or LLM_STREAM=true) complete() uses messages.stream()
+and hands each text chunk to an on_token callback as it arrives; the
+ledger then records time-to-first-token separately from total time.
+
+Each call can pass the uncompacted `baseline` prompt it replaces. The
+ledger compares its estimated size (about 4 characters per token) with
+the estimated size of what was actually sent, and adds the discount on
+any tokens read from the prompt cache (billed at 10% of the input
+rate), so report() can show tokens saved per negotiation.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence
+
+from marketplace.metrics import REGISTRY, label_set, span
+from marketplace.ratelimit import CLAUDE_INPUT_TOKENS, CLAUDE_REQUESTS, retry_after
+from marketplace.singleflight import SingleFlight
+
+CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
+LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', 100))
+LLM_PROMPT_CACHE = os.getenv('LLM_PROMPT_CACHE', 'true').lower() == 'true'
+LLM_STREAM = os.getenv('LLM_STREAM', 'true').lower() == 'true'
+TOOL_DESCRIPTION_LIMIT = 80
+
+# Billing weight of a cache read relative to a regular input token
+CACHE_READ_WEIGHT = 0.1
+CHARS_PER_TOKEN = 4
+
+# Shortest prefix the API will cache (Claude 3.5 Sonnet; Haiku needs 2048)
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+SYSTEM_PREFIX = (
+    "Marketplace negotiation over a used MacBook Pro. "
+    "Reply in character with one short sentence, no preamble."
+)
+
+LLM_TOKENS = REGISTRY.counter(
+    'marketplace_llm_tokens_total', 'LLM tokens by operation and kind (input/output/cache_read/cache_write)')
+LLM_TOKENS_SAVED = REGISTRY.counter(
+    'marketplace_llm_tokens_saved_total', 'Estimated input tokens saved by compaction and caching')
+LLM_TTFT = REGISTRY.histogram(
+    'marketplace_llm_ttft_seconds', 'Time to first streamed token by operation')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for text (about 4 characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact_text(text: str) -> str:
+    """Collapse whitespace runs to single spaces."""
+    return ' '.join(text.split())
+
+
+def compact_description(description: str, limit: int = TOOL_DESCRIPTION_LIMIT) -> str:
+    """First sentence of a description, cut at a word boundary within `limit`."""
+    text = compact_text(description)
+    end = text.find('. ')
+    if end != -1:
+        text = text[:end + 1]
+    if len(text) > limit:
+        text = text[:limit].rsplit(' ', 1)[0].rstrip(',;:')
+    return text
+
+
+def compact_tools(tools: Sequence[Any], limit: int = TOOL_DESCRIPTION_LIMIT) -> int:
+    """
+    Trim the `description` of LangChain / CrewAI tools in place.
+
+    Returns:
+        Estimated prompt tokens saved per call that includes the tools
+    """
+    saved = 0
+    for tool in tools:
+        description = getattr(tool, 'description', None)
+        if not description:
+            continue
+        compact = compact_description(description, limit)
+        saved += estimate_tokens(description) - estimate_tokens(compact)
+        tool.description = compact
+    return saved
+
+
+class TokenLedger:
+    """
+    Per-call token and latency records for one negotiation (or session).
+
+    Calls record actual usage from the API response; calls made through
+    an agent framework that hides usage are recorded with estimates.
+    """
+
+    def __init__(self, name: str = 'session'):
+        self.name = name
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, input_tokens: int, output_tokens: int, latency: float,
+               cache_read: int = 0, cache_write: int = 0, baseline_tokens: Optional[int] = None,
+               sent_tokens: Optional[int] = None, ttft: Optional[float] = None,
+               estimated: bool = False, **extra) -> Dict[str, Any]:
+        """
+        Add one call.
+
+        Args:
+            operation: What the call was for ('sarah_reasoning', ...)
+            input_tokens: Uncached input tokens billed
+            output_tokens: Output tokens
+            latency: Seconds from request to full response
+            ttft: Seconds from request to first streamed token (streamed calls)
+            cache_read: Input tokens read from the prompt cache
+            cache_write: Input tokens written to the prompt cache
+            baseline_tokens: Estimated input tokens of the uncompacted prompt
+            sent_tokens: Estimated input tokens of the compacted prompt
+                         (same estimator as the baseline)
+            estimated: Token counts are estimates, not API usage
+            extra: Additional fields kept with the record
+        """
+        saved = cache_read * (1 - CACHE_READ_WEIGHT)
+        if baseline_tokens is not None and sent_tokens is not None:
+            saved += baseline_tokens - sent_tokens
+        entry = {
+            'operation': operation,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'cache_read': cache_read,
+            'cache_write': cache_write,
+            'latency_ms': latency * 1000,
+            'ttft_ms': ttft * 1000 if ttft is not None else None,
+            'baseline_tokens': baseline_tokens,
+            'tokens_saved': saved,
+            'estimated': estimated,
+            **extra,
+        }
+        with self._lock:
+            self.calls.append(entry)
+        for kind, count in (('input', input_tokens), ('output', output_tokens),
+                            ('cache_read', cache_read), ('cache_write', cache_write)):
+            if count:
+                LLM_TOKENS.inc(label_set(operation=operation, kind=kind), count)
+        if saved > 0:
+            LLM_TOKENS_SAVED.inc(label_set(operation=operation), saved)
+        if ttft is not None:
+            LLM_TTFT.observe(label_set(operation=operation), ttft)
+        return entry
+
+    def totals(self) -> Dict[str, float]:
+        with self._lock:
+            calls = list(self.calls)
+        totals = {key: sum(c[key] for c in calls)
+                  for key in ('input_tokens', 'output_tokens', 'cache_read', 'cache_write',
+                              'latency_ms', 'tokens_saved')}
+        totals['calls'] = len(calls)
+        return totals
+
+    def report(self) -> str:
+        """Per-call table plus totals, as printable text."""
+        lines = [f"📊 Token usage — {self.name}",
+                 f"   {'operation':20}{'in':>7}{'cached':>8}{'out':>6}{'ttft':>8}{'ms':>8}{'saved':>8}"]
+        for c in self.calls:
+            mark = '~' if c['estimated'] else '=' if c.get('coalesced') else ' '
+            ttft = f"{c['ttft_ms']:.0f}" if c['ttft_ms'] is not None else '-'
+            lines.append(f"  {mark}{c['operation']:20}{c['input_tokens']:>7}{c['cache_read']:>8}"
+                         f"{c['output_tokens']:>6}{ttft:>8}{c['latency_ms']:>8.0f}{c['tokens_saved']:>8.0f}")
+        t = self.totals()
+        coalesced = [c for c in self.calls if c.get('coalesced')]
+        lines.append(f"   {'total':20}{t['input_tokens']:>7}{t['cache_read']:>8}"
+                     f"{t['output_tokens']:>6}{'':>8}{t['latency_ms']:>8.0f}{t['tokens_saved']:>8.0f}")
+        lines.append(f"   Saved: ~{t['tokens_saved']:.0f} input tokens across {t['calls']} call(s)")
+        if any(c['estimated'] for c in self.calls):
+            lines.append("   (~ = estimated from prompt length)")
+        if coalesced:
+            lines.append(f"   (= = shared an identical in-flight call; "
+                         f"~{sum(c['ms_saved'] for c in coalesced):.0f} ms of waiting avoided)")
+        return "\n".join(lines)
+
+
+LEDGER = TokenLedger()
+
+# Responses are strings: nothing to copy per caller
+LLM_FLIGHTS = SingleFlight('claude', copy_results=False)
+
+
+def system_blocks(prefix: str = SYSTEM_PREFIX, cache: bool = LLM_PROMPT_CACHE) -> List[Dict[str, Any]]:
+    """The shared system prefix as a Messages API system block (cache-marked if long enough to cache)."""
+    block = {'type': 'text', 'text': prefix}
+    if cache and estimate_tokens(prefix) >= PROMPT_CACHE_MIN_TOKENS:
+        block['cache_control'] = {'type': 'ephemeral'}
+    return [block]
+
+
+def complete(client, operation: str, prompt: str, baseline: Optional[str] = None,
+             system: str = SYSTEM_PREFIX, max_tokens: int = LLM_MAX_TOKENS,
+             model: str = CLAUDE_MODEL, temperature: Optional[float] = None,
+             ledger: Optional[TokenLedger] = None, stream: bool = LLM_STREAM,
+             on_token: Optional[Callable[[str], None]] = None) -> str:
+    """
+    One compacted Claude call with token accounting.
+
+    Streamed calls pass each text chunk to `on_token` as it arrives (the
+    returned text is the whole response either way).
+
+    Args:
+        client: Anthropic client (or a cassette-wrapped one)
+        operation: Name for metrics and the ledger
+        prompt: Per-call user content (only what differs between calls)
+        baseline: The uncompacted standalone prompt this call replaces, for
+                  the saved-tokens estimate
+        system: Shared system prefix (prompt-cached when long enough)
+        max_tokens: Output cap
+        model: Claude model
+        temperature: Sampling temperature (API default if None)
+        ledger: Where to record the call (default: LEDGER)
+        stream: Use messages.stream() and measure time to first token
+        on_token: Called with each text chunk of a streamed response
+
+    Returns:
+        Response text
+    """
+    ledger = ledger or LEDGER
+    request = dict(
+        model=model,
+        max_tokens=max_tokens,
+        system=system_blocks(system),
+        messages=[{"role": "user", "content": compact_text(prompt)}],
+    )
+    if temperature is not None:
+        request['temperature'] = temperature
+    sent_tokens = estimate_tokens(system) + estimate_tokens(prompt)
+    sent = []
+
+    def send() -> str:
+        # Queue for both per-minute limits before the clock starts
+        CLAUDE_REQUESTS.acquire()
+        CLAUDE_INPUT_TOKENS.acquire(sent_tokens)
+        ttft = None
+        start = time.perf_counter()
+        with span('claude', operation):
+            try:
+                if stream:
+                    with client.messages.stream(**request) as response:
+                        for text in response.text_stream:
+                            if ttft is None:
+                                ttft = time.perf_counter() - start
+                            if on_token:
+                                on_token(text)
+                        message = response.get_final_message()
+                else:
+                    message = client.messages.create(**request)
+                    if on_token:
+                        on_token(message.content[0].text)
+            except Exception as e:
+                delay = retry_after(e)
+                if delay is not None:
+                    CLAUDE_REQUESTS.throttled(delay)
+                raise
+        latency = time.perf_counter() - start
+        usage = message.usage
+        # Cache reads do not count toward the input-token limit
+        CLAUDE_INPUT_TOKENS.settle(
+            usage.input_tokens + (getattr(usage, 'cache_creation_input_tokens', None) or 0) - sent_tokens)
+        ledger.record(
+            operation,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            latency=latency,
+            cache_read=getattr(usage, 'cache_read_input_tokens', None) or 0,
+            cache_write=getattr(usage, 'cache_creation_input_tokens', None) or 0,
+            baseline_tokens=estimate_tokens(baseline) if baseline else None,
+            sent_tokens=sent_tokens,
+            ttft=ttft,
+        )
+        sent.append(True)
+        return message.content[0].text.strip(), latency
+
+    # Identical requests already in flight (concurrent sessions) share that call
+    key = (model, max_tokens, temperature, stream, system, request['messages'][0]['content'])
+    start = time.perf_counter()
+    text, call_latency = LLM_FLIGHTS.do(key, send)
+    if not sent:
+        waited = time.perf_counter() - start
+        if on_token:
+            on_token(text)
+        # Joining late saves only what was left of the call, not its full latency
+        ledger.record(operation, input_tokens=0, output_tokens=0, latency=waited,
+                      baseline_tokens=estimate_tokens(baseline) if baseline else sent_tokens,
+                      sent_tokens=0, coalesced=True,
+                      ms_saved=max(0.0, call_latency - waited) * 1000)
+    return text
@@ -0,0 +1,180 @@
+"""
+Tool Memoization
+
+TTL cache for the LangChain / CrewAI tools agents call from their
+reasoning loops. An agent loop often calls the same tool with the same
+arguments several times per session; memoized tools answer repeats from
+the cache without re-running (or re-printing) the tool.
+
+- Per-tool TTL: memoize(ttl=...) or TOOL_CACHE_TTL_<TOOL_NAME> in the env
+- Argument normalization: LLM-written inputs like '"MacBook Pro  2020" '
+  and 'macbook pro 2020' share one entry (casefold=True for free text)
+- Bounded: least recently used entries are evicted beyond `maxsize`
+- State-aware: `version` adds agent state (e.g. a pricing policy key) to
+  the cache key so a state change never serves a stale result
+- Opt-out: side_effects=True (or TOOL_CACHE=false) calls straight through
+
+Hits and misses are counted per tool in the metrics registry.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Any, Optional, Tuple
+
+from marketplace.metrics import REGISTRY, label_set
+
+TOOL_CACHE_ENABLED = os.getenv('TOOL_CACHE', 'true').lower() == 'true'
+TOOL_CACHE_TTL = float(os.getenv('TOOL_CACHE_TTL', 300))
+TOOL_CACHE_SIZE = int(os.getenv('TOOL_CACHE_SIZE', 256))
+
+TOOL_CACHE_HITS = REGISTRY.counter(
+    'marketplace_tool_cache_hits_total', 'Tool calls answered from the memo cache')
+TOOL_CACHE_MISSES = REGISTRY.counter(
+    'marketplace_tool_cache_misses_total', 'Tool calls that ran the tool')
+TOOL_CACHE_EVICTIONS = REGISTRY.counter(
+    'marketplace_tool_cache_evictions_total', 'Memo entries evicted by the size bound')
+
+
+def tool_ttl(name: str, default: float = TOOL_CACHE_TTL) -> float:
+    """TTL for a tool: TOOL_CACHE_TTL_<NAME> if set, else `default`."""
+    return float(os.getenv(f"TOOL_CACHE_TTL_{name.upper()}", default))
+
+
+def normalize(value: Any, casefold: bool = False) -> Any:
+    """
+    Canonical, hashable form of a tool argument.
+
+    Strings are stripped of whitespace and wrapping quotes, internal
+    whitespace is collapsed and numeric strings become floats; containers
+    are normalized recursively (dicts by sorted key).
+    """
+    if isinstance(value, str):
+        text = ' '.join(value.strip().strip('\'"').split())
+        try:
+            return float(text.lstrip('$').replace(',', ''))
+        except ValueError:
+            return text.casefold() if casefold else text
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize(v, casefold)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = (normalize(v, casefold) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else tuple(items)
+    return repr(value)
+
+
+class MemoCache:
+    """
+    Bounded TTL cache (LRU eviction) for one tool.
+
+    Args:
+        name: Tool name used in metrics labels
+        ttl: Seconds an entry stays fresh
+        maxsize: Maximum number of entries
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = TOOL_CACHE_SIZE):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._labels = label_set(tool=name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """(True, value) for a fresh entry, (False, None) otherwise."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                TOOL_CACHE_HITS.inc(self._labels)
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        TOOL_CACHE_MISSES.inc(self._labels)
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                TOOL_CACHE_EVICTIONS.inc(self._labels)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        calls = self.hits + self.misses
+        return {
+            'tool': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / calls if calls else 0.0,
+            'size': len(self._entries),
+            'ttl': self.ttl,
+        }
+
+
+def memoize(ttl: Optional[float] = None, maxsize: int = TOOL_CACHE_SIZE,
+            casefold: bool = False, side_effects: bool = False,
+            version: Optional[Callable[[], Any]] = None,
+            cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    Memoize a tool function for `ttl` seconds.
+
+    Cached results are deep-copied on the way out, so a caller mutating a
+    returned dict does not change what the next caller sees. Exceptions
+    are never cached.
+
+    Args:
+        ttl: Seconds results stay fresh (default: TOOL_CACHE_TTL, overridable
+             per tool with TOOL_CACHE_TTL_<NAME>)
+        maxsize: Entry bound for this tool
+        casefold: Treat string arguments case-insensitively
+        side_effects: Never cache (the tool changes state); calls pass through
+        version: Returns agent state the result depends on; part of the key
+        cache_if: Predicate on the result; False skips caching (e.g. errors)
+
+    The wrapper exposes the cache as `wrapper.cache` (clear(), info()).
+    """
+    def decorator(func):
+        name = func.__name__
+        cache = MemoCache(name, tool_ttl(name, TOOL_CACHE_TTL if ttl is None else ttl), maxsize)
+
+        if side_effects or not TOOL_CACHE_ENABLED or cache.ttl <= 0:
+            func.cache = None
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (normalize(args, casefold), normalize(kwargs, casefold),
+                   version() if version else None)
+            hit, value = cache.get(key)
+            if hit:
+                return copy.deepcopy(value)
+            result = func(*args, **kwargs)
+            if cache_if is None or cache_if(result):
+                cache.put(key, copy.deepcopy(result))
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,288 @@
+"""
+Per-Phase Metrics
+
+Counters, gauges and latency histograms for every phase of a transaction:
+Trust Directory calls, Claude calls, HITL waits and tool execution.
+
+Wrap a call in span() (or decorate it with instrument()) and export the
+results with to_prometheus() or snapshot().
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Tuple, Optional
+
+# Latency buckets in seconds (Prometheus default-style)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def label_set(**labels) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    # Prometheus label value escapes
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter keyed by label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels) -> float:
+        return self._values.get(label_set(**labels), 0)
+
+    def _items(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self._items():
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> list:
+        return [{'labels': dict(labels), 'value': value}
+                for labels, value in self._items()]
+
+
+class Gauge:
+    """Point-in-time value keyed by label set (e.g. queue depth)."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, labels: Labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels) -> float:
+        return self._values.get(label_set(**labels), 0)
+
+    def _items(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in self._items():
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> list:
+        return [{'labels': dict(labels), 'value': value}
+                for labels, value in self._items()]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def count(self, **labels) -> int:
+        series = self._series.get(label_set(**labels))
+        return series[-2] if series else 0
+
+    def _items(self) -> list:
+        # Copies: observe() updates series lists in place
+        with self._lock:
+            return sorted((labels, list(series)) for labels, series in self._series.items())
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', str(bound)))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {series[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-2]}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> list:
+        result = []
+        for labels, series in self._items():
+            count, total = series[-2], series[-1]
+            result.append({
+                'labels': dict(labels),
+                'count': count,
+                'sum': total,
+                'mean': total / count if count else 0.0,
+                'buckets': {str(b): c for b, c in zip(self.buckets, series)},
+            })
+        return result
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them for export."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        return "\n".join(m.to_prometheus() for m in list(self._metrics.values())) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dict."""
+        return {
+            'timestamp': time.time(),
+            'metrics': {name: m.snapshot() for name, m in list(self._metrics.items())}
+        }
+
+    def write(self, path: str):
+        """
+        Write a JSON snapshot to `path` and Prometheus text next to it.
+
+        Args:
+            path: Destination for the JSON snapshot (`.prom` file is a sibling)
+        """
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        prom_path = path[:-5] + '.prom' if path.endswith('.json') else path + '.prom'
+        with open(prom_path, 'w') as f:
+            f.write(self.to_prometheus())
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+PHASE_CALLS = REGISTRY.counter(
+    'marketplace_phase_calls_total', 'Calls per transaction phase and operation')
+PHASE_ERRORS = REGISTRY.counter(
+    'marketplace_phase_errors_total', 'Failed calls per transaction phase and operation')
+PHASE_LATENCY = REGISTRY.histogram(
+    'marketplace_phase_latency_seconds', 'Latency per transaction phase and operation')
+
+
+class Span:
+    """Handle yielded by span(); call mark_error() for soft failures."""
+
+    __slots__ = ('labels', 'error')
+
+    def __init__(self, labels: Labels):
+        self.labels = labels
+        self.error = False
+
+    def mark_error(self):
+        self.error = True
+
+
+@contextmanager
+def span(phase: str, operation: str):
+    """
+    Time one call and record it under (phase, operation).
+
+    Exceptions are counted as errors and re-raised. Failures that do not
+    raise (e.g. HTTP 5xx) can be flagged with the yielded Span.
+
+    Args:
+        phase: Transaction phase ('directory', 'claude', 'hitl', 'tool')
+        operation: Operation within the phase
+    """
+    current = Span(label_set(phase=phase, operation=operation))
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        PHASE_LATENCY.observe(current.labels, time.perf_counter() - start)
+        PHASE_CALLS.inc(current.labels)
+        if current.error:
+            PHASE_ERRORS.inc(current.labels)
+
+
+def instrument(phase: str, operation: Optional[str] = None):
+    """Decorator form of span(); operation defaults to the function name."""
+    def decorator(func):
+        name = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(phase, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_response(current: Span, response):
+    """Flag a directory span as failed when the server returned 5xx."""
+    if response.status_code >= 500:
+        current.mark_error()
+    return response
+
+
+def to_prometheus() -> str:
+    return REGISTRY.to_prometheus()
+
+
+def snapshot() -> Dict[str, Any]:
+    return REGISTRY.snapshot()
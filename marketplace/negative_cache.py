@@ -0,0 +1,118 @@
+"""
+Negative Cache
+
+Remembers agent IDs the Trust Directory answered 404 for, so repeated
+lookups of unknown (spammy or spoofed) IDs are answered locally instead
+of costing a directory request each time.
+
+- Exact: a bounded TTL set of IDs rather than a Bloom filter, so there
+  are no false positives and a registered agent is never reported
+  unknown because of a hash collision
+- Bounded: least recently added entries are evicted beyond `maxsize`,
+  so a flood of random IDs costs fixed memory
+- Fresh: entries expire after `ttl` (registrations made elsewhere show
+  up within it) and are dropped immediately when this process registers
+  the agent or sees it in the listing or change feed
+- Race-safe: a 404 that was in flight while an entry was invalidated is
+  not recorded (add() takes the generation observed before the lookup)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Iterable, Optional
+
+from marketplace.metrics import REGISTRY, label_set
+
+NEGATIVE_CACHE_TTL = float(os.getenv('DIRECTORY_NEGATIVE_TTL', 30))
+NEGATIVE_CACHE_SIZE = int(os.getenv('DIRECTORY_NEGATIVE_SIZE', 10000))
+
+NEGATIVE_CACHE_HITS = REGISTRY.counter(
+    'marketplace_negative_cache_hits_total', 'Lookups of unknown keys answered locally')
+NEGATIVE_CACHE_EVICTIONS = REGISTRY.counter(
+    'marketplace_negative_cache_evictions_total', 'Negative entries evicted by the size bound')
+
+
+class NegativeCache:
+    """
+    Bounded TTL set of keys known to be absent upstream.
+
+    Args:
+        name: Used in metrics labels
+        ttl: Seconds a key stays known-absent
+        maxsize: Maximum number of keys
+    """
+
+    def __init__(self, name: str, ttl: float = NEGATIVE_CACHE_TTL, maxsize: int = NEGATIVE_CACHE_SIZE):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.generation = 0
+        self._expiry: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._labels = label_set(cache=name)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """True if `key` is known absent (and the entry is still fresh)."""
+        if not self._expiry:
+            return False
+        with self._lock:
+            expiry = self._expiry.get(key)
+            if expiry is None:
+                return False
+            if expiry <= time.monotonic():
+                del self._expiry[key]
+                return False
+            self.hits += 1
+        NEGATIVE_CACHE_HITS.inc(self._labels)
+        return True
+
+    def add(self, key: Hashable, generation: Optional[int] = None):
+        """
+        Record `key` as absent.
+
+        Args:
+            generation: self.generation read before the lookup that found
+                        the key absent; if anything was invalidated since,
+                        the answer may be stale and is not recorded
+        """
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._expiry[key] = time.monotonic() + self.ttl
+            self._expiry.move_to_end(key)
+            while len(self._expiry) > self.maxsize:
+                self._expiry.popitem(last=False)
+                NEGATIVE_CACHE_EVICTIONS.inc(self._labels)
+
+    def discard(self, key: Hashable):
+        """Forget `key` (it now exists)."""
+        self.discard_all((key,))
+
+    def discard_all(self, keys: Iterable[Hashable]):
+        """Forget every key in `keys` that is cached."""
+        with self._lock:
+            self.generation += 1
+            if self._expiry:
+                for key in keys:
+                    self._expiry.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._expiry.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'cache': self.name,
+            'size': len(self._expiry),
+            'hits': self.hits,
+            'ttl': self.ttl,
+        }
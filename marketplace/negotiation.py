@@ -0,0 +1,243 @@
+"""
+Negotiation Engine
+
+Bounded offer / counter-offer protocol between a buyer and a seller.
+
+The seller side is any callable with the signature of
+HenriSellerAgent.receive_offer(buyer_id, offer_price) returning
+{'response': 'accept' | 'counter' | 'too_low', 'counter_price': ...}.
+SellerPolicy provides the same rules without I/O, so many negotiations
+can run in one process. SellerPolicy.evaluate_batch applies them to whole
+arrays of offers at once for busy sellers.
+
+States:
+    OPEN -> OFFERED -> COUNTERED -> OFFERED ... -> AGREED
+                                            \\-> STALLED | EXHAUSTED | TIMED_OUT | CANCELLED
+"""
+
+import time
+from enum import Enum
+from typing import Callable, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from marketplace.resilience import remaining_time
+
+
+class NegotiationState(Enum):
+    OPEN = 'open'
+    OFFERED = 'offered'
+    COUNTERED = 'countered'
+    AGREED = 'agreed'
+    STALLED = 'stalled'          # neither side is moving any more
+    EXHAUSTED = 'exhausted'      # max rounds reached without agreement
+    TIMED_OUT = 'timed_out'
+    CANCELLED = 'cancelled'
+
+    @property
+    def terminal(self) -> bool:
+        return self not in (NegotiationState.OPEN, NegotiationState.OFFERED,
+                            NegotiationState.COUNTERED)
+
+
+class SellerPolicy:
+    """
+    Henri's pricing rules as a pure function.
+
+    - offer below min_price          -> too_low, counter at min_price + margin
+    - profit below min_profit        -> counter at cost_basis + min_profit + margin
+    - otherwise                      -> accept
+    """
+
+    __slots__ = ('min_price', 'cost_basis', 'min_profit', 'margin')
+
+    def __init__(self, min_price: float, cost_basis: float, min_profit: float = 100,
+                 margin: float = 50):
+        self.min_price = min_price
+        self.cost_basis = cost_basis
+        self.min_profit = min_profit
+        self.margin = margin
+
+    @property
+    def key(self) -> tuple:
+        """Everything a decision depends on (used to invalidate pricing tables)."""
+        return (self.min_price, self.cost_basis, self.min_profit, self.margin)
+
+    @property
+    def too_low_counter(self) -> float:
+        return self.min_price + self.margin
+
+    @property
+    def profit_counter(self) -> float:
+        return self.cost_basis + self.min_profit + self.margin
+
+    def evaluate(self, offer_price: float) -> Dict[str, Any]:
+        """Return a receive_offer-style decision for one offer."""
+        profit = offer_price - self.cost_basis
+        if offer_price < self.min_price:
+            response, counter_price = 'too_low', self.too_low_counter
+        elif profit < self.min_profit:
+            response, counter_price = 'counter', self.profit_counter
+        else:
+            response, counter_price = 'accept', offer_price
+        return {'response': response, 'counter_price': counter_price, 'profit': profit}
+
+    def respond(self, buyer_id: str, offer_price: float) -> Dict[str, Any]:
+        """Seller callable for Negotiation (buyer_id is unused by the pure policy)."""
+        return self.evaluate(offer_price)
+
+    def evaluate_batch(self, offer_prices: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Vectorized evaluate() over many offers.
+
+        Args:
+            offer_prices: Offered prices
+
+        Returns:
+            Column arrays: price, profit, margin_percent, response, counter_price
+        """
+        prices = np.asarray(offer_prices, dtype=np.float64)
+        profit = prices - self.cost_basis
+        margin = np.divide(profit, prices, out=np.zeros_like(prices), where=prices != 0) * 100
+        too_low = prices < self.min_price
+        counter = ~too_low & (profit < self.min_profit)
+        response = np.where(too_low, 'too_low', np.where(counter, 'counter', 'accept'))
+        counter_price = np.where(too_low, self.too_low_counter,
+                                 np.where(counter, self.profit_counter, prices))
+        return {
+            'price': prices,
+            'profit': profit,
+            'margin_percent': margin,
+            'response': response,
+            'counter_price': counter_price,
+        }
+
+
+class BuyerPolicy:
+    """
+    Sarah's concession strategy.
+
+    Opens `opening_discount` below the target and, on each counter above
+    budget, moves `concession` of the remaining distance to the budget.
+    Any counter within budget is accepted.
+    """
+
+    __slots__ = ('max_budget', 'opening_discount', 'concession')
+
+    def __init__(self, max_budget: float, opening_discount: float = 50, concession: float = 0.5):
+        self.max_budget = max_budget
+        self.opening_discount = opening_discount
+        self.concession = concession
+
+    def opening_offer(self, target_price: float) -> float:
+        return min(target_price, self.max_budget) - self.opening_discount
+
+    def next_offer(self, last_offer: float, counter_price: float) -> Optional[float]:
+        """
+        Return the next offer, or None when the buyer has nothing left to give.
+        """
+        if last_offer >= self.max_budget:
+            return None
+        step = self.concession * (min(counter_price, self.max_budget) - last_offer)
+        return round(min(self.max_budget, last_offer + max(step, 1.0)), 2)
+
+
+class Negotiation:
+    """
+    One buyer/seller negotiation session.
+
+    Args:
+        buyer_id: Buyer's agent ID (passed to the seller)
+        buyer: Buyer concession policy
+        respond: Seller callable (buyer_id, offer_price) -> decision dict
+        target_price: Buyer's target price (opening offer is derived from it)
+        max_rounds: Maximum offers the buyer will make
+        timeout: Wall-clock budget in seconds (also bounded by the session deadline)
+        epsilon: Price gap treated as converged (the buyer then makes a final
+                 offer at its budget; the agreed price never exceeds it)
+    """
+
+    __slots__ = ('buyer_id', 'buyer', 'respond', 'state', 'round', 'max_rounds',
+                 'offer', 'counter', 'agreed_price', 'history', 'deadline',
+                 'epsilon', 'cancelled')
+
+    def __init__(self, buyer_id: str, buyer: BuyerPolicy, respond: Callable,
+                 target_price: float, max_rounds: int = 8, timeout: float = 30.0,
+                 epsilon: float = 1.0):
+        self.buyer_id = buyer_id
+        self.buyer = buyer
+        self.respond = respond
+        self.state = NegotiationState.OPEN
+        self.round = 0
+        self.max_rounds = max_rounds
+        self.offer = buyer.opening_offer(target_price)
+        self.counter: Optional[float] = None
+        self.agreed_price: Optional[float] = None
+        self.history = []  # (round, offer, response, counter_price)
+        session_left = remaining_time()
+        budget = timeout if session_left is None else min(timeout, session_left)
+        self.deadline = time.monotonic() + budget
+        self.epsilon = epsilon
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop at the next round boundary."""
+        self.cancelled = True
+
+    def _finish(self, state: NegotiationState, price: Optional[float] = None) -> NegotiationState:
+        self.state = state
+        self.agreed_price = price
+        return state
+
+    def step(self) -> NegotiationState:
+        """Run one offer/response round."""
+        if self.state.terminal:
+            return self.state
+        if self.cancelled:
+            return self._finish(NegotiationState.CANCELLED)
+        if time.monotonic() >= self.deadline:
+            return self._finish(NegotiationState.TIMED_OUT)
+        if self.round >= self.max_rounds:
+            return self._finish(NegotiationState.EXHAUSTED)
+
+        self.round += 1
+        self.state = NegotiationState.OFFERED
+        decision = self.respond(self.buyer_id, self.offer)
+        response, counter_price = decision['response'], decision['counter_price']
+        self.history.append((self.round, self.offer, response, counter_price))
+
+        if response == 'accept':
+            return self._finish(NegotiationState.AGREED, self.offer)
+
+        previous_counter, self.counter = self.counter, counter_price
+        self.state = NegotiationState.COUNTERED
+        if counter_price <= self.buyer.max_budget:
+            return self._finish(NegotiationState.AGREED, counter_price)
+        if counter_price - self.offer <= self.epsilon:
+            # Converged, but above budget: one final offer at the budget, never beyond it
+            if self.offer >= self.buyer.max_budget:
+                return self._finish(NegotiationState.STALLED)
+            self.offer = self.buyer.max_budget
+            return self.state
+
+        next_offer = self.buyer.next_offer(self.offer, counter_price)
+        if next_offer is None or (next_offer == self.offer and counter_price == previous_counter):
+            return self._finish(NegotiationState.STALLED)
+        self.offer = next_offer
+        return self.state
+
+    def run(self) -> NegotiationState:
+        """Run rounds until a terminal state."""
+        while not self.state.terminal:
+            self.step()
+        return self.state
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'state': self.state.value,
+            'rounds': self.round,
+            'agreed_price': self.agreed_price,
+            'last_offer': self.offer,
+            'last_counter': self.counter,
+            'history': list(self.history),
+        }
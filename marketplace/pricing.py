@@ -0,0 +1,171 @@
+"""
+Pricing Tables
+
+Precomputed decision tables per SKU.
+
+A SellerPolicy decision is piecewise over the offered price: too_low
+below min_price, counter below the profit floor (cost_basis +
+min_profit), accept from the reservation price up. A PricingTable keeps
+only those breakpoints and each segment's response and counter price,
+so a lookup is one bisect plus arithmetic (profit = price - cost basis)
+and the table has the same small size whatever the SKU's price. Results
+are always identical to SellerPolicy.evaluate().
+
+PriceBook holds one table per SKU and rebuilds a table only when the
+cost basis or pricing policy behind it changes.
+"""
+
+import bisect
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from marketplace.negotiation import SellerPolicy
+
+# Decision codes: index of the price segment, below the first breakpoint first
+RESPONSES = ('too_low', 'counter', 'accept')
+
+
+class PricingTable:
+    """
+    Precomputed SellerPolicy breakpoints for one SKU.
+
+    Args:
+        sku: Product identifier
+        policy: Seller pricing rules for this SKU
+    """
+
+    def __init__(self, sku: str, policy: SellerPolicy):
+        self.sku = sku
+        self.policy = policy
+        self.key = policy.key
+        self.cost_basis = policy.cost_basis
+
+        # Lowest price Henri accepts outright, and what he counters with
+        self.reservation_price = max(policy.min_price, policy.cost_basis + policy.min_profit)
+        self.too_low_counter = policy.too_low_counter
+        self.profit_counter = policy.profit_counter
+
+        # Segment i covers breakpoints[i - 1] <= price < breakpoints[i]; the
+        # counter segment is empty when min_price already covers the profit floor
+        self.breakpoints = [policy.min_price, self.reservation_price]
+        self._breakpoints = np.asarray(self.breakpoints, dtype=np.float64)
+        self._counters = np.asarray([self.too_low_counter, self.profit_counter, np.nan])
+
+    @property
+    def stale(self) -> bool:
+        """True once the policy's cost basis or rules no longer match the table."""
+        return self.policy.key != self.key
+
+    def _decide(self, price: float):
+        code = bisect.bisect_right(self.breakpoints, price)
+        if code == 0:
+            return 'too_low', self.too_low_counter
+        if code == 1:
+            return 'counter', self.profit_counter
+        return 'accept', price
+
+    def lookup(self, price: float) -> Dict[str, Any]:
+        """
+        Evaluate one price.
+
+        Returns:
+            Dict with sale_price, cost_basis, profit, margin_percent,
+            acceptable, response and counter_price
+        """
+        response, counter_price = self._decide(price)
+        profit = price - self.cost_basis
+        return {
+            'sale_price': price,
+            'cost_basis': self.cost_basis,
+            'profit': profit,
+            'margin_percent': (profit / price) * 100 if price else 0.0,
+            'acceptable': response == 'accept',
+            'response': response,
+            'counter_price': counter_price,
+        }
+
+    def evaluate(self, price: float) -> Dict[str, Any]:
+        """receive_offer-style decision (response, counter_price, profit)."""
+        response, counter_price = self._decide(price)
+        return {'response': response, 'counter_price': counter_price,
+                'profit': price - self.cost_basis}
+
+    def evaluate_batch(self, prices: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Table-backed SellerPolicy.evaluate_batch.
+
+        Args:
+            prices: Offered prices
+
+        Returns:
+            Column arrays: price, profit, margin_percent, response,
+            response_code (index into RESPONSES), counter_price
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        code = np.searchsorted(self._breakpoints, prices, side='right')
+        profit = prices - self.cost_basis
+        accept = code == len(self.breakpoints)
+        return {
+            'price': prices,
+            'profit': profit,
+            'margin_percent': np.divide(profit, prices, out=np.zeros_like(prices),
+                                        where=prices != 0) * 100,
+            'response': np.asarray(RESPONSES)[code],
+            'response_code': code.astype(np.int8),
+            'counter_price': np.where(accept, prices, self._counters[code]),
+        }
+
+
+class PriceBook:
+    """
+    Pricing tables for a seller's inventory, keyed by SKU.
+
+    Tables are built on first use and rebuilt only when the SKU's policy
+    key (min_price, cost_basis, min_profit) has changed since the build.
+    """
+
+    def __init__(self):
+        self._policies: Dict[str, SellerPolicy] = {}
+        self._tables: Dict[str, PricingTable] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def set_policy(self, sku: str, policy: SellerPolicy):
+        """Register or replace the pricing policy for a SKU."""
+        with self._lock:
+            self._policies[sku] = policy
+            table = self._tables.get(sku)
+            if table is not None and table.policy is not policy:
+                del self._tables[sku]
+
+    def table(self, sku: str) -> PricingTable:
+        """Return the current table for a SKU, rebuilding it if stale."""
+        table = self._tables.get(sku)
+        if table is not None and not table.stale:
+            return table
+        with self._lock:
+            table = self._tables.get(sku)
+            if table is None or table.stale:
+                policy = self._policies[sku]
+                table = self._tables[sku] = PricingTable(sku, policy)
+                self.builds += 1
+            return table
+
+    def invalidate(self, sku: Optional[str] = None):
+        """Drop one SKU's table (or all tables) so the next lookup rebuilds."""
+        with self._lock:
+            if sku is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(sku, None)
+
+    def lookup(self, sku: str, price: float) -> Dict[str, Any]:
+        return self.table(sku).lookup(price)
+
+    def evaluate(self, sku: str, price: float) -> Dict[str, Any]:
+        return self.table(sku).evaluate(price)
+
+    def evaluate_batch(self, sku: str, prices: Sequence[float]) -> Dict[str, np.ndarray]:
+        return self.table(sku).evaluate_batch(prices)
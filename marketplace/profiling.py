@@ -0,0 +1,80 @@
+"""
+Per-Session Profiling
+
+Opt-in cProfile wrapper for a single orchestrated negotiation.
+
+Enable with DEMO_PROFILE=true (or profile=True per session). Each
+profiled session writes `<DEMO_PROFILE_DIR>/<session_id>.prof` and
+prints a top-N hot-function summary. When disabled the wrapper is a
+plain no-op context manager. Concurrent and sharded runs profile each
+session on the thread or worker process that runs it.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILE_ENABLED = os.getenv('DEMO_PROFILE', 'false').lower() == 'true'
+PROFILE_DIR = os.getenv('DEMO_PROFILE_DIR', 'profiles')
+PROFILE_TOP_N = int(os.getenv('DEMO_PROFILE_TOP_N', 15))
+
+
+def hot_functions(profile_path: str, top_n: int = PROFILE_TOP_N,
+                  sort_by: str = 'cumulative') -> str:
+    """
+    Render the top-N functions of a saved profile.
+
+    Args:
+        profile_path: Path to a `.prof` file
+        top_n: Number of functions to list
+        sort_by: pstats sort key ('cumulative', 'tottime', ...)
+
+    Returns:
+        pstats text report
+    """
+    out = io.StringIO()
+    stats = pstats.Stats(profile_path, stream=out)
+    stats.strip_dirs().sort_stats(sort_by).print_stats(top_n)
+    return out.getvalue()
+
+
+@contextmanager
+def profile_session(session_id: str, enabled: Optional[bool] = None,
+                    output_dir: str = PROFILE_DIR, top_n: int = PROFILE_TOP_N):
+    """
+    Profile one negotiation session.
+
+    Args:
+        session_id: Used as the profile file name
+        enabled: Per-session override; defaults to DEMO_PROFILE
+        output_dir: Directory for `.prof` files
+        top_n: Functions to include in the printed summary
+
+    Yields:
+        Path of the profile file, or None when profiling is disabled
+    """
+    if not (PROFILE_ENABLED if enabled is None else enabled):
+        yield None
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{session_id}.prof")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ allows one active profiler per process (concurrent sessions)
+        print(f"\n⚠️  Session {session_id} not profiled: {e}")
+        yield None
+        return
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"\n🔬 Profile for session {session_id} saved to {path}")
+        print(f"   Top {top_n} functions by cumulative time:\n")
+        print(hot_functions(path, top_n))
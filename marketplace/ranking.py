@@ -0,0 +1,125 @@
+"""
+Seller Ranking
+
+Composite scoring and top-k selection for discovered sellers.
+
+The score blends trust score, sales history, price against the buyer's
+budget and price against the market average. top_k() uses heap
+selection (O(n log k)) instead of sorting every candidate, and
+StreamRanker keeps a bounded heap so candidates can be ranked as they
+arrive from discovery.
+"""
+
+import heapq
+import math
+from itertools import count
+from typing import Iterable, List, Optional
+
+from marketplace.records import SellerCandidate
+
+# Average of the eBay / Craigslist / Facebook averages from market research
+DEFAULT_MARKET_AVERAGE = 500
+
+# Sales count at which the sales-history component saturates
+SALES_SATURATION = 500
+
+# Component weights (sum to 1)
+WEIGHTS = {
+    'trust': 0.40,
+    'sales': 0.20,
+    'budget': 0.25,
+    'market': 0.15,
+}
+
+
+def _relative_saving(price: float, reference: float) -> float:
+    """Saving vs reference, where 10% below reference scores 1 and 10% above scores -1."""
+    if not reference:
+        return 0.0
+    return max(-1.0, min(1.0, (reference - price) / (0.1 * reference)))
+
+
+def score_seller(seller: SellerCandidate, budget: float,
+                 market_average: float = DEFAULT_MARKET_AVERAGE) -> float:
+    """
+    Composite desirability score for one seller (higher is better).
+
+    Args:
+        seller: Candidate from discovery
+        budget: Buyer's maximum budget
+        market_average: Market average price for the product
+
+    Returns:
+        Weighted score, roughly in [-0.4, 1]
+    """
+    trust = seller.trust_score / 5.0
+    sales = min(1.0, math.log1p(seller.total_sales) / math.log1p(SALES_SATURATION))
+    return (WEIGHTS['trust'] * trust
+            + WEIGHTS['sales'] * sales
+            + WEIGHTS['budget'] * _relative_saving(seller.price, budget)
+            + WEIGHTS['market'] * _relative_saving(seller.price, market_average))
+
+
+def top_k(sellers: Iterable[SellerCandidate], k: int, budget: float,
+          market_average: float = DEFAULT_MARKET_AVERAGE) -> List[SellerCandidate]:
+    """
+    Return the k best sellers, best first.
+
+    Args:
+        sellers: Candidates (any iterable, consumed once)
+        k: Number of sellers to keep
+        budget: Buyer's maximum budget
+        market_average: Market average price
+
+    Returns:
+        Up to k sellers ordered by descending score
+    """
+    return heapq.nlargest(k, sellers, key=lambda s: score_seller(s, budget, market_average))
+
+
+class StreamRanker:
+    """
+    Incremental top-k over a stream of candidates.
+
+    Keeps a min-heap of at most k entries; each push is O(log k).
+
+    Args:
+        k: Number of sellers to keep
+        budget: Buyer's maximum budget
+        market_average: Market average price
+    """
+
+    def __init__(self, k: int, budget: float, market_average: float = DEFAULT_MARKET_AVERAGE):
+        self.k = k
+        self.budget = budget
+        self.market_average = market_average
+        self.seen = 0
+        self._heap = []
+        self._order = count()  # tie-breaker: earlier directory order wins
+
+    def push(self, seller: SellerCandidate) -> Optional[float]:
+        """
+        Offer one candidate.
+
+        Returns:
+            Its score if it entered the current top k, else None
+        """
+        self.seen += 1
+        score = score_seller(seller, self.budget, self.market_average)
+        entry = (score, -next(self._order), seller)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return score
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return score
+        return None
+
+    def extend(self, sellers: Iterable[SellerCandidate]) -> 'StreamRanker':
+        for seller in sellers:
+            self.push(seller)
+        return self
+
+    def results(self) -> List[SellerCandidate]:
+        """Current top k, best first."""
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
@@ -0,0 +1,279 @@
+"""
+Upstream Rate Limiting
+
+Token buckets shared by every caller of an upstream (Claude and the
+Trust Directory), so concurrent sessions pace themselves just under the
+provider's limits instead of running into 429s and falling back.
+
+- Per-upstream buckets: Claude requests per minute, Claude input tokens
+  per minute and Trust Directory requests per second, each configured
+  below the provider limit by RATE_LIMIT_HEADROOM
+- Priorities: waiters are served strictly by priority, then in arrival
+  order. Calls a person is waiting on (priority_scope(Priority.HITL))
+  go ahead of session work, which goes ahead of background work
+- Backoff: a 429 that gets through (limits shared with other clients)
+  pauses the bucket for the server's Retry-After, so all callers back
+  off together instead of each retrying into the limit
+- Waits are clamped to the session deadline and recorded per upstream
+  and priority in the metrics registry
+
+Buckets are per process. Sharded runs give each worker its share with
+scale_limits(). Replayed cassettes are not rate limited.
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from marketplace.cassette import active_cassette
+from marketplace.metrics import REGISTRY, label_set
+from marketplace.resilience import remaining_time
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT', 'true').lower() == 'true'
+# Fraction of each provider limit to use
+RATE_LIMIT_HEADROOM = float(os.getenv('RATE_LIMIT_HEADROOM', 0.9))
+# Bucket capacity, in seconds of refill
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 5))
+CLAUDE_RPM = float(os.getenv('CLAUDE_RPM', 50))
+CLAUDE_ITPM = float(os.getenv('CLAUDE_ITPM', 40000))
+DIRECTORY_RPS = float(os.getenv('DIRECTORY_RPS', 20))
+
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    'marketplace_rate_limit_wait_seconds', 'Time spent waiting for an upstream rate limit token')
+RATE_LIMIT_WAITING = REGISTRY.gauge(
+    'marketplace_rate_limit_waiting', 'Callers currently queued on an upstream bucket')
+RATE_LIMIT_THROTTLED = REGISTRY.counter(
+    'marketplace_rate_limit_throttled_total', '429 responses received from an upstream')
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a token is not available before the timeout or session deadline."""
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    HITL = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+_priority: contextvars.ContextVar = contextvars.ContextVar('rate_limit_priority', default=Priority.NORMAL)
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Queue rate-limited calls made inside this block at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Token bucket with a priority queue of waiters.
+
+    Args:
+        name: Upstream name used in metrics labels
+        rate: Tokens added per second
+        burst: Capacity in tokens (default: RATE_LIMIT_BURST seconds of refill)
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        self.name = name
+        self.base_rate = rate
+        self.base_burst = burst
+        self.rate = rate
+        self.capacity = max(1.0, rate * RATE_LIMIT_BURST if burst is None else burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled_count = 0
+        self._waiters: list = []
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._labels = label_set(upstream=name)
+
+    def scale(self, fraction: float):
+        """Set the rate and capacity to `fraction` of the configured values."""
+        with self._cond:
+            self.rate = self.base_rate * fraction
+            burst = self.rate * RATE_LIMIT_BURST if self.base_burst is None else self.base_burst * fraction
+            self.capacity = max(1.0, burst)
+            self.tokens = min(self.tokens, self.capacity)
+            self._cond.notify_all()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost: float = 1, priority: Optional[Priority] = None,
+                timeout: Optional[float] = None) -> float:
+        """
+        Take `cost` tokens, waiting behind higher-priority and earlier callers.
+
+        Args:
+            cost: Tokens to take (capped at the bucket capacity)
+            priority: Queue priority (default: the current priority_scope)
+            timeout: Longest wait (default: until the session deadline)
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            RateLimitTimeout: If no token is available in time
+        """
+        if not limits_active():
+            return 0.0
+        priority = current_priority() if priority is None else priority
+        if timeout is None:
+            timeout = remaining_time()
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = (priority, next(self._ids))
+
+        with self._cond:
+            cost = min(cost, self.capacity)
+            heapq.heappush(self._waiters, ticket)
+            RATE_LIMIT_WAITING.set(self._labels, len(self._waiters))
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    first = self._waiters[0] == ticket
+                    if first and now >= self.blocked_until and self.tokens >= cost:
+                        heapq.heappop(self._waiters)
+                        self.tokens -= cost
+                        break
+                    # Only the head of the queue knows when it can go; others wait for a notify
+                    wait = max(self.blocked_until - now, (cost - self.tokens) / self.rate) if first else None
+                    if deadline is not None:
+                        left = deadline - now
+                        if left <= 0:
+                            self._waiters.remove(ticket)
+                            heapq.heapify(self._waiters)
+                            raise RateLimitTimeout(f"no {self.name} token within {timeout:.2f}s")
+                        wait = left if wait is None else min(wait, left)
+                    self._cond.wait(wait)
+            finally:
+                RATE_LIMIT_WAITING.set(self._labels, len(self._waiters))
+                self._cond.notify_all()
+
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.observe(label_set(upstream=self.name, priority=priority.name.lower()), waited)
+        return waited
+
+    def settle(self, amount: float):
+        """Charge (or refund, if negative) the difference between estimated and actual cost."""
+        if not amount or not limits_active():
+            return
+        with self._cond:
+            self._refill(time.monotonic())
+            # A debt delays the next callers until the refill catches up
+            self.tokens = min(self.capacity, self.tokens - amount)
+            self._cond.notify_all()
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """Record a 429: hold every caller back for `retry_after` seconds (default: one token)."""
+        RATE_LIMIT_THROTTLED.inc(self._labels)
+        with self._cond:
+            self.throttled_count += 1
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            delay = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self._cond.notify_all()
+
+    def info(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'upstream': self.name,
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'tokens': self.tokens,
+                'waiting': len(self._waiters),
+                'throttled': self.throttled_count,
+            }
+
+
+CLAUDE_REQUESTS = TokenBucket('claude', CLAUDE_RPM * RATE_LIMIT_HEADROOM / 60)
+CLAUDE_INPUT_TOKENS = TokenBucket('claude_input_tokens', CLAUDE_ITPM * RATE_LIMIT_HEADROOM / 60)
+DIRECTORY_REQUESTS = TokenBucket('trust_directory', DIRECTORY_RPS * RATE_LIMIT_HEADROOM)
+BUCKETS = (CLAUDE_REQUESTS, CLAUDE_INPUT_TOKENS, DIRECTORY_REQUESTS)
+
+
+def limits_active() -> bool:
+    """False when disabled (RATE_LIMIT=false) or while replaying a cassette."""
+    if not RATE_LIMIT_ENABLED:
+        return False
+    cassette = active_cassette()
+    return cassette is None or cassette.mode != 'replay'
+
+
+def scale_limits(fraction: float):
+    """Give this process `fraction` of every upstream limit (e.g. 1 / shards)."""
+    for bucket in BUCKETS:
+        bucket.scale(fraction)
+
+
+def retry_after(response_or_error: Any) -> Optional[float]:
+    """
+    Seconds to back off if a response (or API exception) is a 429, else None.
+
+    Uses the Retry-After header when present, otherwise 1 second.
+    """
+    status = getattr(response_or_error, 'status_code', None)
+    if status != 429:
+        return None
+    response = getattr(response_or_error, 'response', response_or_error)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after', 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def langchain_handler(priority: Optional[Priority] = None):
+    """
+    LangChain callback that rate limits each chat model call an agent loop makes.
+
+    Pass it in the model's `callbacks`; the agent framework otherwise
+    calls Claude without going through complete().
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+    from marketplace.llm import estimate_tokens
+
+    class RateLimitHandler(BaseCallbackHandler):
+        # Let RateLimitTimeout stop the call instead of being logged
+        raise_error = True
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            CLAUDE_REQUESTS.acquire(priority=priority)
+            CLAUDE_INPUT_TOKENS.acquire(
+                sum(estimate_tokens(str(m.content)) for batch in messages for m in batch),
+                priority=priority)
+
+        def on_llm_error(self, error, **kwargs):
+            delay = retry_after(error)
+            if delay is not None:
+                CLAUDE_REQUESTS.throttled(delay)
+
+    return RateLimitHandler()
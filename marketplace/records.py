@@ -0,0 +1,186 @@
+"""
+Directory Records
+
+Compact, slotted record types for Trust Directory agents and seller
+candidates. Directory JSON is parsed into AgentRecord once, at the edge;
+discovery and ranking work on records, and to_dict() is only used when
+data leaves the process (printing JSON, HTTP responses).
+
+Identical capability lists (and other metadata, such as `verified`) are
+shared between records, so a directory of hundreds of thousands of
+agents costs one small object per agent.
+"""
+
+import sys
+from typing import Dict, Any, FrozenSet, Iterable, Iterator, Optional
+
+# Defaults used by the agents when metadata is missing
+DEFAULT_PRICE = 500
+
+# Metadata fields AgentRecord keeps as attributes; any others ride along in `extra`
+_RECORD_FIELDS = frozenset(('name', 'role', 'capabilities', 'trust_score', 'total_sales', 'price'))
+
+# Distinct values each sharing table holds (agents choose their metadata).
+# A full table is emptied rather than frozen, so current listings keep
+# sharing; records parsed earlier keep their own references.
+MAX_SHARED_VALUES = 4096
+
+_capability_sets: Dict[tuple, FrozenSet[str]] = {}
+
+
+def _shared_capabilities(capabilities: Iterable[str]) -> FrozenSet[str]:
+    """Return one shared frozenset per distinct capability list."""
+    key = tuple(capabilities)
+    shared = _capability_sets.get(key)
+    if shared is None:
+        if len(_capability_sets) >= MAX_SHARED_VALUES:
+            _capability_sets.clear()
+        shared = _capability_sets[key] = frozenset(sys.intern(c) for c in key)
+    return shared
+
+
+_extra_maps: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _shared_extra(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Metadata fields not kept as attributes, shared between records when identical."""
+    extra = {key: value for key, value in metadata.items() if key not in _RECORD_FIELDS}
+    if not extra:
+        return None
+    try:
+        key = tuple(sorted(extra.items()))
+        hash(key)
+    except TypeError:
+        return extra
+    shared = _extra_maps.get(key)
+    if shared is None:
+        if len(_extra_maps) >= MAX_SHARED_VALUES:
+            _extra_maps.clear()
+        shared = _extra_maps[key] = extra
+    return shared
+
+
+class AgentRecord:
+    """One directory agent, reduced to the fields the marketplace uses."""
+
+    __slots__ = ('agent_id', 'name', 'role', 'capabilities', 'trust_score',
+                 'total_sales', 'price', 'endpoint', 'status', 'public_key', 'extra')
+
+    def __init__(self, agent_id: str, name: str = 'Unknown', role: str = '',
+                 capabilities: FrozenSet[str] = frozenset(), trust_score: float = 0,
+                 total_sales: int = 0, price: float = DEFAULT_PRICE,
+                 endpoint: str = None, status: Optional[str] = None,
+                 public_key: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+        self.agent_id = agent_id
+        self.name = name
+        self.role = role
+        self.capabilities = capabilities
+        self.trust_score = trust_score
+        self.total_sales = total_sales
+        self.price = price
+        self.endpoint = endpoint
+        self.status = status
+        self.public_key = public_key
+        self.extra = extra
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'AgentRecord':
+        """Parse one agent from directory JSON."""
+        metadata = data.get('metadata') or {}
+        role = metadata.get('role', '')
+        status = data.get('status')
+        return cls(
+            agent_id=data.get('agent_id'),
+            name=metadata.get('name', 'Unknown'),
+            role=sys.intern(role) if isinstance(role, str) else role,
+            capabilities=_shared_capabilities(metadata.get('capabilities', ())),
+            trust_score=metadata.get('trust_score', 0),
+            total_sales=metadata.get('total_sales', 0),
+            price=metadata.get('price', DEFAULT_PRICE),
+            endpoint=data.get('endpoint'),
+            status=sys.intern(status) if isinstance(status, str) else status,
+            public_key=data.get('public_key'),
+            extra=_shared_extra(metadata),
+        )
+
+    @property
+    def sells_electronics(self) -> bool:
+        return 'sell_electronics' in self.capabilities
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Directory-shaped dict (agent_id, endpoint, status, public_key, metadata), as parsed."""
+        metadata = {
+            'name': self.name,
+            'role': self.role,
+            'capabilities': sorted(self.capabilities),
+            'trust_score': self.trust_score,
+            'total_sales': self.total_sales,
+            'price': self.price,
+        }
+        if self.extra:
+            metadata.update(self.extra)
+        data = {
+            'agent_id': self.agent_id,
+            'endpoint': self.endpoint,
+            'metadata': metadata,
+        }
+        # Absent means unknown, not active: consumers check for 'active'
+        if self.status is not None:
+            data['status'] = self.status
+        if self.public_key is not None:
+            data['public_key'] = self.public_key
+        return data
+
+    def __repr__(self):
+        return f"AgentRecord({self.agent_id!r}, {self.name!r}, {self.trust_score}★)"
+
+
+class SellerCandidate:
+    """A seller that passed discovery filters."""
+
+    __slots__ = ('agent_id', 'name', 'trust_score', 'total_sales', 'price', 'endpoint', 'public_key')
+
+    def __init__(self, agent_id: str, name: str, trust_score: float,
+                 total_sales: int = 0, price: float = DEFAULT_PRICE, endpoint: str = None,
+                 public_key: Optional[str] = None):
+        self.agent_id = agent_id
+        self.name = name
+        self.trust_score = trust_score
+        self.total_sales = total_sales
+        self.price = price
+        self.endpoint = endpoint
+        # Verifies the seller's signed counter-offers and receipts
+        self.public_key = public_key
+
+    @classmethod
+    def from_record(cls, record: AgentRecord) -> 'SellerCandidate':
+        return cls(record.agent_id, record.name, record.trust_score,
+                   record.total_sales, record.price, record.endpoint, record.public_key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"SellerCandidate({self.name!r}, {self.trust_score}★, ${self.price})"
+
+
+def iter_sellers(records: Iterable[AgentRecord], min_rating: float) -> Iterator[SellerCandidate]:
+    """Yield electronics sellers at or above min_rating as they are scanned."""
+    for r in records:
+        if r.trust_score >= min_rating and 'sell_electronics' in r.capabilities:
+            yield SellerCandidate.from_record(r)
+
+
+def filter_sellers(records: Iterable[AgentRecord], min_rating: float) -> list:
+    """
+    Keep electronics sellers at or above min_rating.
+
+    Args:
+        records: Directory agents
+        min_rating: Minimum trust score
+
+    Returns:
+        List of SellerCandidate, in directory order
+    """
+    return [SellerCandidate.from_record(r) for r in records
+            if r.trust_score >= min_rating and 'sell_electronics' in r.capabilities]
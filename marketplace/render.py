@@ -0,0 +1,389 @@
+"""
+Terminal Renderer
+
+Buffered output for the orchestrator and demo scripts.
+
+Headers, step banners and HITL approval screens are pre-built strings
+written in one call each instead of one print() per line. Inside
+Renderer.capture() everything the session prints (including agent
+output) is collected and written once per step, so a session costs a
+handful of write syscalls per step instead of one per line.
+
+With several sessions running at once, a Dashboard gives each session a
+panel (current step plus its latest lines) and redraws the whole view in
+one write per refresh instead of interleaving their lines. On a
+non-terminal stream it appends finished lines prefixed with the session
+name instead.
+
+print_header(), print_step() and simulate_hitl_approval() render through
+whichever renderer is active on the calling thread. sys.stdout is only
+replaced while a capture or dashboard is active and is restored after.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Any, List, Optional, TextIO
+
+from marketplace.metrics import instrument
+
+WIDTH = 70
+DASHBOARD_REFRESH = float(os.getenv('DEMO_DASHBOARD_REFRESH', 0.1))
+
+# Static frames, built once
+HEAVY_RULE = '=' * WIDTH
+LIGHT_RULE = '─' * WIDTH
+HITL_RULE = '═' * 66
+HITL_OPEN = f"\n⏸️  {HITL_RULE}\n    HUMAN APPROVAL REQUIRED\n   {HITL_RULE}\n\n"
+HITL_CHOICES = f"\n   [✓ Approve]  [✗ Reject]  [ℹ Details]\n   {HITL_RULE}\n\n"
+HITL_APPROVED = "   👤 User: [Approved]\n   ✅ Approval granted\n\n"
+
+_local = threading.local()
+
+
+def header_frame(text: str) -> str:
+    return f"\n{HEAVY_RULE}\n  {text}\n{HEAVY_RULE}\n\n"
+
+
+def step_frame(step_num: int, text: str) -> str:
+    return f"\n{LIGHT_RULE}\n📍 STEP {step_num}: {text}\n{LIGHT_RULE}\n\n"
+
+
+def hitl_frame(agent_name: str, action: str, details: Dict[str, Any]) -> str:
+    rows = ''.join(f"      • {key}: {value}\n" for key, value in details.items())
+    return f"{HITL_OPEN}   Agent: {agent_name}\n   Action: {action}\n   Details:\n{rows}{HITL_CHOICES}"
+
+
+class _ThreadRouter(io.TextIOBase):
+    """sys.stdout replacement that sends each thread's writes to its capturing renderer."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        sink = getattr(_local, 'sink', None)
+        if sink is not None:
+            sink.write(text)
+        elif _fallback is not None:
+            _fallback.write(text)
+            if '\n' in text and isinstance(_fallback, SessionView):
+                _fallback.flush()
+        else:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(_local, 'sink', None) is None and _fallback is None:
+            self.stream.flush()
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+    @property
+    def encoding(self):
+        return self.stream.encoding
+
+
+_router: Optional[_ThreadRouter] = None
+_router_users = 0
+_router_lock = threading.Lock()
+# Where writes from threads without a sink go (all-thread captures and
+# dashboards, latest first). Shared by every thread, never snapshotted per thread
+_fallbacks: List[Any] = []
+_fallback = None
+
+
+@contextmanager
+def routed_stdout(fallback: Optional[Any] = None):
+    """
+    Route sys.stdout through the per-thread router until exit.
+
+    Nested and concurrent uses share one router; the stream it replaced is
+    put back when the last of them exits.
+
+    Args:
+        fallback: Receives writes from threads without a sink while the
+                  block is active (the latest registration wins)
+    """
+    global _router, _router_users, _fallback
+    with _router_lock:
+        if _router_users == 0:
+            _router = _ThreadRouter(sys.stdout)
+            sys.stdout = _router
+        _router_users += 1
+        router = _router
+        if fallback is not None:
+            _fallbacks.append(fallback)
+            _fallback = fallback
+    try:
+        yield router
+    finally:
+        with _router_lock:
+            if fallback is not None:
+                # Drop this registration only; others may have come and gone meanwhile
+                for i in range(len(_fallbacks) - 1, -1, -1):
+                    if _fallbacks[i] is fallback:
+                        del _fallbacks[i]
+                        break
+                _fallback = _fallbacks[-1] if _fallbacks else None
+            _router_users -= 1
+            if _router_users == 0:
+                if sys.stdout is router:
+                    sys.stdout = router.stream
+                _router = None
+
+
+def real_stdout() -> TextIO:
+    """The terminal stream underneath any installed router."""
+    router = _router
+    return router.stream if router is not None and sys.stdout is router else sys.stdout
+
+
+class Renderer:
+    """
+    Batches output and writes it in one call per flush.
+
+    Args:
+        stream: Output stream (default: the real stdout at write time)
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+        self.writes = 0
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        with self._lock:
+            self._buffer.append(text)
+
+    def line(self, text: str = ''):
+        self.write(text + '\n')
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            text = ''.join(self._buffer)
+            self._buffer.clear()
+        self._emit(text)
+
+    def _emit(self, text: str):
+        stream = self.stream or real_stdout()
+        stream.write(text)
+        stream.flush()
+        self.writes += 1
+
+    def header(self, text: str):
+        self.write(header_frame(text))
+        self.flush()
+
+    def step(self, step_num: int, text: str):
+        # Flushes the previous step's output together with this banner
+        self.write(step_frame(step_num, text))
+        self.flush()
+
+    def hitl(self, agent_name: str, action: str, details: Dict[str, Any], delay: float = 1.5):
+        self.write(hitl_frame(agent_name, action, details))
+        # Simulate approval delay
+        self.pause(delay)
+        self.write(HITL_APPROVED)
+
+    def pause(self, seconds: float):
+        """Write what is buffered, then wait (a paced demo's batching point)."""
+        self.flush()
+        time.sleep(seconds)
+
+    def ask(self, prompt: str) -> str:
+        """Write what is buffered plus `prompt`, then read a line from stdin."""
+        self.write(prompt)
+        self.flush()
+        return sys.stdin.readline().rstrip('\n')
+
+    @contextmanager
+    def capture(self, all_threads: bool = False):
+        """
+        Collect everything this thread prints into the renderer until exit.
+
+        Args:
+            all_threads: Also collect prints from other threads (e.g. agent
+                         handlers on the message bus), keeping them in order
+                         with this thread's output
+        """
+        with routed_stdout(self if all_threads else None):
+            previous = (getattr(_local, 'sink', None), getattr(_local, 'renderer', None))
+            _local.sink = _local.renderer = self
+            try:
+                yield self
+            finally:
+                _local.sink, _local.renderer = previous
+                self.flush()
+
+
+RENDERER = Renderer()
+
+
+def current() -> Renderer:
+    """Renderer for the calling thread (the default one outside any capture)."""
+    return getattr(_local, 'renderer', None) or RENDERER
+
+
+def print_header(text: str):
+    """Print formatted header."""
+    current().header(text)
+
+
+def print_step(step_num: int, text: str):
+    """Print step number."""
+    current().step(step_num, text)
+
+
+@instrument('hitl', 'approval')
+def simulate_hitl_approval(agent_name: str, action: str, details: dict, delay: float = 1.5):
+    """Simulate HITL approval UI."""
+    current().hitl(agent_name, action, details, delay)
+
+
+def pause(seconds: float):
+    """Flush the active renderer, then sleep."""
+    current().pause(seconds)
+
+
+def ask(prompt: str) -> str:
+    """input() that shows the active renderer's pending output first."""
+    return current().ask(prompt)
+
+
+class SessionView(Renderer):
+    """One dashboard panel; flushes update the panel instead of writing."""
+
+    def __init__(self, dashboard: 'Dashboard', name: str, tail: int):
+        super().__init__()
+        self.dashboard = dashboard
+        self.name = name
+        self.status = 'starting'
+        self.lines: deque = deque(maxlen=tail)
+        self.done = False
+
+    def _emit(self, text: str):
+        lines = [line.rstrip() for line in text.split('\n')]
+        lines = [line for line in lines if line.strip() and line.strip('─=═━ ')]
+        for line in lines:
+            if line.startswith('📍 STEP'):
+                self.status = line[len('📍'):].strip()
+            self.lines.append(line)
+        self.dashboard.changed(self, lines)
+
+    def hitl(self, agent_name: str, action: str, details: Dict[str, Any], delay: float = 1.5):
+        self.status = f"⏸️  awaiting approval: {action}"
+        super().hitl(agent_name, action, details, delay)
+
+    def finish(self, status: str = '✅ done'):
+        self.flush()
+        self.status = status
+        self.done = True
+        self.dashboard.changed(self, [])
+
+
+class Dashboard:
+    """
+    Live multi-session view, redrawn in one write per refresh.
+
+    Args:
+        stream: Output stream (default: the real stdout)
+        tail: Lines kept per session panel
+        refresh: Seconds between redraws
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, tail: int = 3,
+                 refresh: float = DASHBOARD_REFRESH):
+        self.stream = stream
+        self.tail = tail
+        self.refresh = refresh
+        self.sessions: List[SessionView] = []
+        self.writes = 0
+        self.other = SessionView(self, 'other', tail)
+        self.other.status = 'output from other threads'
+        self._pending: List[str] = []
+        self._drawn_lines = 0
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._routing = ExitStack()
+
+    def session(self, name: str) -> SessionView:
+        view = SessionView(self, name, self.tail)
+        with self._lock:
+            self.sessions.append(view)
+        self._dirty.set()
+        return view
+
+    def changed(self, view: SessionView, lines: List[str]):
+        with self._lock:
+            self._pending.extend(f"[{view.name}] {line}" for line in lines)
+        self._dirty.set()
+
+    def _out(self) -> TextIO:
+        return self.stream or real_stdout()
+
+    def _frame(self) -> List[str]:
+        rows = [HEAVY_RULE]
+        views = self.sessions + ([self.other] if self.other.lines else [])
+        for view in views:
+            rows.append(f"{view.name:<24} {view.status}"[:WIDTH])
+            rows.extend(f"   {line.strip()}"[:WIDTH] for line in view.lines)
+            rows.extend([''] * (self.tail - len(view.lines)))
+        rows.append(HEAVY_RULE)
+        return rows
+
+    def draw(self):
+        """Render once: redraw the panel (terminal) or append new lines (pipe/file)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            out = self._out()
+            if out.isatty():
+                rows = self._frame()
+                up = f"\x1b[{self._drawn_lines}F" if self._drawn_lines else ''
+                text = up + ''.join(f"\x1b[2K{row}\n" for row in rows)
+                self._drawn_lines = len(rows)
+            else:
+                text = ''.join(line + '\n' for line in pending)
+            if not text:
+                return
+            out.write(text)
+            out.flush()
+            self.writes += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait(self.refresh)
+            if self._dirty.is_set():
+                self._dirty.clear()
+                self.draw()
+                # Coalesce bursts: at most one redraw per refresh interval
+                self._stop.wait(self.refresh)
+
+    def start(self):
+        self._routing.enter_context(routed_stdout(self.other))
+        self._thread = threading.Thread(target=self._run, name='dashboard', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._routing.close()
+        self.other.flush()
+        self.draw()
+
+    def __enter__(self) -> 'Dashboard':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,191 @@
+"""
+Resilience Primitives
+
+Circuit breaker, session deadlines and hedged calls used to bound tail
+latency when an upstream (the Trust Directory) is degraded.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the session deadline has already passed."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    closed    -> calls pass; consecutive failures are counted
+    open      -> calls fail fast until `reset_timeout` has elapsed
+    half_open -> one trial call; success closes, failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: admit a single trial call
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back an allowed call that was never made (a half-open trial slot is freed)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# Absolute monotonic deadline for the current session (None = unbounded)
+_deadline: contextvars.ContextVar = contextvars.ContextVar('session_deadline', default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Set a deadline for everything called inside this block.
+
+    Nested scopes can only tighten the deadline, never extend it.
+
+    Args:
+        seconds: Time budget from now (None leaves the outer deadline)
+    """
+    if seconds is None:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(new_deadline if outer is None else min(outer, new_deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if unbounded."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded_timeout(default: float) -> float:
+    """
+    Clamp a per-call timeout to the current session deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded("session deadline exceeded")
+    return min(default, remaining)
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies for percentile estimates."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the pct-th percentile, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+
+
+def hedged_call(func: Callable, hedge_after: Optional[float], timeout: float):
+    """
+    Run `func`, firing one duplicate if the first attempt is slow.
+
+    Only use for idempotent operations. The first attempt to succeed wins;
+    if both fail, the last error is raised.
+
+    Args:
+        func: Zero-argument idempotent callable
+        hedge_after: Seconds to wait before hedging (None disables hedging)
+        timeout: Overall time budget
+
+    Returns:
+        Result of the first successful attempt
+    """
+    if hedge_after is None or hedge_after >= timeout:
+        return func()
+
+    start = time.monotonic()
+    pending = {_hedge_pool.submit(func)}
+    done, pending = wait(pending, timeout=hedge_after)
+    if not done:
+        pending.add(_hedge_pool.submit(func))
+
+    error = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        if not pending:
+            raise error
+        left = timeout - (time.monotonic() - start)
+        if left <= 0:
+            raise TimeoutError(f"hedged call exceeded {timeout:.2f}s")
+        done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
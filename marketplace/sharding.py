@@ -0,0 +1,305 @@
+"""
+Process-Pool Sharding
+
+Runs negotiation sessions on a pool of worker processes, one shard per
+core, so CPU-bound work (listing JSON parsing, ranking, pricing,
+signing and verification) is not serialized on one interpreter's GIL.
+
+- Warm state: each worker calls `init()` once at startup (agents,
+  pricing tables, parsed listings, signing keys) and passes it to every
+  task it runs
+- Affinity: tasks submitted with the same `key` always land on the same
+  shard, so per-key caches stay warm; other tasks go to the shard with
+  the fewest outstanding tasks
+- Results: every submit() returns a concurrent.futures.Future resolved
+  by a collector thread in the orchestrator
+- Graceful shutdown: close() lets workers finish queued tasks, then
+  joins them; workers that do not exit in time are terminated and their
+  unfinished futures fail with ShardError. Workers ignore Ctrl-C, so an
+  interrupt is handled once, by the orchestrator.
+
+Task functions must be module-level (they are sent by reference) and
+take the worker state as their first argument.
+
+The policy_state() / policy_session() pair is a self-contained
+negotiation session (no LLM or network) used by the scaling benchmark.
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Iterable, List, Optional
+
+SHARDS = os.cpu_count() or 1
+SHUTDOWN_TIMEOUT = float(os.getenv('DEMO_SHARD_SHUTDOWN_TIMEOUT', 10))
+
+_STOP = None
+
+
+class ShardError(RuntimeError):
+    """A task could not complete because its worker failed or was stopped."""
+
+
+def _worker(shard: int, init: Callable[[], Any], tasks, results):
+    # The orchestrator owns Ctrl-C; SIGTERM finishes the current task first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+    try:
+        state = init()
+    except Exception as e:
+        results.put((None, shard, False, ShardError(f"shard {shard} failed to start: {e!r}")))
+        return
+    results.put((None, shard, True, 'ready'))
+
+    while not stopping.is_set():
+        try:
+            item = tasks.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is _STOP:
+            break
+        task_id, func, args, kwargs = item
+        try:
+            outcome = (True, func(state, *args, **kwargs))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            results.put((task_id, shard, *outcome))
+        except Exception as e:
+            # Unpicklable result or exception
+            results.put((task_id, shard, False, ShardError(repr(e))))
+
+
+class ShardPool:
+    """
+    Worker processes with warm per-worker state.
+
+    Args:
+        init: Builds a worker's state (runs once inside each worker)
+        workers: Number of shards (default: one per core)
+        name: Used in process names
+    """
+
+    def __init__(self, init: Callable[[], Any], workers: int = SHARDS, name: str = 'shard'):
+        self.workers = max(1, workers)
+        self.name = name
+        context = multiprocessing.get_context('fork')
+        self._results = context.Queue()
+        self._queues = [context.Queue() for _ in range(self.workers)]
+        self._processes = [
+            context.Process(target=_worker, args=(shard, init, self._queues[shard], self._results),
+                            name=f"{name}-{shard}", daemon=True)
+            for shard in range(self.workers)
+        ]
+        self._futures: Dict[int, Future] = {}
+        self._owner: Dict[int, int] = {}
+        self._outstanding = [0] * self.workers
+        self._ready = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.completed = [0] * self.workers
+
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name=f"{name}-collector", daemon=True)
+        self._collector.start()
+
+    def _shard_for(self, key: Optional[str]) -> int:
+        if key is not None:
+            digest = hashlib.blake2b(str(key).encode(), digest_size=4).digest()
+            return int.from_bytes(digest, 'little') % self.workers
+        return min(range(self.workers), key=self._outstanding.__getitem__)
+
+    def submit(self, func: Callable, *args, key: Optional[str] = None, **kwargs) -> Future:
+        """
+        Run func(state, *args, **kwargs) on a shard.
+
+        Args:
+            func: Module-level task function
+            key: Affinity key (same key, same shard)
+
+        Returns:
+            Future for the task's result
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ShardError("pool is closed")
+            task_id = next(self._ids)
+            shard = self._shard_for(key)
+            self._futures[task_id] = future
+            self._owner[task_id] = shard
+            self._outstanding[shard] += 1
+        self._queues[shard].put((task_id, func, args, kwargs))
+        return future
+
+    def map(self, func: Callable, items: Iterable[Any], key: Callable[[Any], str] = None) -> List[Any]:
+        """Run func(state, item) for each item; results in input order."""
+        futures = [self.submit(func, item, key=key(item) if key else None) for item in items]
+        return [future.result() for future in futures]
+
+    def _resolve(self, task_id: int, ok: bool, value: Any):
+        with self._lock:
+            future = self._futures.pop(task_id, None)
+            shard = self._owner.pop(task_id, None)
+            if shard is not None:
+                self._outstanding[shard] -= 1
+                self.completed[shard] += 1
+        if future is not None:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _fail_shard(self, shard: int, reason: str):
+        with self._lock:
+            lost = [task_id for task_id, owner in self._owner.items() if owner == shard]
+        for task_id in lost:
+            self._resolve(task_id, False, ShardError(reason))
+
+    def _collect(self):
+        while True:
+            try:
+                task_id, shard, ok, value = self._results.get(timeout=0.5)
+            except queue.Empty:
+                # Fail tasks stranded on workers that died
+                for shard, process in enumerate(self._processes):
+                    if process.exitcode is not None and self._outstanding[shard]:
+                        self._fail_shard(shard, f"shard {shard} exited ({process.exitcode})")
+                if self._closed and not any(p.is_alive() for p in self._processes):
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if task_id is None:
+                if ok:
+                    self._ready += 1
+                else:
+                    self._fail_shard(shard, str(value))
+                continue
+            self._resolve(task_id, ok, value)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has built its state."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._ready < self.workers:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not any(p.is_alive() for p in self._processes):
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """
+        Finish queued tasks, then stop the workers.
+
+        Workers still running after `timeout` seconds are terminated and
+        their unfinished tasks fail with ShardError.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for tasks in self._queues:
+            tasks.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for shard, process in enumerate(self._processes):
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._collector.join(timeout=2)
+        for shard in range(self.workers):
+            self._fail_shard(shard, f"shard {shard} stopped before finishing")
+
+    def __enter__(self) -> 'ShardPool':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ============================================================================
+# SELF-CONTAINED NEGOTIATION SESSION (scaling benchmark workload)
+# ============================================================================
+
+def policy_state(agent_count: int = 3000, signing_key: bytes = b'shard-signing-key') -> Dict[str, Any]:
+    """
+    Warm worker state for policy_session(): a directory listing body (as
+    the directory would send it), one pricing book per seller and a
+    signing key.
+    """
+    from marketplace.pricing import PriceBook
+    from marketplace.stand_in import AgentStore, seed_sellers
+
+    store = AgentStore()
+    seed_sellers(store, agent_count)
+    return {
+        'listing': store.listing()[2],
+        'pricing': PriceBook(),
+        'priced': set(),
+        'signing_key': signing_key,
+        'pid': os.getpid(),
+    }
+
+
+def policy_session(state: Dict[str, Any], session_id: str, budget: float = 500,
+                   top: int = 3) -> Dict[str, Any]:
+    """
+    One negotiation without LLM or network: parse and filter the listing,
+    rank sellers, negotiate with the best ones, then sign and verify the
+    receipt.
+    """
+    from marketplace import codec
+    from marketplace.negotiation import BuyerPolicy, Negotiation, NegotiationState, SellerPolicy
+    from marketplace.ranking import top_k
+    from marketplace.records import AgentRecord, filter_sellers
+
+    records = [AgentRecord.from_json(agent) for agent in json.loads(state['listing'])['agents']]
+    sellers = top_k(filter_sellers(records, 4.5), top, budget)
+
+    book = state['pricing']
+    buyer = BuyerPolicy(budget)
+    best = None
+    for seller in sellers:
+        if seller.agent_id not in state['priced']:
+            state['priced'].add(seller.agent_id)
+            book.set_policy(seller.agent_id, SellerPolicy(seller.price - 30, seller.price - 150))
+        negotiation = Negotiation(session_id, buyer,
+                                  lambda buyer_id, price, sku=seller.agent_id: book.evaluate(sku, price),
+                                  target_price=seller.price)
+        if negotiation.run() is NegotiationState.AGREED and (
+                best is None or negotiation.agreed_price < best[1]):
+            best = (seller, negotiation.agreed_price)
+
+    if best is None:
+        return {'session_id': session_id, 'state': 'no_deal', 'pid': state['pid']}
+
+    key = state['signing_key']
+    receipt = {
+        'transaction_id': f"tx_{session_id}",
+        'buyer_id': session_id,
+        'seller_id': best[0].agent_id,
+        'item': 'MacBook Pro 2020',
+        'price': float(best[1]),
+        'currency': 'USD',
+        'timestamp': time.time(),
+    }
+    receipt['signature'] = hmac.new(key, codec.canonical(receipt), hashlib.sha256).hexdigest()
+    verified = hmac.compare_digest(
+        hmac.new(key, codec.canonical(receipt), hashlib.sha256).hexdigest(), receipt['signature'])
+    return {'session_id': session_id, 'state': 'agreed', 'receipt': receipt,
+            'verified': verified, 'pid': state['pid']}
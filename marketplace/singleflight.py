@@ -0,0 +1,104 @@
+"""
+Request Coalescing (Single-Flight)
+
+Concurrent identical requests share one upstream call: the first caller
+for a key runs it, callers that arrive while it is in flight wait for
+that call and get its result (or its exception). Nothing is cached once
+the call completes, so freshness is unchanged; only duplicate work in
+the same instant is removed.
+
+With N sessions vetting the same popular seller at once, the directory
+sees one GET for that agent instead of N.
+"""
+
+import copy
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Any, Hashable
+
+from marketplace.metrics import REGISTRY, label_set
+from marketplace.resilience import DeadlineExceeded, remaining_time
+
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    'marketplace_singleflight_calls_total', 'Calls that went upstream (one per in-flight key)')
+SINGLEFLIGHT_SHARED = REGISTRY.counter(
+    'marketplace_singleflight_shared_total', 'Calls answered by joining an identical in-flight call')
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls by key.
+
+    Args:
+        name: Group name used in metrics labels
+        copy_results: Give joining callers a deep copy of the result, so a
+                      caller mutating it cannot affect the others
+    """
+
+    def __init__(self, name: str, copy_results: bool = True):
+        self.name = name
+        self.copy_results = copy_results
+        self.calls = 0
+        self.shared = 0
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._labels = label_set(group=name)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func() unless an identical call is already in flight, then share its outcome.
+
+        Joining callers wait no longer than the session deadline.
+
+        Raises:
+            DeadlineExceeded: If a joining caller's deadline passes first
+            Whatever func() raised (in every caller sharing the call)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            SINGLEFLIGHT_SHARED.inc(self._labels)
+            timeout = remaining_time()
+            if timeout is not None and timeout <= 0:
+                raise DeadlineExceeded("session deadline exceeded")
+            try:
+                result = flight.result(timeout=timeout)
+            except FutureTimeout:
+                raise DeadlineExceeded("session deadline exceeded waiting for a shared call") from None
+            return copy.deepcopy(result) if self.copy_results else result
+
+        SINGLEFLIGHT_CALLS.inc(self._labels)
+        try:
+            result = func()
+        except BaseException as e:
+            self._land(key)
+            flight.set_exception(e)
+            raise
+        self._land(key)
+        flight.set_result(result)
+        return result
+
+    def _land(self, key: Hashable):
+        # Callers arriving from now on start a fresh call
+        with self._lock:
+            del self._flights[key]
+
+    def info(self) -> Dict[str, Any]:
+        total = self.calls + self.shared
+        return {
+            'group': self.name,
+            'calls': self.calls,
+            'shared': self.shared,
+            'shared_rate': self.shared / total if total else 0.0,
+            'in_flight': len(self._flights),
+        }
@@ -0,0 +1,290 @@
+"""
+Local Trust Directory Stand-In
+
+Minimal in-process implementation of the Trust Directory REST API for
+offline runs, benchmarks and load tests.
+
+Supports:
+- GET  /                        status document
+- GET  /api/v1/agents           full listing (ETag / Last-Modified validators)
+- GET  /api/v1/agents/changes?since=N
+                                adds/updates/removals after cursor N (410 if
+                                the cursor fell out of the retained log)
+- GET  /api/v1/agents/{id}      single agent
+- POST /api/v1/agents           register or update (X-Admin-Key if configured)
+- DELETE /api/v1/agents/{id}    remove an agent (X-Admin-Key if configured)
+
+Run standalone:
+    python -m marketplace.stand_in --port 8080 --seed 1000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+from typing import Dict, Any, Optional
+
+# Change-log entries retained for incremental sync
+CHANGE_LOG_SIZE = 10000
+
+
+class AgentStore:
+    """
+    Thread-safe agent table with a monotonically increasing version.
+
+    Every mutation is appended to a bounded change log keyed by version,
+    which backs the incremental sync endpoint.
+    """
+
+    def __init__(self, change_log_size: int = CHANGE_LOG_SIZE):
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.modified_at = 0.0
+        self.changes = deque(maxlen=change_log_size)  # (version, agent_id)
+        self._listing_body: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _touch(self, agent_id: str):
+        self.version += 1
+        self.modified_at = time.time()
+        self.changes.append((self.version, agent_id))
+        self._listing_body = None
+
+    def upsert(self, agent: Dict[str, Any]):
+        with self._lock:
+            record = dict(agent)
+            record.setdefault('status', 'active')
+            self.agents[record['agent_id']] = record
+            self._touch(record['agent_id'])
+
+    def delete(self, agent_id: str) -> bool:
+        with self._lock:
+            if self.agents.pop(agent_id, None) is None:
+                return False
+            self._touch(agent_id)
+            return True
+
+    def changes_since(self, cursor: int) -> Optional[Dict[str, Any]]:
+        """
+        Collapse the change log after `cursor` into one entry per agent.
+
+        Returns:
+            {'cursor', 'changes'} or None if the cursor is too old to serve
+        """
+        with self._lock:
+            if cursor > self.version:
+                return None
+            if cursor < self.version and (not self.changes or self.changes[0][0] > cursor + 1):
+                return None
+            touched = {}
+            for version, agent_id in reversed(self.changes):
+                if version <= cursor:
+                    break
+                touched.setdefault(agent_id, version)
+            changes = []
+            for agent_id in sorted(touched, key=touched.get):
+                agent = self.agents.get(agent_id)
+                if agent is None:
+                    changes.append({'op': 'delete', 'agent_id': agent_id})
+                else:
+                    changes.append({'op': 'upsert', 'agent': agent})
+            return {'cursor': self.version, 'changes': changes}
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        return self.agents.get(agent_id)
+
+    def listing(self):
+        """Return (version, modified_at, encoded body); the body is built once per version."""
+        with self._lock:
+            if self._listing_body is None:
+                agents = list(self.agents.values())
+                self._listing_body = json.dumps({'agents': agents, 'count': len(agents)}).encode()
+            return self.version, self.modified_at, self._listing_body
+
+
+def seed_sellers(store: AgentStore, count: int, rng_seed: int = 7):
+    """Populate the store with synthetic agents (about a third are electronics sellers)."""
+    rng = random.Random(rng_seed)
+    for i in range(count):
+        seller = i % 3 == 0
+        store.upsert({
+            'agent_id': f"agent_synthetic_{i:06d}",
+            'public_key': "-----BEGIN PUBLIC KEY-----\nMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEtest\n-----END PUBLIC KEY-----",
+            'endpoint': f"http://localhost:9000/agent/{i}",
+            'metadata': {
+                'name': f"Synthetic {'Seller' if seller else 'Agent'} {i}",
+                'role': 'Seller' if seller else 'Buyer',
+                'capabilities': ['sell_electronics', 'price_negotiation'] if seller else ['buy_electronics'],
+                'trust_score': round(rng.uniform(3.5, 5.0), 1),
+                'total_sales': rng.randint(0, 500),
+                'price': rng.randint(430, 560),
+                'verified': True,
+            }
+        })
+
+
+class DirectoryHandler(BaseHTTPRequestHandler):
+    """Request handler bound to `server.store` and `server.admin_key`."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, the body waits
+    # for the client's delayed ACK (~40 ms per keep-alive request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        self._send(status, json.dumps(payload).encode())
+
+    def _not_modified(self, etag: str, modified_at: float) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def do_GET(self):
+        store = self.server.store
+        path = self.path.split('?', 1)[0].rstrip('/')
+
+        if path == '':
+            self._send_json(200, {'message': 'Trust Directory stand-in', 'agents': len(store.agents)})
+        elif path == '/api/v1/agents':
+            version, modified_at, body = store.listing()
+            etag = f'"v{version}"'
+            validators = {
+                'ETag': etag,
+                'Last-Modified': formatdate(modified_at, usegmt=True),
+                'X-Directory-Cursor': str(version),
+            }
+            if self._not_modified(etag, modified_at):
+                self._send(304, headers=validators)
+            else:
+                self._send(200, body, validators)
+        elif path == '/api/v1/agents/changes':
+            query = self.path.split('?', 1)[1] if '?' in self.path else ''
+            params = dict(p.split('=', 1) for p in query.split('&') if '=' in p)
+            try:
+                result = store.changes_since(int(params.get('since', '')))
+            except ValueError:
+                self._send_json(400, {'detail': 'since cursor required'})
+                return
+            if result is None:
+                self._send_json(410, {'detail': 'Cursor expired, full resync required'})
+            else:
+                self._send_json(200, result)
+        elif path.startswith('/api/v1/agents/'):
+            agent = store.get(path[len('/api/v1/agents/'):])
+            if agent is None:
+                self._send_json(404, {'detail': 'Agent not found'})
+            else:
+                self._send_json(200, agent)
+        else:
+            self._send_json(404, {'detail': 'Not found'})
+
+    def _authorized(self) -> bool:
+        admin_key = self.server.admin_key
+        if admin_key and self.headers.get('X-Admin-Key') != admin_key:
+            self._send_json(401, {'detail': 'Invalid admin key'})
+            return False
+        return True
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/api/v1/agents':
+            self._send_json(404, {'detail': 'Not found'})
+            return
+        if not self._authorized():
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            agent = json.loads(self.rfile.read(length))
+            agent['agent_id']
+        except (ValueError, KeyError, TypeError):
+            self._send_json(422, {'detail': 'agent_id required'})
+            return
+        self.server.store.upsert(agent)
+        self._send_json(200, {'status': 'registered', 'agent_id': agent['agent_id']})
+
+    def do_DELETE(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if not path.startswith('/api/v1/agents/'):
+            self._send_json(404, {'detail': 'Not found'})
+            return
+        if not self._authorized():
+            return
+        if self.server.store.delete(path[len('/api/v1/agents/'):]):
+            self._send_json(200, {'status': 'deleted'})
+        else:
+            self._send_json(404, {'detail': 'Agent not found'})
+
+
+def make_server(port: int = 0, seed: int = 0, admin_key: Optional[str] = None) -> ThreadingHTTPServer:
+    """
+    Build a stand-in directory server (not yet serving).
+
+    Args:
+        port: Port to bind (0 picks a free one)
+        seed: Number of synthetic agents to preload
+        admin_key: Require this X-Admin-Key on registration
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), DirectoryHandler)
+    server.daemon_threads = True
+    server.store = AgentStore()
+    server.admin_key = admin_key
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    if seed:
+        seed_sellers(server.store, seed)
+    return server
+
+
+def start_stand_in(port: int = 0, seed: int = 0, admin_key: Optional[str] = None) -> ThreadingHTTPServer:
+    """
+    Start a stand-in directory on a background thread.
+
+    Returns:
+        Running server; its URL is `server.url`, stop it with `server.shutdown()`
+    """
+    server = make_server(port, seed, admin_key)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Serve the stand-in directory in the foreground."""
+    parser = argparse.ArgumentParser(description="Local Trust Directory stand-in")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--seed', type=int, default=0, help="synthetic agents to preload")
+    parser.add_argument('--admin-key', default=None)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.seed, args.admin_key)
+    print(f"📒 Trust Directory stand-in on {server.url} ({args.seed} agents)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
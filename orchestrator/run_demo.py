@@ -4,175 +4,437 @@ Main Demo Orchestrator
 Coordinates Sarah and Henri in the marketplace demo.
 """
 
+import io
 import os
 import sys
-import time
+import threading
 from datetime import datetime
+from concurrent.futures import as_completed
+from functools import partial
+from typing import Dict, Any, Optional
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from agents.sarah.buyer_agent import SarahBuyerAgent
 from agents.henri.seller_agent import HenriSellerAgent
+from marketplace.metrics import REGISTRY
+from marketplace.profiling import profile_session
+from marketplace.checkpoint import SessionCheckpoint
+from marketplace.bus import BusThread
+from marketplace.resilience import deadline_scope
+from marketplace.records import AgentRecord, SellerCandidate
+from marketplace.negotiation import NegotiationState
+from marketplace.render import RENDERER, Dashboard, Renderer, print_header, print_step, simulate_hitl_approval, pause, ask
+from marketplace.sharding import ShardPool
+from marketplace.ratelimit import scale_limits
 
+# Optional metrics export (JSON snapshot + Prometheus text sibling)
+METRICS_FILE = os.getenv('DEMO_METRICS_FILE')
 
-def print_header(text: str):
-    """Print formatted header."""
-    print(f"\n{'='*70}")
-    print(f"  {text}")
-    print(f"{'='*70}\n")
+# Upper bound for one session; directory timeouts are clamped to it
+SESSION_DEADLINE = float(os.getenv('DEMO_SESSION_DEADLINE', 120))
 
 
-def print_step(step_num: int, text: str):
-    """Print step number."""
-    print(f"\n{'─'*70}")
-    print(f"📍 STEP {step_num}: {text}")
-    print(f"{'─'*70}\n")
-
-
-def simulate_hitl_approval(agent_name: str, action: str, details: dict):
-    """Simulate HITL approval UI."""
-    print(f"\n⏸️  {'═'*66}")
-    print(f"    HUMAN APPROVAL REQUIRED")
-    print(f"   {'═'*66}\n")
-    print(f"   Agent: {agent_name}")
-    print(f"   Action: {action}")
-    print(f"   Details:")
-    for key, value in details.items():
-        print(f"      • {key}: {value}")
-    print(f"\n   [✓ Approve]  [✗ Reject]  [ℹ Details]")
-    print(f"   {'═'*66}\n")
+def restored(checkpoint: Optional[SessionCheckpoint], step_num: int, text: str):
+    """
+    Return a completed step's saved state, or None if the step must run.
     
-    # Simulate approval delay
-    time.sleep(2)
-    print(f"   👤 User: [Approved]")
-    print(f"   ✅ Approval granted\n")
+    Prints the step banner either way so resumed runs read like fresh ones.
+    """
+    print_step(step_num, text)
+    state = checkpoint.state(step_num) if checkpoint else None
+    if state is not None:
+        print(f"   ↩️  Restored from checkpoint ({checkpoint.session_id})")
+    return state
 
 
-def main():
-    """Run the complete marketplace demo."""
+def run_session(sarah: SarahBuyerAgent, henri: HenriSellerAgent,
+                checkpoint: Optional[SessionCheckpoint] = None,
+                bus: Optional[BusThread] = None):
+    """
+    Run one orchestrated negotiation, from market research to receipt.
     
-    # Banner
-    print("\n" + "╔" + "═"*68 + "╗")
-    print("║" + " "*68 + "║")
-    print("║" + "  🤖 AI AGENT MARKETPLACE DEMO".center(68) + "║")
-    print("║" + "  Sarah + Henri Negotiate a MacBook Pro Sale".center(68) + "║")
-    print("║" + " "*68 + "║")
-    print("╚" + "═"*68 + "╝\n")
+    With a checkpoint, each completed step is journaled and steps already
+    in the journal are skipped, so a crashed session resumes where it
+    stopped instead of repeating research, discovery and negotiation.
+    Steps from the negotiation on are bound to the agents' identities:
+    agents with other IDs (fresh keys after a restart) keep the saved
+    research and discovery but negotiate again.
     
-    print("📋 Demo Overview:")
-    print("   • Sarah (Buyer) uses LangChain with Amorce security")
-    print("   • Henri (Seller) uses CrewAI with Amorce security")
-    print("   • Both agents require human approval (HITL)")
-    print("   • All transactions cryptographically signed")
-    print("   • A2A Protocol compatible\n")
+    With a bus, offers and the final terms go through Henri's mailbox
+    instead of direct method calls (see serve_agents()).
     
-    input("Press ENTER to start demo...")
+    Args:
+        sarah: Buyer agent
+        henri: Seller agent
+        checkpoint: Optional session journal
+        bus: Optional message bus Henri is served on
+        
+    Returns:
+        Seller's signed receipt, or None if no deal was reached
+    """
+    def record(step_num: int, name: str, state: dict = None):
+        if checkpoint:
+            checkpoint.record(step_num, name, state)
     
-    # Initialize agents
-    print_header("INITIALIZING AGENTS")
+    agents = {'buyer_id': sarah.agent.agent_id, 'seller_id': henri.agent.agent_id}
+    negotiated = checkpoint.state(3) if checkpoint else None
+    if negotiated is not None and negotiated.get('agents') != agents:
+        print("\n⚠️  Checkpoint was negotiated by other agent identities - negotiating again")
+        checkpoint.rewind(3)
     
-    print("Creating Sarah (Buyer Agent)...")
-    sarah = SarahBuyerAgent(max_budget=500)
+    # Step 1: Sarah researches market
+    if restored(checkpoint, 1, "Sarah researches MacBook Pro prices") is None:
+        sarah.find_product("MacBook Pro 2020")
+        record(1, 'research')
+        pause(1)
     
-    print("\nCreating Henri (Seller Agent)...")
-    henri = HenriSellerAgent(min_price=450)
+    # Step 2: Sarah discovers Henri
+    state = restored(checkpoint, 2, "Sarah discovers verified sellers")
+    if state is None:
+        sellers = sarah.discover_sellers(min_rating=4.5, limit=3)
+        record(2, 'discover', {'sellers': [s.to_dict() for s in sellers]})
+        pause(1)
+    else:
+        sellers = [SellerCandidate(**s) for s in state['sellers']]
     
-    time.sleep(1)
+    # Step 3: Sarah and Henri negotiate (bounded offer/counter rounds)
+    state = restored(checkpoint, 3, "Sarah and Henri negotiate")
+    if state is None:
+        # Henri may not be listed (registration skipped); negotiate on his own entry
+        seller = next((s for s in sellers if s.agent_id == henri.agent.agent_id), None) or \
+            SellerCandidate.from_record(AgentRecord.from_json(henri.registration_data()))
+        if bus:
+            respond = bus.responder(sarah.agent.agent_id, henri.agent.agent_id)
+        else:
+            respond = henri.receive_offer
+        negotiation = sarah.negotiate(seller, target_price=500, respond=respond)
+        state = dict(negotiation.summary(), seller=seller.to_dict(), agents=agents)
+        record(3, 'negotiate', state)
+        pause(1)
+    elif state['state'] == NegotiationState.AGREED.value and not checkpoint.done(7):
+        # Agreements live in the agents' memory: hold this one again for the receipt
+        sarah.restore_deal(SellerCandidate(**state['seller']), state['agreed_price'])
+        henri.restore_deal(sarah.agent.agent_id, state['agreed_price'])
     
-    # Step 1: Sarah researches market
-    print_step(1, "Sarah researches MacBook Pro prices")
-    sarah.find_product("MacBook Pro 2020")
-    time.sleep(1)
+    if state['state'] != NegotiationState.AGREED.value:
+        print(f"\n❌ Negotiation ended without a deal ({state['state']})")
+        return None
+    final_price = state['agreed_price']
+    profit = final_price - henri.cost_basis
     
-    # Step 2: Sarah discovers Henri
-    print_step(2, "Sarah discovers verified sellers")
-    sellers = sarah.discover_sellers(min_rating=4.5)
-    time.sleep(1)
-    
-    # Step 3: Sarah makes offer
-    print_step(3, "Sarah makes initial offer")
-    print("🤖 Sarah: Making offer of $450 to Henri")
-    time.sleep(1)
-    
-    # Step 4: Henri evaluates offer
-    print_step(4, "Henri evaluates Sarah's offer")
-    offer_response = henri.receive_offer(
-        buyer_id=sarah.agent.agent_id,
-        offer_price=450
-    )
-    time.sleep(1)
-    
-    # Step 5: Henri counter-offers
-    print_step(5, "Henri makes counter-offer")
-    counter = henri.make_counter_offer(
-        price=500,
-        reasoning="Fair market value for excellent condition MacBook"
-    )
-    time.sleep(1)
-    
-    # Step 6: Sarah's HITL Approval
-    print_step(6, "Sarah requests human approval for payment")
-    simulate_hitl_approval(
-        agent_name="Sarah (Buyer)",
-        action="Approve payment of $500",
-        details={
-            'Seller': f"Henri ({henri.agent.agent_id[:20]}...)",
-            'Trust Score': '4.8★ (verified)',
-            'Item': 'MacBook Pro 2020, 16GB RAM, 512GB SSD',
-            'Price': '$500',
-            'Market Value': '$480-$550',
-            'Verdict': 'FAIR DEAL ✓'
+    # Step 4: Henri confirms final terms
+    if restored(checkpoint, 4, "Henri confirms final terms") is None:
+        terms = {
+            'price': final_price,
+            'reasoning': "Fair market value for excellent condition MacBook",
+            'buyer_id': sarah.agent.agent_id
         }
-    )
-    time.sleep(1)
-    
-    # Step 7: Henri's HITL Approval
-    print_step(7, "Henri requests human approval for sale")
-    simulate_hitl_approval(
-        agent_name="Henri (Seller)",
-        action="Approve sale to Sarah",
-        details={
-            'Buyer': f"Sarah ({sarah.agent.agent_id[:20]}...)",
-            'Trust Score': '4.9★ (verified)',
-            'Sale Price': '$500',
-            'Cost Basis': '$350',
-            'Profit': '$150 (43%)',
-            'Verdict': 'PROFITABLE ✓'
-        }
-    )
-    time.sleep(1)
+        if bus:
+            counter = bus.request(sarah.agent.agent_id, henri.agent.agent_id, 'counter', terms)
+        else:
+            counter = henri.make_counter_offer(**terms)
+        # Sarah checks Henri's signature and that the terms fit her budget
+        if sarah.receive_counter_offer(counter)['response'] != 'accept':
+            print(f"\n❌ Sarah rejected the final terms (${final_price})")
+            return None
+        record(4, 'confirm_terms', counter)
+        pause(1)
+    
+    # Step 5: Sarah's HITL Approval
+    if restored(checkpoint, 5, "Sarah requests human approval for payment") is None:
+        simulate_hitl_approval(
+            agent_name="Sarah (Buyer)",
+            action=f"Approve payment of ${final_price}",
+            details={
+                'Seller': f"Henri ({henri.agent.agent_id[:20]}...)",
+                'Trust Score': '4.8★ (verified)',
+                'Item': 'MacBook Pro 2020, 16GB RAM, 512GB SSD',
+                'Price': f'${final_price}',
+                'Market Value': '$480-$550',
+                'Verdict': 'FAIR DEAL ✓'
+            },
+            delay=2
+        )
+        record(5, 'buyer_approval', {'approved': True, 'price': final_price})
+        pause(1)
+    
+    # Step 6: Henri's HITL Approval
+    if restored(checkpoint, 6, "Henri requests human approval for sale") is None:
+        simulate_hitl_approval(
+            agent_name="Henri (Seller)",
+            action="Approve sale to Sarah",
+            details={
+                'Buyer': f"Sarah ({sarah.agent.agent_id[:20]}...)",
+                'Trust Score': '4.9★ (verified)',
+                'Sale Price': f'${final_price}',
+                'Cost Basis': f'${henri.cost_basis}',
+                'Profit': f'${profit} ({profit / final_price * 100:.0f}%)',
+                'Verdict': 'PROFITABLE ✓'
+            },
+            delay=2
+        )
+        record(6, 'seller_approval', {'approved': True, 'price': final_price, 'profit': profit})
+        pause(1)
     
-    # Step 8: Transaction complete
-    print_step(8, "Generating signed receipt")
-    receipt = henri.agent.generate_signed_receipt()
+    # Step 7: Transaction complete
+    state = restored(checkpoint, 7, "Generating signed receipt")
+    if state is None:
+        terms = {'buyer_id': sarah.agent.agent_id, 'price': final_price}
+        if bus:
+            receipt = bus.request(sarah.agent.agent_id, henri.agent.agent_id, 'receipt', terms)
+        else:
+            receipt = henri.issue_receipt(**terms)
+        acknowledgement = sarah.receive_receipt(receipt)
+        record(7, 'receipt', {'receipt': receipt, 'buyer_signature': acknowledgement['buyer_signature']})
+    else:
+        receipt = state['receipt']
+        acknowledgement = state
     
     print("\n✅ TRANSACTION SUCCESSFUL\n")
-    print("Receipt #tx_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
+    print(f"Receipt #{receipt['transaction_id']}")
     print("━" * 70)
     print(f"Buyer:     Sarah ({sarah.agent.agent_id[:30]}...)")
     print(f"Seller:    Henri ({henri.agent.agent_id[:30]}...)")
     print(f"Item:      MacBook Pro 2020")
-    print(f"Price:     $500")
+    print(f"Price:     ${final_price}")
     print(f"Warranty:  30 days")
     print("━" * 70)
-    print(f"Buyer Signature:  {sarah.agent.identity.sign('receipt')[:40]}...")
+    print(f"Buyer Signature:  {acknowledgement['buyer_signature'][:40]}...")
     print(f"Seller Signature: {receipt['signature'][:40]}...")
     print(f"Amorce Verified:  ✓")
     print("━" * 70)
     
+    return receipt
+
+
+def serve_agents(bus: BusThread, sarah: SarahBuyerAgent, henri: HenriSellerAgent,
+                 workers: int = 1):
+    """
+    Give both agents mailboxes and serve Henri's offer, counter and receipt handlers.
+    
+    Args:
+        workers: Concurrent handlers on Henri's mailbox (one per concurrent session)
+    """
+    bus.register(sarah.agent.agent_id)
+    bus.serve(henri.agent.agent_id, {
+        'offer': henri.receive_offer,
+        'counter': henri.make_counter_offer,
+        'receipt': henri.issue_receipt,
+    }, workers=workers)
+
+
+def run_sessions(sarah: SarahBuyerAgent, henri: HenriSellerAgent, bus: BusThread,
+                 session_id: str, count: int) -> Dict[str, Optional[dict]]:
+    """
+    Run `count` sessions concurrently on a live dashboard.
+    
+    Each session renders into its own panel instead of interleaving lines
+    with the others, and has its own checkpoint (<session_id>-<n>).
+    
+    Returns:
+        Receipt (or None) per session name
+    """
+    receipts: Dict[str, Optional[dict]] = {}
+    
+    def run(view):
+        with view.capture(), SessionCheckpoint(view.name) as checkpoint:
+            try:
+                with profile_session(view.name, enabled=profile_requested()), \
+                        deadline_scope(SESSION_DEADLINE):
+                    receipts[view.name] = run_session(sarah, henri, checkpoint, bus)
+                view.finish('✅ receipt signed' if receipts[view.name] else '❌ no deal')
+            except Exception as e:
+                receipts[view.name] = None
+                view.finish(f"❌ {type(e).__name__}: {e}")
+    
+    with Dashboard() as dashboard:
+        threads = [threading.Thread(target=run, args=(dashboard.session(f"{session_id}-{n}"),),
+                                    name=f"session-{n}")
+                   for n in range(1, count + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return receipts
+
+
+def shard_state(shards: int = 1) -> Dict[str, Any]:
+    """
+    Warm state for one shard: its own agents and message bus, built once per worker.
+    
+    Each shard gets 1/shards of every upstream rate limit, so the pool as
+    a whole stays under them.
+    """
+    scale_limits(1 / shards)
+    with Renderer(stream=io.StringIO()).capture(all_threads=True):
+        sarah = SarahBuyerAgent(max_budget=500)
+        henri = HenriSellerAgent(min_price=450)
+        bus = BusThread()
+        serve_agents(bus, sarah, henri)
+    return {'sarah': sarah, 'henri': henri, 'bus': bus, 'pid': os.getpid()}
+
+
+def shard_session(state: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    """
+    Run one session on a shard.
+    
+    The session's output is captured rather than written to the shared
+    terminal; the orchestrator gets the receipt, the captured output and
+    the worker's PID.
+    """
+    output = io.StringIO()
+    receipt, error = None, None
+    with Renderer(stream=output).capture(all_threads=True), SessionCheckpoint(session_id) as checkpoint:
+        try:
+            with profile_session(session_id, enabled=profile_requested()), \
+                    deadline_scope(SESSION_DEADLINE):
+                receipt = run_session(state['sarah'], state['henri'], checkpoint, state['bus'])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return {'session_id': session_id, 'receipt': receipt, 'error': error,
+            'output': output.getvalue(), 'pid': state['pid']}
+
+
+def run_sharded(session_id: str, count: int, shards: int) -> Dict[str, Optional[dict]]:
+    """
+    Run `count` sessions across `shards` worker processes.
+    
+    Each worker holds warm agents, caches and a message bus for its
+    lifetime, so CPU-bound session work runs on every core instead of
+    sharing one interpreter. Results are printed as sessions complete.
+    
+    Returns:
+        Receipt (or None) per session name
+    """
+    receipts: Dict[str, Optional[dict]] = {}
+    with ShardPool(partial(shard_state, shards), workers=shards, name='session-shard') as pool:
+        futures = [pool.submit(shard_session, f"{session_id}-{n}", key=f"{session_id}-{n}")
+                   for n in range(1, count + 1)]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"   ❌ shard failed: {type(e).__name__}: {e}")
+                continue
+            receipts[result['session_id']] = result['receipt']
+            outcome = '✅ receipt signed' if result['receipt'] else f"❌ {result['error'] or 'no deal'}"
+            print(f"   [{result['session_id']}] pid {result['pid']}: {outcome}")
+    return receipts
+
+
+def shard_count() -> int:
+    """Worker processes, from `--shards <n>` or DEMO_SHARDS (default 0: run in-process)."""
+    if '--shards' in sys.argv:
+        index = sys.argv.index('--shards') + 1
+        if index < len(sys.argv):
+            return int(sys.argv[index])
+    return int(os.getenv('DEMO_SHARDS', 0))
+
+
+def session_count() -> int:
+    """Concurrent sessions, from `--sessions <n>` or DEMO_SESSIONS (default 1)."""
+    if '--sessions' in sys.argv:
+        index = sys.argv.index('--sessions') + 1
+        if index < len(sys.argv):
+            return int(sys.argv[index])
+    return int(os.getenv('DEMO_SESSIONS', 1))
+
+
+def profile_requested() -> Optional[bool]:
+    """True with `--profile`; otherwise None, leaving it to DEMO_PROFILE."""
+    return True if '--profile' in sys.argv else None
+
+
+def create_agents():
+    """Build Sarah and Henri for sessions run in this process."""
+    print_header("INITIALIZING AGENTS")
+    
+    print("Creating Sarah (Buyer Agent)...")
+    sarah = SarahBuyerAgent(max_budget=500)
+    
+    print("\nCreating Henri (Seller Agent)...")
+    henri = HenriSellerAgent(min_price=450)
+    
+    pause(1)
+    return sarah, henri
+
+
+def resume_session_id() -> Optional[str]:
+    """Session to resume, from `--resume <session_id>` or DEMO_SESSION_ID."""
+    if '--resume' in sys.argv:
+        index = sys.argv.index('--resume') + 1
+        if index < len(sys.argv):
+            return sys.argv[index]
+    return os.getenv('DEMO_SESSION_ID')
+
+
+def main():
+    """Run the complete marketplace demo."""
+    
+    # Banner
+    print("\n" + "╔" + "═"*68 + "╗")
+    print("║" + " "*68 + "║")
+    print("║" + "  🤖 AI AGENT MARKETPLACE DEMO".center(68) + "║")
+    print("║" + "  Sarah + Henri Negotiate a MacBook Pro Sale".center(68) + "║")
+    print("║" + " "*68 + "║")
+    print("╚" + "═"*68 + "╝\n")
+    
+    print("📋 Demo Overview:")
+    print("   • Sarah (Buyer) uses LangChain with Amorce security")
+    print("   • Henri (Seller) uses CrewAI with Amorce security")
+    print("   • Both agents require human approval (HITL)")
+    print("   • All transactions cryptographically signed")
+    print("   • A2A Protocol compatible\n")
+    
+    ask("Press ENTER to start demo...")
+    
+    # Resume with --resume <session_id> (or DEMO_SESSION_ID); new sessions get a fresh ID
+    session_id = resume_session_id() or "session_" + datetime.now().strftime("%Y%m%d_%H%M%S")
+    sessions = session_count()
+    shards = shard_count()
+    
+    # Profile each session with --profile (or DEMO_PROFILE=true)
+    if shards > 0:
+        # Each shard builds its own agents
+        print_header(f"RUNNING {sessions} SESSION(S) ON {shards} SHARD(S)")
+        receipts = run_sharded(session_id, sessions, shards)
+        print(f"\n✅ {sum(1 for r in receipts.values() if r)}/{sessions} sessions reached a deal")
+    elif sessions > 1:
+        sarah, henri = create_agents()
+        with BusThread() as bus:
+            serve_agents(bus, sarah, henri, workers=sessions)
+            receipts = run_sessions(sarah, henri, bus, session_id, sessions)
+        print(f"\n✅ {sum(1 for r in receipts.values() if r)}/{sessions} sessions reached a deal")
+    else:
+        sarah, henri = create_agents()
+        with SessionCheckpoint(session_id) as checkpoint, BusThread() as bus:
+            if checkpoint.resumed:
+                print(f"\n↩️  Resuming {session_id} after step {checkpoint.last_step}")
+            else:
+                print(f"\n💾 Checkpointing {session_id} to {checkpoint.path}")
+            serve_agents(bus, sarah, henri)
+            with profile_session(session_id, enabled=profile_requested()):
+                with deadline_scope(SESSION_DEADLINE), RENDERER.capture(all_threads=True):
+                    run_session(sarah, henri, checkpoint, bus)
+    
     # Summary
     print_header("DEMO SUMMARY")
     print("✅ Market research completed (Sarah)")
     print("✅ Seller discovered via Trust Directory")
     print("✅ Reputation verified (4.8★)")
-    print("✅ Negotiation completed ($450 → $500)")
+    print("✅ Negotiation completed (bounded offer/counter rounds)")
     print("✅ Human approval obtained (both sides)")
     print("✅ Transaction signed and verified")
     print("✅ Receipt generated")
     
     print("\n🎉 Demo complete! Both agents successfully negotiated a")
     print("   secure, verified transaction with human oversight.\n")
+    
+    if METRICS_FILE:
+        REGISTRY.write(METRICS_FILE)
+        print(f"📊 Metrics written to {METRICS_FILE}\n")
 
 
 if __name__ == "__main__":
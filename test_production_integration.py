@@ -5,22 +5,138 @@ Tests core functionality without full agent initialization:
 1. Trust Directory connectivity
 2. Agent registration
 3. Agent discovery
+4. Specific agent retrieval
 
 This avoids langchain dependency conflicts while demonstrating
 the production integration works.
+
+The same four scenarios double as a load test:
+
+    python test_production_integration.py --load --stand-in --concurrency 16 --duration 10
+    python test_production_integration.py --load --stand-in --rps 200
+    python test_production_integration.py --load --url http://localhost:8080 --scenarios discovery,retrieval
+
+Load mode needs --stand-in or an explicit --url, so it never targets the
+production directory by default. The registration scenario writes
+agents, so it only runs when named in --scenarios, and every agent it
+registers is deleted afterwards.
+
+Each scenario runs for --duration seconds on --concurrency threads, either
+closed-loop (as fast as responses come back) or paced to a target --rps.
+Paced runs measure latency from each request's scheduled start, so a
+stalled server shows up in the percentiles instead of silently lowering
+the request rate. The run fails (exit 1) if a scenario exceeds
+--max-error-rate or --max-p99.
 """
 
+import argparse
+import itertools
 import os
-import requests
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
 from dotenv import load_dotenv
 from datetime import datetime
 
+from marketplace.cassette import http_session, active_cassette
+
 # Load environment
 load_dotenv()
 
 TRUST_DIR_URL = os.getenv('TRUST_DIRECTORY_URL', 'https://trust.amorce.io')
 ADMIN_KEY = os.getenv('DIRECTORY_ADMIN_KEY')
 
+# Directory HTTP session (records / replays with CASSETTE_MODE)
+http = http_session()
+
+SCENARIOS = ('connection', 'registration', 'discovery', 'retrieval')
+# Read-only scenarios; registration must be asked for by name
+DEFAULT_LOAD_SCENARIOS = ('connection', 'discovery', 'retrieval')
+
+
+class ScenarioError(Exception):
+    """A scenario got an unexpected response."""
+
+
+# ============================================================================
+# SCENARIOS (one request each; raise ScenarioError on a wrong answer)
+# ============================================================================
+
+def check_connection(session) -> dict:
+    """GET / and return the status document."""
+    response = session.get(f"{TRUST_DIR_URL}/", timeout=10)
+    if response.status_code != 200:
+        raise ScenarioError(f"HTTP {response.status_code}")
+    return response.json()
+
+
+def agent_registration_data(agent_id: str) -> dict:
+    """Registration payload for a throwaway test agent."""
+    return {
+        "agent_id": agent_id,
+        "public_key": "-----BEGIN PUBLIC KEY-----\nMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEtest\n-----END PUBLIC KEY-----",
+        "endpoint": "http://localhost:8000/test",
+        "metadata": {
+            "name": "Test Marketplace Agent",
+            "role": "Test",
+            "framework": "Production Demo Test",
+            "capabilities": ["test"],
+            "trust_score": 5.0,
+            "verified": True
+        }
+    }
+
+
+def check_registration(session, agent_id: str):
+    """POST a test agent registration."""
+    headers = {"X-Admin-Key": ADMIN_KEY} if ADMIN_KEY else {}
+    response = session.post(
+        f"{TRUST_DIR_URL}/api/v1/agents",
+        json=agent_registration_data(agent_id),
+        headers=headers,
+        timeout=10
+    )
+    if response.status_code != 200:
+        raise ScenarioError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def check_deregistration(session, agent_id: str):
+    """DELETE a test agent."""
+    headers = {"X-Admin-Key": ADMIN_KEY} if ADMIN_KEY else {}
+    response = session.delete(f"{TRUST_DIR_URL}/api/v1/agents/{agent_id}", headers=headers, timeout=10)
+    if response.status_code not in (200, 204, 404):
+        raise ScenarioError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def check_discovery(session) -> dict:
+    """GET the agent listing and check its shape."""
+    response = session.get(f"{TRUST_DIR_URL}/api/v1/agents", timeout=10)
+    if response.status_code != 200:
+        raise ScenarioError(f"HTTP {response.status_code}")
+    data = response.json()
+    if not isinstance(data.get('agents'), list):
+        raise ScenarioError("listing has no 'agents' list")
+    return data
+
+
+def check_retrieval(session, agent_id: str) -> dict:
+    """GET one agent and check it is the one asked for."""
+    response = session.get(
+        f"{TRUST_DIR_URL}/api/v1/agents/{agent_id}",
+        timeout=10
+    )
+    if response.status_code != 200:
+        raise ScenarioError(f"HTTP {response.status_code}")
+    agent_data = response.json()
+    if agent_data.get('agent_id') != agent_id:
+        raise ScenarioError(f"got agent {agent_data.get('agent_id')!r}")
+    return agent_data
+
+
 def test_trust_directory_connection():
     """Test 1: Can we connect to Trust Directory?"""
     print("\n" + "="*70)
@@ -28,64 +144,40 @@ def test_trust_directory_connection():
     print("="*70)
     
     try:
-        response = requests.get(f"{TRUST_DIR_URL}/", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Connected to {TRUST_DIR_URL}")
-            print(f"   Status: {data.get('message', 'OK')}")
-            return True
-        else:
-            print(f"❌ Connection failed (HTTP {response.status_code})")
-            return False
+        data = check_connection(http)
+        print(f"✅ Connected to {TRUST_DIR_URL}")
+        print(f"   Status: {data.get('message', 'OK')}")
+        return True
+    except ScenarioError as e:
+        print(f"❌ Connection failed ({e})")
+        return False
     except Exception as e:
         print(f"❌ Connection error: {e}")
         return False
 
 
-def test_agent_registration():
+def test_agent_registration(require_key: bool = True):
     """Test 2: Can we register a test agent?"""
     print("\n" + "="*70)
     print("  TEST 2: Agent Registration")
     print("="*70)
     
-    if not ADMIN_KEY:
+    if require_key and not ADMIN_KEY:
         print("⚠️  DIRECTORY_ADMIN_KEY not set - skipping registration test")
         return False
     
     # Create test agent data
     test_agent_id = f"test-marketplace-demo-{int(datetime.now().timestamp())}"
     
-    agent_data = {
-        "agent_id": test_agent_id,
-        "public_key": "-----BEGIN PUBLIC KEY-----\nMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEtest\n-----END PUBLIC KEY-----",
-        "endpoint": "http://localhost:8000/test",
-        "metadata": {
-            "name": "Test Marketplace Agent",
-            "role": "Test",
-            "framework": "Production Demo Test",
-            "capabilities": ["test"],
-            "trust_score": 5.0,
-            "verified": True
-        }
-    }
-    
     try:
-        response = requests.post(
-            f"{TRUST_DIR_URL}/api/v1/agents",
-            json=agent_data,
-            headers={"X-Admin-Key": ADMIN_KEY},
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            print(f"✅ Agent registered successfully")
-            print(f"   Agent ID: {test_agent_id}")
-            print(f"   URL: {TRUST_DIR_URL}/api/v1/agents/{test_agent_id}")
-            return test_agent_id
-        else:
-            print(f"❌ Registration failed (HTTP {response.status_code})")
-            print(f"   Response: {response.text}")
-            return None
+        check_registration(http, test_agent_id)
+        print(f"✅ Agent registered successfully")
+        print(f"   Agent ID: {test_agent_id}")
+        print(f"   URL: {TRUST_DIR_URL}/api/v1/agents/{test_agent_id}")
+        return test_agent_id
+    except ScenarioError as e:
+        print(f"❌ Registration failed ({e})")
+        return None
     except Exception as e:
         print(f"❌ Registration error: {e}")
         return None
@@ -98,34 +190,32 @@ def test_agent_discovery(test_agent_id=None):
     print("="*70)
     
     try:
-        response = requests.get(f"{TRUST_DIR_URL}/api/v1/agents", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            agent_count = data.get('count', 0)
-            agents = data.get('agents', [])
-            
-            print(f"✅ Discovery successful")
-            print(f"   Total agents: {agent_count}")
-            
-            if test_agent_id:
-                # Try to find our test agent
-                found = any(a.get('agent_id') == test_agent_id for a in agents)
-                if found:
-                    print(f"   ✅ Test agent found in directory")
-                else:
-                    print(f"   ⚠️  Test agent not yet visible (may take a moment)")
-            
-            # Show a few sample agents
-            print(f"\n   Sample agents:")
-            for agent in agents[:3]:
-                name = agent.get('metadata', {}).get('name', 'Unknown')
-                score = agent.get('metadata', {}).get('trust_score', 'N/A')
-                print(f"   - {name} ({score}★)")
-            
-            return True
-        else:
-            print(f"❌ Discovery failed (HTTP {response.status_code})")
-            return False
+        data = check_discovery(http)
+        agent_count = data.get('count', 0)
+        agents = data['agents']
+        
+        print(f"✅ Discovery successful")
+        print(f"   Total agents: {agent_count}")
+        
+        if test_agent_id:
+            # Try to find our test agent
+            found = any(a.get('agent_id') == test_agent_id for a in agents)
+            if found:
+                print(f"   ✅ Test agent found in directory")
+            else:
+                print(f"   ⚠️  Test agent not yet visible (may take a moment)")
+        
+        # Show a few sample agents
+        print(f"\n   Sample agents:")
+        for agent in agents[:3]:
+            name = agent.get('metadata', {}).get('name', 'Unknown')
+            score = agent.get('metadata', {}).get('trust_score', 'N/A')
+            print(f"   - {name} ({score}★)")
+        
+        return True
+    except ScenarioError as e:
+        print(f"❌ Discovery failed ({e})")
+        return False
     except Exception as e:
         print(f"❌ Discovery error: {e}")
         return False
@@ -138,28 +228,229 @@ def test_specific_agent_retrieval(test_agent_id):
     print("="*70)
     
     try:
-        response = requests.get(
-            f"{TRUST_DIR_URL}/api/v1/agents/{test_agent_id}",
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            agent_data = response.json()
-            print(f"✅ Agent retrieved successfully")
-            print(f"   Agent ID: {agent_data.get('agent_id')}")
-            print(f"   Name: {agent_data.get('metadata', {}).get('name')}")
-            print(f"   Trust Score: {agent_data.get('metadata', {}).get('trust_score')}★")
-            return True
-        else:
-            print(f"❌ Retrieval failed (HTTP {response.status_code})")
-            return False
+        agent_data = check_retrieval(http, test_agent_id)
+        print(f"✅ Agent retrieved successfully")
+        print(f"   Agent ID: {agent_data.get('agent_id')}")
+        print(f"   Name: {agent_data.get('metadata', {}).get('name')}")
+        print(f"   Trust Score: {agent_data.get('metadata', {}).get('trust_score')}★")
+        return True
+    except ScenarioError as e:
+        print(f"❌ Retrieval failed ({e})")
+        return False
     except Exception as e:
         print(f"❌ Retrieval error: {e}")
         return False
 
 
-def main():
-    """Run all tests."""
+# ============================================================================
+# LOAD MODE
+# ============================================================================
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def scenario_call(name: str, agent_id: str, created: list = None):
+    """
+    One request of scenario `name`, as a function of a session.
+
+    Registration appends each ID it registers to `created` for cleanup.
+    """
+    if name == 'connection':
+        return check_connection
+    if name == 'registration':
+        def register(session):
+            # Fresh ID per request so every call is a real insert
+            new_id = f"load-test-{uuid.uuid4().hex[:12]}"
+            created.append(new_id)
+            return check_registration(session, new_id)
+        return register
+    if name == 'discovery':
+        return check_discovery
+    return lambda session: check_retrieval(session, agent_id)
+
+
+def run_load(name: str, call, concurrency: int, duration: float, rps: float = 0) -> dict:
+    """
+    Drive one scenario from `concurrency` threads for `duration` seconds.
+
+    Args:
+        name: Scenario name (for the report)
+        call: Performs one request given a session; raises on failure
+        concurrency: Worker threads, each with its own keep-alive session
+        duration: Seconds to run
+        rps: Target requests/second across all threads (0 = closed loop)
+
+    Returns:
+        Requests, errors by reason, wall time and sorted latencies (seconds)
+    """
+    latencies = []
+    errors = Counter()
+    lock = threading.Lock()
+    tickets = itertools.count()
+    start = time.perf_counter()
+    stop_at = start + duration
+
+    def worker():
+        session = http_session()
+        while True:
+            now = time.perf_counter()
+            scheduled = start + next(tickets) / rps if rps else now
+            if scheduled >= stop_at or now >= stop_at:
+                break
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            error = None
+            try:
+                call(session)
+            except ScenarioError as e:
+                error = str(e).split(':')[0]
+            except Exception as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - scheduled
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    errors[error] += 1
+
+    threads = [threading.Thread(target=worker, name=f"load-{name}-{i}", daemon=True)
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        'scenario': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'wall': time.perf_counter() - start,
+        'latencies': latencies,
+    }
+
+
+def print_load_report(results: list):
+    """Throughput, error rate and latency percentiles per scenario."""
+    print("\n" + "="*70)
+    print("  LOAD TEST RESULTS")
+    print("="*70)
+    print(f"\n  {'scenario':14}{'requests':>9}{'req/s':>9}{'errors':>8}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for result in results:
+        latencies = result['latencies']
+        ms = lambda p: percentile(latencies, p) * 1000
+        error_count = sum(result['errors'].values())
+        error_rate = error_count / result['requests'] if result['requests'] else 0.0
+        print(f"  {result['scenario']:14}{result['requests']:>9,}"
+              f"{result['requests'] / result['wall']:>9,.0f}{error_rate:>8.1%}"
+              f"{ms(50):>9.1f}{ms(90):>9.1f}{ms(99):>9.1f}"
+              f"{(latencies[-1] * 1000 if latencies else 0):>9.1f}")
+        for reason, count in result['errors'].most_common(3):
+            print(f"  {'':14}  ⚠️  {count:,} × {reason}")
+
+
+def remove_test_agents(agent_ids: list):
+    """Delete the agents the registration scenario created."""
+    print(f"   🧹 Deleting {len(agent_ids):,} test agent(s)...")
+    left = []
+    for agent_id in agent_ids:
+        try:
+            check_deregistration(http, agent_id)
+        except Exception:
+            left.append(agent_id)
+    if left:
+        print(f"   ⚠️  {len(left):,} could not be deleted, e.g. {', '.join(left[:3])}")
+
+
+def load_test(args, scenarios: list) -> bool:
+    """Run each scenario under load; True if all stay within the error and p99 budgets."""
+    print(f"\n🔥 Load test: {args.concurrency} thread(s), {args.duration:.0f}s per scenario, "
+          f"{f'{args.rps:.0f} req/s target' if args.rps else 'closed loop'}")
+
+    # Retrieval needs an agent that exists: take one from the listing
+    agent_id = None
+    if 'retrieval' in scenarios:
+        try:
+            agents = check_discovery(http)['agents']
+            agent_id = agents[0]['agent_id'] if agents else None
+        except Exception as e:
+            print(f"⚠️  Could not list agents ({e})")
+        if agent_id is None:
+            print("⚠️  No agent to retrieve - skipping retrieval scenario")
+            scenarios = [name for name in scenarios if name != 'retrieval']
+
+    results = []
+    created = []
+    try:
+        for name in scenarios:
+            print(f"   ▶ {name}...")
+            results.append(run_load(name, scenario_call(name, agent_id, created),
+                                    args.concurrency, args.duration, args.rps))
+    finally:
+        if created:
+            remove_test_agents(created)
+    print_load_report(results)
+
+    ok = True
+    for result in results:
+        error_rate = sum(result['errors'].values()) / max(result['requests'], 1)
+        p99_ms = percentile(result['latencies'], 99) * 1000
+        if result['requests'] == 0 or error_rate > args.max_error_rate:
+            print(f"\n❌ {result['scenario']}: error rate {error_rate:.1%} "
+                  f"(budget {args.max_error_rate:.1%})")
+            ok = False
+        if args.max_p99 and p99_ms > args.max_p99:
+            print(f"\n❌ {result['scenario']}: p99 {p99_ms:.1f} ms (budget {args.max_p99:.0f} ms)")
+            ok = False
+    print("\n" + "─"*70)
+    print("🎉 All scenarios within budget." if ok else "⚠️  Some scenarios exceeded their budget.")
+    print()
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Trust Directory integration and load test")
+    parser.add_argument('--url', help=f"directory base URL (default {TRUST_DIR_URL}; "
+                                      "required with --load unless --stand-in)")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="start a local Trust Directory stand-in and test against it")
+    parser.add_argument('--seed', type=int, default=100, help="agents preloaded into the stand-in")
+    parser.add_argument('--load', action='store_true', help="run the scenarios as a load test")
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_LOAD_SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)} "
+                             "(registration writes to the directory and is opt-in)")
+    parser.add_argument('--concurrency', type=int, default=8, help="worker threads")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument('--rps', type=float, default=0, help="target requests/s (0 = closed loop)")
+    parser.add_argument('--max-error-rate', type=float, default=0.0,
+                        help="fail if a scenario's error rate exceeds this fraction")
+    parser.add_argument('--max-p99', type=float, default=0,
+                        help="fail if a scenario's p99 latency exceeds this many ms (0 = no limit)")
+    args = parser.parse_args(argv)
+    if args.load and not (args.stand_in or args.url):
+        parser.error("--load needs --stand-in or an explicit --url "
+                     "(it does not load the production directory by default)")
+    unknown = set(args.scenarios.split(',')) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    """Run all tests (or the load test with --load)."""
+    global TRUST_DIR_URL
+    args = parse_args(argv)
+    TRUST_DIR_URL = (args.url or TRUST_DIR_URL).rstrip('/')
+    stand_in = None
+    if args.stand_in:
+        from marketplace.stand_in import start_stand_in
+        stand_in = start_stand_in(seed=args.seed, admin_key=ADMIN_KEY)
+        TRUST_DIR_URL = stand_in.url
+    scenarios = [name for name in SCENARIOS if name in args.scenarios.split(',')]
+    
     print("\n" + "╔" + "═"*68 + "╗")
     print("║" + " "*68 + "║")
     print("║" + "  PRODUCTION MARKETPLACE DEMO - INTEGRATION TEST".center(68) + "║")
@@ -167,14 +458,26 @@ def main():
     print("╚" + "═"*68 + "╝")
     
     print(f"\nConfiguration:")
-    print(f"  Trust Directory: {TRUST_DIR_URL}")
+    print(f"  Trust Directory: {TRUST_DIR_URL}{' (local stand-in)' if stand_in else ''}")
     print(f"  Admin Key: {'✅ Configured' if ADMIN_KEY else '❌ Not set'}")
+    cassette = active_cassette()
+    if cassette:
+        print(f"  Cassette: {cassette.mode} ({cassette.path})")
+    
+    if args.load:
+        if 'registration' in scenarios and not (ADMIN_KEY or stand_in):
+            print("\n⚠️  DIRECTORY_ADMIN_KEY not set - skipping registration scenario")
+            scenarios.remove('registration')
+        ok = load_test(args, scenarios)
+        if stand_in:
+            stand_in.shutdown()
+        sys.exit(0 if ok else 1)
     
     # Run tests
     results = {}
     
     results['connection'] = test_trust_directory_connection()
-    results['registration'] = test_agent_registration()
+    results['registration'] = test_agent_registration(require_key=stand_in is None)
     results['discovery'] = test_agent_discovery(results['registration'])
     
     if results['registration']:
@@ -209,6 +512,8 @@ def main():
         print("⚠️  Some tests failed. Check configuration and try again.")
     
     print()
+    if stand_in:
+        stand_in.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""Agent HTTP server and http_responder: routes, content negotiation, JSON fallback."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from marketplace import codec
+from marketplace.agent_server import HTTPError, http_responder, policy_routes, start_agent_server
+
+
+@pytest.fixture(scope='module')
+def seller():
+    routes = policy_routes('/agent/henri', min_price=450, cost_basis=350)
+
+    def refuse(body):
+        raise HTTPError(409, f"no deal with {body['buyer_id']}")
+
+    routes[('POST', '/agent/henri/receipt')] = refuse
+    return start_agent_server(routes, name='test-seller')
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_responder_matches_policy(seller, binary):
+    respond = http_responder(f"{seller.url}/agent/henri", binary=binary)
+
+    assert respond('agent_sarah', 500)['response'] == 'accept'
+    low = respond('agent_sarah', 300)
+    assert low['response'] == 'too_low' and low['counter_price'] > 300
+
+
+def test_status_and_errors(seller):
+    assert requests.get(f"{seller.url}/agent/henri").json()['status'] == 'ok'
+    assert requests.get(f"{seller.url}/agent/sarah").status_code == 404
+    assert requests.get(f"{seller.url}/agent/henri/offer").status_code == 405
+
+    response = requests.post(f"{seller.url}/agent/henri/receipt", json={'buyer_id': 'agent_x'})
+    assert response.status_code == 409 and 'agent_x' in response.json()['error']
+    assert requests.post(f"{seller.url}/agent/henri/offer", json={}).status_code == 400
+
+
+def test_unsupported_content_type(seller):
+    response = requests.post(f"{seller.url}/agent/henri/offer", data=b'buyer_id=x',
+                             headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+    assert response.status_code == 415
+
+
+def test_binary_answer_only_when_asked(seller):
+    body = codec.dumps({'buyer_id': 'agent_sarah', 'offer_price': 500.0}, codec.BINARY_MEDIA_TYPE)
+    headers = {'Content-Type': codec.BINARY_MEDIA_TYPE}
+
+    response = requests.post(f"{seller.url}/agent/henri/offer", data=body, headers=headers)
+    assert response.headers['Content-Type'] == codec.JSON_MEDIA_TYPE
+
+    headers['Accept'] = codec.BINARY_MEDIA_TYPE
+    response = requests.post(f"{seller.url}/agent/henri/offer", data=body, headers=headers)
+    assert response.headers['Content-Type'] == codec.BINARY_MEDIA_TYPE
+    assert codec.decode(response.content)['response'] == 'accept'
+
+
+class JSONOnlyPeer(BaseHTTPRequestHandler):
+    """Seller that rejects anything but JSON bodies, as older peers do."""
+
+    content_types = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.content_types.append(self.headers['Content-Type'])
+        if self.headers['Content-Type'] != codec.JSON_MEDIA_TYPE:
+            self.send_response(415)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = json.dumps({'response': 'accept', 'price': json.loads(body)['offer_price']}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', codec.JSON_MEDIA_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_binary_falls_back_to_json_on_415():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JSONOnlyPeer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        respond = http_responder(f"http://127.0.0.1:{server.server_port}/agent/henri", binary=True)
+
+        assert respond('agent_sarah', 480) == {'response': 'accept', 'price': 480}
+        assert respond('agent_sarah', 490)['price'] == 490
+        # One rejected binary body, then JSON only
+        assert JSONOnlyPeer.content_types == [codec.BINARY_MEDIA_TYPE] + [codec.JSON_MEDIA_TYPE] * 2
+    finally:
+        server.shutdown()
+        server.server_close()
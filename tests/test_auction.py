@@ -0,0 +1,67 @@
+"""Parallel auction: cheapest agreement wins, the deadline fixes the winner."""
+
+import threading
+import time
+
+from marketplace.auction import run_auction
+from marketplace.negotiation import BuyerPolicy, NegotiationState, SellerPolicy
+from marketplace.records import SellerCandidate
+
+
+def seller(agent_id):
+    return SellerCandidate(agent_id, agent_id, 4.8)
+
+
+def auction(policies, deadline=5.0, **responders):
+    responders = dict({agent_id: policy.respond for agent_id, policy in policies.items()}, **responders)
+    sellers = [seller(agent_id) for agent_id in responders]
+    return run_auction('buyer', BuyerPolicy(500), sellers, responders, 500, deadline=deadline)
+
+
+def test_cheapest_agreement_wins():
+    result = auction({'dear': SellerPolicy(480, 400), 'cheap': SellerPolicy(420, 300)})
+
+    assert result.winner.agent_id == 'cheap'
+    assert result.price == result.sessions['cheap'].agreed_price <= 500
+
+
+def test_rank_breaks_price_ties():
+    result = auction({'first': SellerPolicy(450, 350), 'second': SellerPolicy(450, 350)})
+
+    assert result.winner.agent_id == 'first'
+
+
+def test_no_agreement_no_winner():
+    result = auction({'greedy': SellerPolicy(900, 800)})
+
+    assert result.winner is None and result.price is None
+    assert result.sessions['greedy'].state.terminal
+
+
+def test_sellers_without_responder_are_skipped():
+    result = run_auction('buyer', BuyerPolicy(500), [seller('silent')], {}, 500)
+
+    assert result.winner is None and result.sessions == {}
+
+
+def test_winner_announced_at_deadline_without_waiting_for_slow_seller():
+    release = threading.Event()
+    slow_policy = SellerPolicy(300, 200)
+
+    def slow(buyer_id, offer_price):
+        release.wait(5)
+        return slow_policy.respond(buyer_id, offer_price)
+
+    start = time.monotonic()
+    result = auction({'fast': SellerPolicy(480, 400)}, deadline=0.3, slow=slow)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 2
+    assert result.winner.agent_id == 'fast'
+    assert not result.join(timeout=0)
+
+    # The slow seller would have been cheaper, but answered after the deadline
+    release.set()
+    assert result.join(timeout=5)
+    assert result.winner.agent_id == 'fast'
+    assert result.sessions['slow'].state in (NegotiationState.CANCELLED, NegotiationState.AGREED)
@@ -0,0 +1,87 @@
+"""Message bus: request/reply, errors, timeouts and mailbox backpressure."""
+
+import asyncio
+import threading
+
+import pytest
+
+from marketplace.bus import BusError, BusThread, Message, MessageBus, RequestTimeout, UnknownRecipient
+from marketplace.negotiation import BuyerPolicy, Negotiation, NegotiationState, SellerPolicy
+
+
+@pytest.fixture
+def bus():
+    with BusThread(mailbox_size=4) as bus:
+        bus.register('sarah')
+        yield bus
+
+
+def test_request_gets_handler_result(bus):
+    bus.serve('henri', {'offer': SellerPolicy(450, 300).respond})
+
+    decision = bus.request('sarah', 'henri', 'offer', {'buyer_id': 'sarah', 'offer_price': 480})
+
+    assert decision['response'] == 'accept'
+
+
+def test_negotiation_runs_over_the_bus(bus):
+    bus.serve('henri', {'offer': SellerPolicy(450, 300).respond}, workers=2)
+    negotiation = Negotiation('sarah', BuyerPolicy(500), bus.responder('sarah', 'henri'), 500)
+
+    assert negotiation.run() is NegotiationState.AGREED
+    assert 450 <= negotiation.agreed_price <= 500
+
+
+def test_handler_errors_reach_the_requester(bus):
+    def receipt(**terms):
+        raise ValueError("price does not match the agreed deal")
+
+    bus.serve('henri', {'receipt': receipt})
+
+    with pytest.raises(ValueError, match='agreed deal'):
+        bus.request('sarah', 'henri', 'receipt', {'price': 1})
+    with pytest.raises(BusError, match='no handler'):
+        bus.request('sarah', 'henri', 'counter', {})
+    with pytest.raises(UnknownRecipient):
+        bus.request('sarah', 'nobody', 'offer', {})
+
+
+def test_slow_agent_times_out_without_blocking_others(bus):
+    release = threading.Event()
+    bus.serve('slow', {'offer': lambda **payload: release.wait(5)})
+    bus.serve('henri', {'offer': SellerPolicy(450, 300).respond})
+
+    with pytest.raises(RequestTimeout):
+        bus.request('sarah', 'slow', 'offer', {}, timeout=0.05)
+    assert bus.request('sarah', 'henri', 'offer', {'buyer_id': 'sarah', 'offer_price': 400}, timeout=1)
+    release.set()
+
+
+def test_send_waits_while_mailbox_is_full():
+    async def scenario():
+        bus = MessageBus(mailbox_size=2)
+        bus.register('henri')
+        for _ in range(2):
+            await bus.send(Message('sarah', 'henri', 'offer', {}))
+
+        blocked = asyncio.create_task(bus.send(Message('sarah', 'henri', 'offer', {})))
+        await asyncio.sleep(0.01)
+        assert not blocked.done() and bus.depth('henri') == 2
+
+        await bus.receive('henri')
+        await asyncio.wait_for(blocked, 1)
+        assert bus.depth('henri') == 2
+
+    asyncio.run(scenario())
+
+
+def test_late_replies_are_dropped():
+    async def scenario():
+        bus = MessageBus()
+        bus.register('henri')
+        with pytest.raises(RequestTimeout):
+            await bus.request('sarah', 'henri', 'offer', {}, timeout=0.01)
+        message = await bus.receive('henri')
+        bus.reply(message, {'response': 'accept'})  # nobody waiting: no error
+
+    asyncio.run(scenario())
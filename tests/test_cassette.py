@@ -0,0 +1,71 @@
+"""Cassette replay: exact matches, and fallbacks limited to the same endpoint."""
+
+import pytest
+
+from marketplace.cassette import Cassette, CassetteMiss
+
+
+def get(path, **validators):
+    return dict({'method': 'GET', 'path': path, 'body_sha1': None,
+                 'if_none_match': None, 'if_modified_since': None}, **validators)
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    path = str(tmp_path / 'session.jsonl.gz')
+    recording = Cassette(path, 'record')
+    recording.record('http', get('/api/v1/agents'), {'status': 200, 'text': 'listing'}, 0.01)
+    recording.record('http', get('/api/v1/agents/agent_henri_65a1'), {'status': 200, 'text': 'henri'}, 0.01)
+    recording.record('http', get('/api/v1/agents/changes?since=12'), {'status': 200, 'text': 'changes'}, 0.01)
+    recording.record('http', {'method': 'POST', 'path': '/api/v1/agents', 'body_sha1': 'aa'},
+                     {'status': 200, 'text': 'registered'}, 0.01)
+    recording.record('claude', {'model': 'm', 'messages': ['hi']}, {'text': 'hello'}, 0.01)
+    recording.save()
+    return Cassette(path, 'replay')
+
+
+def test_exact_match(cassette):
+    assert cassette.lookup('http', get('/api/v1/agents'))['response']['text'] == 'listing'
+    assert cassette.hits == 1 and cassette.fallbacks == 0
+
+
+def test_fallback_wildcards_id_segments(cassette):
+    entry = cassette.lookup('http', get('/api/v1/agents/agent_sarah_7f3a'))
+
+    assert entry['response']['text'] == 'henri'
+    assert cassette.fallbacks == 1
+
+
+def test_fallback_wildcards_query_values(cassette):
+    assert cassette.lookup('http', get('/api/v1/agents/changes?since=40'))['response']['text'] == 'changes'
+
+
+def test_fallback_matches_body_changes_on_same_endpoint(cassette):
+    request = {'method': 'POST', 'path': '/api/v1/agents', 'body_sha1': 'bb'}
+    assert cassette.lookup('http', request)['response']['text'] == 'registered'
+
+
+@pytest.mark.parametrize('request_', [
+    get('/'),
+    get('/api/v1/agents/changes'),
+    get('/api/v1/agents/changes?cursor=12'),
+    get('/api/v1/agents/agent_henri_65a1/receipts'),
+    {'method': 'DELETE', 'path': '/api/v1/agents/agent_henri_65a1'},
+])
+def test_fallback_requires_same_path_template(cassette, request_):
+    with pytest.raises(CassetteMiss):
+        cassette.lookup('http', request_)
+
+
+def test_fallback_interaction_is_played_once(cassette):
+    cassette.lookup('http', get('/api/v1/agents/agent_a_1'))
+    cassette.lookup('http', get('/api/v1/agents/agent_henri_65a1'))
+
+    with pytest.raises(CassetteMiss):
+        cassette.lookup('http', get('/api/v1/agents/agent_b_2'))
+
+
+def test_llm_fallback_stays_within_kind(cassette):
+    assert cassette.lookup('claude', {'model': 'm', 'messages': ['other']})['response']['text'] == 'hello'
+    with pytest.raises(CassetteMiss):
+        cassette.lookup('claude_stream', {'model': 'm', 'messages': ['hi']})
@@ -0,0 +1,56 @@
+"""SessionCheckpoint: resume after completed steps, torn tails, rewinds."""
+
+import json
+
+from marketplace.checkpoint import SessionCheckpoint
+
+
+def test_resume_after_recorded_steps(tmp_path):
+    with SessionCheckpoint('s1', str(tmp_path)) as checkpoint:
+        assert not checkpoint.resumed
+        checkpoint.record(1, 'research')
+        checkpoint.record(2, 'discover', {'sellers': [{'agent_id': 'agent_henri'}]})
+
+    checkpoint = SessionCheckpoint('s1', str(tmp_path))
+    assert checkpoint.resumed and checkpoint.last_step == 2
+    assert checkpoint.done(1) and not checkpoint.done(3)
+    assert checkpoint.state(1) == {}
+    assert checkpoint.state(2)['sellers'] == [{'agent_id': 'agent_henri'}]
+    assert checkpoint.state(3) is None
+
+
+def test_torn_tail_is_truncated_on_resume(tmp_path):
+    with SessionCheckpoint('s1', str(tmp_path)) as checkpoint:
+        checkpoint.record(1, 'research')
+        checkpoint.record(2, 'discover')
+    path = checkpoint.path
+    with open(path, 'ab') as f:
+        f.write(b'{"step":3,"name":"nego')
+    size = len(open(path, 'rb').read()) - len(b'{"step":3,"name":"nego')
+
+    with SessionCheckpoint('s1', str(tmp_path)) as checkpoint:
+        assert checkpoint.last_step == 2
+        assert len(open(path, 'rb').read()) == size
+        checkpoint.record(3, 'negotiate', {'state': 'agreed'})
+
+    # The new record starts on a clean line
+    lines = open(path, 'rb').read().splitlines()
+    assert [json.loads(line)['step'] for line in lines] == [1, 2, 3]
+    assert SessionCheckpoint('s1', str(tmp_path)).state(3) == {'state': 'agreed'}
+
+
+def test_rewind_persists_until_steps_are_recorded_again(tmp_path):
+    with SessionCheckpoint('s1', str(tmp_path)) as checkpoint:
+        for step in range(1, 6):
+            checkpoint.record(step, f"step{step}", {'run': 1})
+        checkpoint.rewind(3)
+        assert checkpoint.last_step == 2
+
+    checkpoint = SessionCheckpoint('s1', str(tmp_path))
+    assert checkpoint.last_step == 2 and not checkpoint.done(4)
+    checkpoint.record(3, 'step3', {'run': 2})
+    checkpoint.close()
+
+    checkpoint = SessionCheckpoint('s1', str(tmp_path))
+    assert checkpoint.last_step == 3
+    assert checkpoint.state(1) == {'run': 1} and checkpoint.state(3) == {'run': 2}
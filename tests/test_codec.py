@@ -0,0 +1,110 @@
+"""Agent message codec: round trips, signatures and malformed frames."""
+
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from marketplace import codec
+
+MESSAGES = [
+    {'buyer_id': 'agent_sarah_7f3a9c2e', 'offer_price': 462.5},
+    {'response': 'counter', 'counter_price': 500.0, 'profit': 112.5, 'buyer_reputation': 4.9},
+    {'price': 475.0, 'reasoning': 'Fair market value, excellent condition'},
+    {'transaction_id': 'tx_20250101_120000', 'buyer_id': 'agent_sarah_7f3a9c2e',
+     'seller_id': 'agent_henri_41bd0e77', 'item': 'MacBook Pro 2020',
+     'price': 475.0, 'currency': 'USD', 'timestamp': 1735732800.0},
+    # No schema: carried as a JSON blob
+    {'status': 'ok', 'pid': 1234, 'nested': {'a': [1, 2]}},
+    {},
+]
+
+
+@pytest.mark.parametrize('payload', MESSAGES)
+def test_round_trip(payload):
+    assert codec.decode(codec.encode(payload)) == payload
+
+
+@pytest.mark.parametrize('payload', MESSAGES)
+def test_signed_round_trip(payload):
+    signed = dict(payload, signature='c2lnbmF0dXJl')
+    assert codec.decode(codec.encode(signed)) == signed
+
+
+def test_canonical_ignores_key_order_and_signature():
+    payload = MESSAGES[3]
+    reordered = dict(reversed(list(payload.items())))
+
+    assert codec.canonical(reordered) == codec.canonical(payload)
+    assert codec.canonical(dict(payload, signature='x')) == codec.canonical(payload)
+
+
+def test_wire_negotiation():
+    frame = codec.dumps(MESSAGES[0], codec.BINARY_MEDIA_TYPE)
+
+    assert codec.loads(frame, f"{codec.BINARY_MEDIA_TYPE}; charset=binary") == MESSAGES[0]
+    assert codec.negotiate(f"{codec.BINARY_MEDIA_TYPE}, application/json;q=0.5") == codec.BINARY_MEDIA_TYPE
+    assert codec.negotiate('application/json') == codec.JSON_MEDIA_TYPE
+
+
+@pytest.mark.parametrize('payload', MESSAGES + [dict(MESSAGES[0], signature='abc')])
+def test_trailing_bytes_rejected(payload):
+    with pytest.raises(codec.CodecError, match='trailing'):
+        codec.decode(codec.encode(payload) + b'\x00')
+
+
+@pytest.mark.parametrize('payload', [MESSAGES[0], MESSAGES[4], dict(MESSAGES[0], signature='abc')])
+def test_truncated_frame_rejected(payload):
+    frame = codec.encode(payload)
+    for size in range(len(frame)):
+        with pytest.raises(codec.CodecError):
+            codec.decode(frame[:size])
+
+
+def test_foreign_frame_rejected():
+    with pytest.raises(codec.CodecError):
+        codec.decode(b'{"buyer_id": "x"}')
+
+
+def hmac_signer(data):
+    return hmac.new(b'key', data, hashlib.sha256).digest()
+
+
+def hmac_verifier(data, signature):
+    return hmac.compare_digest(hmac_signer(data).hex(), signature)
+
+
+def test_sign_covers_canonical_form():
+    signed = codec.sign(MESSAGES[3], hmac_signer)
+
+    assert codec.verify(signed, hmac_verifier)
+    # Survives the wire in either format
+    assert codec.verify(codec.decode(codec.encode(signed)), hmac_verifier)
+    assert codec.verify(json.loads(json.dumps(signed)), hmac_verifier)
+
+
+@pytest.mark.parametrize('change', [{'price': 1.0}, {'buyer_id': 'agent_mallory'}, {'signature': '00'}])
+def test_verify_rejects_tampered_messages(change):
+    signed = codec.sign(MESSAGES[3], hmac_signer)
+
+    assert not codec.verify(dict(signed, **change), hmac_verifier)
+
+
+def test_verify_rejects_unsigned_message():
+    assert not codec.verify(MESSAGES[3], hmac_verifier)
+
+
+def test_counter_offer_to_a_buyer_keeps_its_schema():
+    counter = {'price': 475.0, 'reasoning': 'fair', 'seller_id': 'agent_henri', 'buyer_id': 'agent_sarah'}
+
+    assert codec.encode(counter)[3] == 3
+    assert codec.decode(codec.encode(counter)) == counter
+
+
+def test_schema_cache_is_bounded():
+    for i in range(codec.MAX_CACHED_KEY_SETS * 2):
+        codec.encode({f"field_{i}": i})
+
+    assert len(codec._BY_KEYS) <= codec.MAX_CACHED_KEY_SETS
+    assert codec.decode(codec.encode(MESSAGES[0])) == MESSAGES[0]
@@ -0,0 +1,88 @@
+"""DirectoryClient: batched lookups against the stand-in directory."""
+
+import pytest
+
+from marketplace.directory import DirectoryClient
+from marketplace.stand_in import start_stand_in
+
+
+def agent(agent_id, **metadata):
+    return {'agent_id': agent_id, 'endpoint': f"http://localhost/{agent_id}",
+            'metadata': dict({'name': agent_id, 'capabilities': ['buy_electronics']}, **metadata)}
+
+
+class CountingClient(DirectoryClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups = []
+
+    def get_agent(self, agent_id):
+        self.lookups.append(agent_id)
+        return super().get_agent(agent_id)
+
+
+@pytest.fixture
+def directory():
+    server = start_stand_in()
+    for i in range(5):
+        server.store.upsert(agent(f"buyer_{i}", trust_score=4.0 + i / 10))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_agents_looks_up_each_distinct_id_once(directory):
+    client = CountingClient(directory.url, hedge=False)
+    ids = ['buyer_0', 'buyer_1', 'buyer_0', 'buyer_4', 'buyer_1']
+
+    found = client.get_agents(ids)
+
+    assert sorted(client.lookups) == ['buyer_0', 'buyer_1', 'buyer_4']
+    assert list(found) == ['buyer_0', 'buyer_1', 'buyer_4']
+    assert found['buyer_4']['metadata']['trust_score'] == 4.4
+
+
+def test_unknown_and_failed_lookups_are_none(directory):
+    class FlakyClient(DirectoryClient):
+        def get_agent(self, agent_id):
+            if agent_id == 'buyer_2':
+                raise ConnectionError("reset")
+            return super().get_agent(agent_id)
+
+    found = FlakyClient(directory.url, hedge=False).get_agents(['buyer_1', 'buyer_2', 'ghost'])
+
+    assert found['buyer_1']['agent_id'] == 'buyer_1'
+    assert found['buyer_2'] is None and found['ghost'] is None
+
+
+class FetchCountingClient(DirectoryClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = 0
+
+    def _fetch_agent(self, agent_id):
+        self.fetches += 1
+        return super()._fetch_agent(agent_id)
+
+
+def test_unknown_agents_are_answered_locally_until_registered(directory):
+    client = FetchCountingClient(directory.url, hedge=False)
+
+    assert client.get_agent('ghost') is None
+    assert client.get_agent('ghost') is None
+    assert client.fetches == 1
+
+    client.register_agent(agent('ghost', trust_score=4.6))
+
+    assert client.get_agent('ghost')['metadata']['trust_score'] == 4.6
+    assert client.fetches == 2
+
+
+def test_listing_clears_agents_it_contains(directory):
+    client = FetchCountingClient(directory.url, hedge=False)
+    assert client.get_agent('late') is None
+
+    directory.store.upsert(agent('late'))
+    client.list_agents()
+
+    assert client.get_agent('late')['agent_id'] == 'late'
@@ -0,0 +1,98 @@
+"""DirectoryReplica: incremental sync against the stand-in directory, stale reads on failure."""
+
+import pytest
+
+from marketplace.directory import DirectoryClient, DirectoryError, DirectoryReplica
+from marketplace.stand_in import start_stand_in
+
+
+def agent(agent_id, **metadata):
+    return {'agent_id': agent_id, 'endpoint': f"http://localhost/{agent_id}",
+            'metadata': dict({'name': agent_id, 'capabilities': ['sell_electronics']}, **metadata)}
+
+
+@pytest.fixture
+def directory():
+    server = start_stand_in()
+    server.store.upsert(agent('agent_a', trust_score=4.8))
+    server.store.upsert(agent('agent_b', trust_score=4.2))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def replica(directory):
+    return DirectoryReplica(DirectoryClient(directory.url, hedge=False), sync_interval=0)
+
+
+def test_full_then_incremental_sync(directory, replica):
+    assert sorted(r.agent_id for r in replica.list_agents()) == ['agent_a', 'agent_b']
+    version = replica.version
+
+    directory.store.upsert(agent('agent_c', trust_score=4.9))
+    directory.store.delete('agent_a')
+
+    assert sorted(r.agent_id for r in replica.list_agents()) == ['agent_b', 'agent_c']
+    assert replica.version == version + 1
+
+
+def test_unchanged_directory_keeps_version(directory, replica):
+    first = replica.list_agents()
+    version = replica.version
+
+    # No changes: the version (and the snapshot list) stay the same
+    assert replica.list_agents() is first
+    replica.full_resync()
+    assert replica.version == version
+
+
+def test_get_agent_round_trips_status_and_metadata(directory, replica):
+    directory.store.upsert(agent('agent_v', verified=True, product='MacBook Pro 2020'))
+    replica.sync(force=True)
+
+    data = replica.get_agent('agent_v')
+    assert data['metadata']['verified'] is True
+    assert data['metadata']['product'] == 'MacBook Pro 2020'
+    assert data['status'] == 'active'
+
+
+def test_stale_reads_when_sync_fails(directory, replica):
+    agents = replica.list_agents()
+    # Nothing listens on port 1: every sync now fails to connect
+    replica.client.base_url = 'http://127.0.0.1:1'
+
+    assert replica.list_agents() == agents
+    assert replica.get_agent('agent_a')['agent_id'] == 'agent_a'
+    assert replica.sync_errors == 2
+
+
+def test_first_sync_failure_raises(directory):
+    client = DirectoryClient(directory.url, hedge=False)
+    replica = DirectoryReplica(client, sync_interval=0)
+
+    def unavailable():
+        raise DirectoryError("HTTP 503 listing agents")
+
+    client.list_agents = unavailable
+    with pytest.raises(DirectoryError):
+        replica.list_agents()
+
+
+def test_failed_sync_waits_for_interval(directory):
+    client = DirectoryClient(directory.url, hedge=False)
+    replica = DirectoryReplica(client, sync_interval=60)
+    replica.list_agents()
+    calls = []
+
+    def failing(cursor):
+        calls.append(cursor)
+        raise DirectoryError("HTTP 503 fetching changes")
+
+    client.changes_since = failing
+    with pytest.raises(DirectoryError):
+        replica.sync(force=True)
+    # Reads within the interval serve the replica without retrying
+    replica.list_agents()
+    replica.get_agent('agent_a')
+    assert len(calls) == 1
@@ -0,0 +1,146 @@
+"""complete(): token accounting, streaming and the prompt-cache marker, against a fake client."""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from marketplace import llm
+
+
+class FakeMessages:
+    """Stands in for client.messages: answers every prompt with a fixed text."""
+
+    def __init__(self, text='Fair price for a clean machine.'):
+        self.text = text
+        self.requests = []
+
+    def _message(self, request):
+        self.requests.append(request)
+        usage = SimpleNamespace(input_tokens=30, output_tokens=8,
+                                cache_read_input_tokens=0, cache_creation_input_tokens=0)
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], usage=usage)
+
+    def create(self, **request):
+        return self._message(request)
+
+    def stream(self, **request):
+        message = self._message(request)
+        words = message.content[0].text.split(' ')
+
+        class Stream:
+            text_stream = [w + ' ' for w in words[:-1]] + words[-1:]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def get_final_message(self):
+                return message
+        return Stream()
+
+
+@pytest.fixture(autouse=True)
+def unpaced(monkeypatch):
+    # Pacing is covered by the rate-limit tests; here it would only slow calls down
+    monkeypatch.setattr('marketplace.ratelimit.RATE_LIMIT_ENABLED', False)
+
+
+@pytest.fixture
+def client():
+    return SimpleNamespace(messages=FakeMessages())
+
+
+def test_default_output_cap():
+    # The baseline demos capped reasoning at 100 tokens
+    assert llm.LLM_MAX_TOKENS == int(os.getenv('LLM_MAX_TOKENS', 100))
+
+
+def test_short_prefix_is_not_cache_marked():
+    assert 'cache_control' not in llm.system_blocks(llm.SYSTEM_PREFIX, cache=True)[0]
+
+    long_prefix = 'rule ' * (llm.PROMPT_CACHE_MIN_TOKENS * llm.CHARS_PER_TOKEN // 5 + 1)
+    assert llm.system_blocks(long_prefix, cache=True)[0]['cache_control'] == {'type': 'ephemeral'}
+    assert 'cache_control' not in llm.system_blocks(long_prefix, cache=False)[0]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_complete_records_usage(client, stream):
+    ledger = llm.TokenLedger('test')
+    chunks = []
+
+    text = llm.complete(client, 'henri_reasoning', 'Buyer offered  $450;\n counter $500.',
+                        baseline='You are Henri, a professional reseller. ' * 5,
+                        ledger=ledger, stream=stream, on_token=chunks.append)
+
+    assert text == client.messages.text
+    assert ''.join(chunks) == client.messages.text
+    request = client.messages.requests[0]
+    assert request['messages'][0]['content'] == 'Buyer offered $450; counter $500.'
+    assert request['max_tokens'] == llm.LLM_MAX_TOKENS
+    (call,) = ledger.calls
+    assert (call['input_tokens'], call['output_tokens']) == (30, 8)
+    assert call['tokens_saved'] > 0
+    assert (call['ttft_ms'] is not None) == stream
+    assert 'Saved: ~' in ledger.report()
+
+
+
+class BlockingMessages(FakeMessages):
+    """Holds each call until released, so concurrent callers overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def create(self, **request):
+        self.release.wait(5)
+        return super().create(**request)
+
+
+def concurrent_calls(client, ledger, kwargs_list):
+    """Run one complete() per kwargs, all in flight together, then release the client."""
+    joined = llm.LLM_FLIGHTS.calls + llm.LLM_FLIGHTS.shared + len(kwargs_list)
+    threads = [threading.Thread(target=llm.complete, args=(client, 'sarah_reasoning', 'Offer $450?'),
+                                kwargs=dict({'stream': False}, ledger=ledger, **kwargs))
+               for kwargs in kwargs_list]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while llm.LLM_FLIGHTS.calls + llm.LLM_FLIGHTS.shared < joined and time.monotonic() < deadline:
+        time.sleep(0.005)
+    time.sleep(0.05)
+    client.messages.release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_identical_concurrent_calls_share_one_request():
+    client = SimpleNamespace(messages=BlockingMessages())
+    ledger = llm.TokenLedger('test')
+
+    concurrent_calls(client, ledger, [{}, {}, {}])
+
+    assert len(client.messages.requests) == 1
+    (leader,) = [c for c in ledger.calls if not c.get('coalesced')]
+    coalesced = [c for c in ledger.calls if c.get('coalesced')]
+    assert len(coalesced) == 2
+    for call in coalesced:
+        assert call['input_tokens'] == 0
+        # A waiter avoided at most the rest of the call it joined
+        assert 0 <= call['ms_saved'] <= leader['latency_ms']
+    assert 'of waiting avoided' in ledger.report()
+
+
+def test_temperature_and_stream_are_part_of_the_key():
+    client = SimpleNamespace(messages=BlockingMessages())
+    ledger = llm.TokenLedger('test')
+
+    concurrent_calls(client, ledger, [{'temperature': 0.2}, {'temperature': 0.9}, {'stream': True}])
+
+    assert sorted(str(r.get('temperature')) for r in client.messages.requests) == ['0.2', '0.9', 'None']
+    assert not any(c.get('coalesced') for c in ledger.calls)
@@ -0,0 +1,117 @@
+"""Tool memoization: TTL expiry, LRU bound, state versioning and what is never cached."""
+
+import pytest
+
+from marketplace import memo
+from marketplace.memo import MemoCache, memoize, normalize
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic() for the memo module."""
+    now = [1000.0]
+    monkeypatch.setattr(memo.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def counting(**options):
+    calls = []
+
+    @memoize(**options)
+    def tool(*args, **kwargs):
+        calls.append(args)
+        return {'args': list(args), 'n': len(calls)}
+    return tool, calls
+
+
+def test_entries_expire_after_ttl(clock):
+    tool, calls = counting(ttl=60)
+
+    tool('macbook')
+    clock[0] += 59
+    tool('macbook')
+    assert len(calls) == 1
+
+    clock[0] += 2
+    tool('macbook')
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MemoCache('test', ttl=60, maxsize=2)
+    cache.put(('a',), 1)
+    cache.put(('b',), 2)
+    assert cache.get(('a',)) == (True, 1)
+
+    cache.put(('c',), 3)
+
+    assert len(cache) == 2
+    assert cache.get(('b',)) == (False, None)
+    assert cache.get(('a',)) == (True, 1) and cache.get(('c',)) == (True, 3)
+
+
+def test_version_change_bypasses_stale_entries():
+    state = {'budget': 500}
+    tool, calls = counting(version=lambda: state['budget'])
+
+    tool(450)
+    tool(450)
+    state['budget'] = 400
+    tool(450)
+
+    assert len(calls) == 2
+
+
+def test_cache_if_false_is_not_cached():
+    results = iter([{'agent_id': 'x', 'verified': False}, {'agent_id': 'x', 'verified': True}])
+
+    @memoize(cache_if=lambda result: result.get('verified') is True)
+    def reputation(seller_id):
+        return next(results)
+
+    assert reputation('x')['verified'] is False
+    # The unverified answer was not kept, so the now-registered seller is seen
+    assert reputation('x')['verified'] is True
+    assert reputation('x')['verified'] is True
+
+
+def test_exceptions_are_not_cached():
+    calls = []
+
+    @memoize()
+    def flaky(seller_id):
+        calls.append(seller_id)
+        if len(calls) == 1:
+            raise ConnectionError("directory down")
+        return {'verified': True}
+
+    with pytest.raises(ConnectionError):
+        flaky('x')
+    assert flaky('x') == {'verified': True}
+
+
+def test_cached_results_are_copies():
+    tool, _ = counting()
+
+    tool('a')['args'].append('mutated')
+
+    assert tool('a')['args'] == ['a']
+
+
+def test_llm_written_arguments_share_an_entry():
+    tool, calls = counting(casefold=True)
+
+    tool('"MacBook Pro  2020" ')
+    tool('macbook pro 2020')
+
+    assert len(calls) == 1
+    assert normalize(' "$1,200" ') == normalize(1200) == 1200.0
+
+
+def test_side_effect_tools_pass_through():
+    tool, calls = counting(side_effects=True)
+
+    tool('pay')
+    tool('pay')
+
+    assert len(calls) == 2 and tool.cache is None
@@ -0,0 +1,76 @@
+"""Per-phase metrics: span accounting and the export formats."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from marketplace.metrics import (
+    PHASE_CALLS, PHASE_ERRORS, PHASE_LATENCY, MetricsRegistry, instrument, label_set,
+    observe_response, span,
+)
+
+
+def test_span_counts_calls_errors_and_latency():
+    labels = {'phase': 'directory', 'operation': 'test_span'}
+    before = PHASE_CALLS.value(**labels), PHASE_ERRORS.value(**labels), PHASE_LATENCY.count(**labels)
+
+    with span('directory', 'test_span'):
+        pass
+    with pytest.raises(ConnectionError):
+        with span('directory', 'test_span'):
+            raise ConnectionError("down")
+    with span('directory', 'test_span') as current:
+        observe_response(current, SimpleNamespace(status_code=503))
+
+    after = PHASE_CALLS.value(**labels), PHASE_ERRORS.value(**labels), PHASE_LATENCY.count(**labels)
+    assert [b - a for a, b in zip(before, after)] == [3, 2, 3]
+
+
+def test_instrument_defaults_operation_to_function_name():
+    @instrument('tool')
+    def test_lookup_tool():
+        return 'ok'
+
+    assert test_lookup_tool() == 'ok'
+    assert PHASE_CALLS.value(phase='tool', operation='test_lookup_tool') >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('test_latency_seconds', 'Test', buckets=(0.1, 1.0))
+    labels = label_set(phase='claude')
+
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(labels, value)
+
+    (series,) = latency.snapshot()
+    assert series['buckets'] == {'0.1': 1, '1.0': 2}
+    assert series['count'] == 3 and series['sum'] == pytest.approx(5.55)
+    text = registry.to_prometheus()
+    assert 'test_latency_seconds_bucket{phase="claude",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{phase="claude"} 3' in text
+
+
+def test_registry_returns_existing_metric_and_escapes_labels():
+    registry = MetricsRegistry()
+    calls = registry.counter('test_total', 'Test')
+    assert registry.counter('test_total', 'Other help') is calls
+
+    calls.inc(label_set(operation='say "hi"\n'))
+
+    assert 'test_total{operation="say \\"hi\\"\\n"} 1' in registry.to_prometheus()
+
+
+def test_write_exports_json_and_prometheus(tmp_path):
+    registry = MetricsRegistry()
+    registry.gauge('test_queue_depth', 'Test').set(label_set(bucket='claude'), 4)
+
+    registry.write(str(tmp_path / 'metrics.json'))
+
+    data = json.loads((tmp_path / 'metrics.json').read_text())
+    assert data['metrics']['test_queue_depth'] == [{'labels': {'bucket': 'claude'}, 'value': 4}]
+    assert 'test_queue_depth{bucket="claude"} 4' in (tmp_path / 'metrics.prom').read_text()
+
+    registry.reset()
+    assert registry.snapshot()['metrics']['test_queue_depth'] == []
@@ -0,0 +1,56 @@
+"""NegativeCache: TTL, size bound and the generation guard against stale 404s."""
+
+import time
+
+from marketplace.negative_cache import NegativeCache
+
+
+def test_known_absent_until_ttl():
+    cache = NegativeCache('test', ttl=0.02)
+
+    cache.add('ghost')
+    assert 'ghost' in cache and cache.hits == 1
+    time.sleep(0.03)
+
+    assert 'ghost' not in cache and len(cache) == 0
+
+
+def test_oldest_entries_evicted_beyond_maxsize():
+    cache = NegativeCache('test', maxsize=3)
+
+    for i in range(10):
+        cache.add(f"spam_{i}")
+
+    assert len(cache) == 3
+    assert 'spam_6' not in cache and 'spam_9' in cache
+
+
+def test_discard_forgets_registered_agents():
+    cache = NegativeCache('test')
+    cache.add('agent_a')
+    cache.add('agent_b')
+
+    cache.discard('agent_a')
+    cache.discard_all(['agent_b', 'never_added'])
+
+    assert 'agent_a' not in cache and 'agent_b' not in cache
+
+
+def test_404_in_flight_across_an_invalidation_is_not_recorded():
+    cache = NegativeCache('test')
+    generation = cache.generation   # lookup starts
+
+    cache.discard('agent_new')      # agent registers meanwhile
+    cache.add('agent_new', generation)
+
+    assert 'agent_new' not in cache
+    cache.add('agent_new', cache.generation)
+    assert 'agent_new' in cache
+
+
+def test_disabled_cache_records_nothing():
+    cache = NegativeCache('test', ttl=0)
+
+    cache.add('ghost')
+
+    assert 'ghost' not in cache
@@ -0,0 +1,68 @@
+"""Negotiation engine: agreed prices never exceed the buyer's budget."""
+
+import pytest
+
+from marketplace.negotiation import BuyerPolicy, Negotiation, NegotiationState, SellerPolicy
+
+
+def negotiate(budget, policy, target_price=500, **kwargs):
+    negotiation = Negotiation('buyer', BuyerPolicy(budget), policy.respond, target_price, **kwargs)
+    negotiation.run()
+    return negotiation
+
+
+@pytest.mark.parametrize('budget', [400, 450, 480, 499.5, 500, 550])
+@pytest.mark.parametrize('min_price, cost_basis, margin', [
+    (450, 350, 50),
+    (450, 350, 0),
+    (480, 400, 20.8),
+    (500, 350, 0.8),
+    (300, 200, 50),
+])
+def test_agreed_price_within_budget(budget, min_price, cost_basis, margin):
+    negotiation = negotiate(budget, SellerPolicy(min_price, cost_basis, margin=margin))
+
+    assert negotiation.state.terminal
+    if negotiation.state is NegotiationState.AGREED:
+        assert negotiation.agreed_price <= budget
+    else:
+        assert negotiation.agreed_price is None
+    assert all(offer <= budget for _, offer, _, _ in negotiation.history)
+
+
+def test_counter_just_above_budget_stalls():
+    # Henri never comes below 500.8; a final offer at the budget is the most Sarah gives
+    negotiation = negotiate(500, SellerPolicy(500.5, 350, margin=0.3), epsilon=1.0)
+
+    assert negotiation.state is NegotiationState.STALLED
+    assert negotiation.agreed_price is None
+    assert negotiation.offer == 500
+
+
+def test_agrees_when_seller_counter_fits_budget():
+    negotiation = negotiate(500, SellerPolicy(450, 350))
+
+    assert negotiation.state is NegotiationState.AGREED
+    assert negotiation.agreed_price == 450
+
+
+def test_seller_counters_follow_policy_margin():
+    policy = SellerPolicy(400, 350, min_profit=100, margin=25)
+
+    assert policy.evaluate(390) == {'response': 'too_low', 'counter_price': 425, 'profit': 40}
+    assert policy.evaluate(420) == {'response': 'counter', 'counter_price': 475, 'profit': 70}
+    assert policy.evaluate(450) == {'response': 'accept', 'counter_price': 450, 'profit': 100}
+
+
+@pytest.mark.parametrize('policy', [SellerPolicy(450, 300), SellerPolicy(350, 300, margin=25)])
+def test_batch_evaluation_matches_single_offers(policy):
+    offers = [0, 100, 349.5, 350, 399, 400, 449.99, 450, 520, 1000]
+
+    batch = policy.evaluate_batch(offers)
+
+    for i, offer in enumerate(offers):
+        single = policy.evaluate(offer)
+        assert batch['response'][i] == single['response']
+        assert batch['counter_price'][i] == single['counter_price']
+        assert batch['profit'][i] == single['profit']
+        assert batch['margin_percent'][i] == pytest.approx(single['profit'] / offer * 100 if offer else 0)
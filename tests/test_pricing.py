@@ -0,0 +1,66 @@
+"""Pricing tables: identical to SellerPolicy, small, rebuilt when the policy changes."""
+
+import numpy as np
+import pytest
+
+from marketplace.negotiation import SellerPolicy
+from marketplace.pricing import PriceBook, PricingTable
+
+POLICIES = [
+    SellerPolicy(450, 300),                 # profit floor 400 < min_price: no counter band
+    SellerPolicy(350, 300),                 # counter band 350 <= price < 400
+    SellerPolicy(450, 300, min_profit=0),
+    SellerPolicy(1_000_000, 900_000),       # size must not depend on the price level
+]
+OFFERS = [0, 1, 349.99, 350, 399, 399.5, 400, 400.01, 449, 450, 450.5, 1000, 1e6, 2e6, -5]
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_table_matches_policy(policy):
+    table = PricingTable('sku', policy)
+
+    for price in OFFERS:
+        assert table.evaluate(price) == policy.evaluate(price)
+
+    batch = table.evaluate_batch(OFFERS)
+    expected = policy.evaluate_batch(OFFERS)
+    for column in ('price', 'profit', 'margin_percent', 'response', 'counter_price'):
+        np.testing.assert_array_equal(batch[column], expected[column])
+    assert [table.evaluate(p)['response'] for p in OFFERS] == \
+        [('too_low', 'counter', 'accept')[code] for code in batch['response_code']]
+
+
+def test_table_stores_only_breakpoints():
+    table = PricingTable('sku', SellerPolicy(1_000_000, 900_000))
+
+    assert table.breakpoints == [1_000_000, 1_000_000]
+    assert not hasattr(table, '_rows')
+
+
+def test_lookup_reports_profit_and_margin():
+    table = PricingTable('sku', SellerPolicy(450, 300))
+
+    row = table.lookup(500)
+
+    assert row['cost_basis'] == 300 and row['profit'] == 200
+    assert row['margin_percent'] == pytest.approx(40.0)
+    assert row['acceptable'] and row['response'] == 'accept'
+    assert table.lookup(0)['margin_percent'] == 0.0
+
+
+def test_price_book_rebuilds_only_when_policy_changes():
+    book = PriceBook()
+    policy = SellerPolicy(450, 300)
+    book.set_policy('mbp', policy)
+
+    assert book.evaluate('mbp', 420)['response'] == 'too_low'
+    book.lookup('mbp', 500)
+    assert book.builds == 1
+
+    policy.cost_basis = 400
+    assert book.evaluate('mbp', 460)['response'] == 'counter'
+    assert book.builds == 2
+
+    book.set_policy('mbp', SellerPolicy(300, 100))
+    assert book.evaluate_batch('mbp', [300])['response'][0] == 'accept'
+    assert book.builds == 3
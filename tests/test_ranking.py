@@ -0,0 +1,50 @@
+"""Seller ranking: heap selection returns exactly what a full sort would."""
+
+import random
+
+import pytest
+
+from marketplace.ranking import StreamRanker, score_seller, top_k
+from marketplace.records import SellerCandidate
+
+
+def sellers(n, seed=7):
+    rng = random.Random(seed)
+    # Few distinct values, so plenty of score ties
+    return [SellerCandidate(f"agent_{i}", f"Seller {i}", rng.choice([4.5, 4.8, 5.0]),
+                            price=rng.choice([450, 500, 550]), total_sales=rng.choice([0, 50, 500]))
+            for i in range(n)]
+
+
+def sorted_top(candidates, k, budget=500):
+    # sorted() is stable: among equal scores, earlier directory order wins
+    return sorted(candidates, key=lambda s: score_seller(s, budget), reverse=True)[:k]
+
+
+@pytest.mark.parametrize('k', [1, 3, 10, 500])
+def test_top_k_matches_full_sort(k):
+    candidates = sellers(200)
+
+    expected = sorted_top(candidates, k)
+
+    assert top_k(candidates, k, 500) == expected
+    assert top_k(iter(candidates), k, 500) == expected
+    assert StreamRanker(k, 500).extend(candidates).results() == expected
+
+
+def test_push_reports_entry_into_top_k():
+    ranker = StreamRanker(1, 500)
+    good = SellerCandidate('good', 'Good', 5.0, price=450, total_sales=500)
+    poor = SellerCandidate('poor', 'Poor', 4.5, price=550)
+
+    assert ranker.push(poor) is not None
+    assert ranker.push(good) == score_seller(good, 500)
+    assert ranker.push(poor) is None
+    assert ranker.results() == [good] and ranker.seen == 3
+
+
+def test_cheaper_seller_scores_higher():
+    cheap = SellerCandidate('a', 'A', 4.8, price=450)
+    dear = SellerCandidate('b', 'B', 4.8, price=550)
+
+    assert score_seller(cheap, 500) > score_seller(dear, 500)
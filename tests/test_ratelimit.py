@@ -0,0 +1,121 @@
+"""Token buckets: refill, timeouts, priorities and 429 backoff."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from marketplace import ratelimit
+from marketplace.resilience import deadline_scope
+from marketplace.ratelimit import Priority, RateLimitTimeout, TokenBucket, priority_scope, retry_after
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_ENABLED', True)
+
+
+def waiting(bucket, count):
+    deadline = time.monotonic() + 5
+    while bucket.info()['waiting'] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_burst_then_refill_paces_callers():
+    bucket = TokenBucket('test', rate=50, burst=2)
+
+    assert bucket.acquire() < 0.01 and bucket.acquire() < 0.01
+    waited = bucket.acquire()
+
+    # One token refills in 1/50 s
+    assert 0.01 < waited < 0.2
+    time.sleep(0.05)
+    assert bucket.info()['tokens'] == pytest.approx(2, abs=0.01)
+
+
+def test_tokens_never_exceed_capacity():
+    bucket = TokenBucket('test', rate=1000, burst=3)
+    time.sleep(0.02)
+
+    assert bucket.info()['tokens'] == 3
+
+
+def test_timeout_and_session_deadline():
+    bucket = TokenBucket('test', rate=1, burst=1)
+    bucket.acquire()
+
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(timeout=0.02)
+    with deadline_scope(0.02), pytest.raises(RateLimitTimeout):
+        bucket.acquire()
+    assert bucket.info()['waiting'] == 0
+
+
+def test_higher_priority_waiters_go_first():
+    bucket = TokenBucket('test', rate=100, burst=1)
+    bucket.acquire()
+    bucket.throttled(0.1)
+    order = []
+
+    def caller(priority, label):
+        with priority_scope(priority):
+            bucket.acquire()
+        order.append(label)
+
+    threads = []
+    for count, (priority, label) in enumerate([(Priority.BACKGROUND, 'background'),
+                                               (Priority.NORMAL, 'session'),
+                                               (Priority.HITL, 'approval')], 1):
+        threads.append(threading.Thread(target=caller, args=(priority, label)))
+        threads[-1].start()
+        waiting(bucket, count)
+    for thread in threads:
+        thread.join()
+
+    assert order == ['approval', 'session', 'background']
+
+
+def test_throttle_holds_every_caller_for_retry_after():
+    bucket = TokenBucket('test', rate=1000, burst=10)
+
+    bucket.throttled(0.05)
+    waited = bucket.acquire()
+
+    assert waited >= 0.04
+    assert bucket.info()['throttled'] == 1
+
+
+def test_settle_charges_the_actual_cost():
+    bucket = TokenBucket('test', rate=1, burst=10)
+
+    bucket.acquire(4)
+    bucket.settle(5)
+    assert bucket.info()['tokens'] == pytest.approx(1, abs=0.01)
+
+    bucket.settle(-20)
+    assert bucket.info()['tokens'] == 10
+
+
+def test_disabled_limits_do_not_wait(monkeypatch):
+    bucket = TokenBucket('test', rate=0.001, burst=1)
+    bucket.acquire()
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_ENABLED', False)
+
+    assert bucket.acquire(timeout=0.01) == 0.0
+
+
+def test_scale_shares_the_limit():
+    bucket = TokenBucket('test', rate=20, burst=10)
+
+    bucket.scale(0.25)
+
+    assert (bucket.rate, bucket.capacity) == (5, 2.5)
+
+
+def test_retry_after_reads_429_header():
+    assert retry_after(SimpleNamespace(status_code=200)) is None
+    assert retry_after(SimpleNamespace(status_code=429, headers={'retry-after': '3'})) == 3.0
+    assert retry_after(SimpleNamespace(status_code=429, headers={})) == 1.0
+    error = SimpleNamespace(status_code=429, response=SimpleNamespace(headers={'retry-after': 'soon'}))
+    assert retry_after(error) == 1.0
@@ -0,0 +1,57 @@
+"""AgentRecord: directory entries round-trip without inventing fields."""
+
+from marketplace import records
+from marketplace.records import AgentRecord, SellerCandidate
+
+
+def agent(agent_id, **metadata):
+    return {'agent_id': agent_id, 'endpoint': f"http://localhost/{agent_id}",
+            'metadata': dict({'name': agent_id, 'capabilities': ['sell_electronics']}, **metadata)}
+
+
+def test_absent_status_stays_unknown():
+    data = AgentRecord.from_json(agent('agent_x')).to_dict()
+
+    assert 'status' not in data
+
+
+def test_metadata_round_trips():
+    entry = dict(agent('agent_v', verified=True, product='MacBook Pro 2020', trust_score=4.8),
+                 status='active')
+
+    data = AgentRecord.from_json(entry).to_dict()
+
+    assert data['status'] == 'active'
+    assert data['metadata']['verified'] is True
+    assert data['metadata']['product'] == 'MacBook Pro 2020'
+    assert data['metadata']['trust_score'] == 4.8
+
+
+def test_seller_keeps_public_key():
+    entry = dict(agent('agent_henri', trust_score=4.8), public_key='-----BEGIN PUBLIC KEY-----')
+    record = AgentRecord.from_json(entry)
+
+    assert record.to_dict()['public_key'] == entry['public_key']
+    assert SellerCandidate.from_record(record).public_key == entry['public_key']
+    assert 'public_key' not in AgentRecord.from_json(agent('agent_x')).to_dict()
+
+
+def test_identical_metadata_is_shared():
+    first = AgentRecord.from_json(agent('agent_a', verified=True))
+    second = AgentRecord.from_json(agent('agent_b', verified=True))
+
+    assert first.capabilities is second.capabilities
+    assert first.extra is second.extra
+
+
+def test_sharing_tables_stay_bounded(monkeypatch):
+    monkeypatch.setattr(records, 'MAX_SHARED_VALUES', 8)
+
+    parsed = [AgentRecord.from_json(agent(f"agent_{i}", capabilities=[f"cap_{i}"], region=f"r{i}"))
+              for i in range(100)]
+
+    assert len(records._capability_sets) <= 8 and len(records._extra_maps) <= 8
+    assert parsed[0].capabilities == {'cap_0'} and parsed[0].extra == {'region': 'r0'}
+    # Values seen since the last reset are still shared
+    again = AgentRecord.from_json(agent('agent_z', capabilities=['cap_99'], region='r99'))
+    assert again.capabilities is parsed[-1].capabilities and again.extra is parsed[-1].extra
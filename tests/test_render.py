@@ -0,0 +1,98 @@
+"""Renderer: batched writes, per-thread capture and putting sys.stdout back."""
+
+import io
+import sys
+import threading
+
+from marketplace import render
+from marketplace.render import Dashboard, Renderer
+
+
+def test_step_output_is_written_once_per_step():
+    out = io.StringIO()
+    renderer = Renderer(out)
+
+    renderer.step(1, 'Research')
+    for i in range(50):
+        renderer.line(f"line {i}")
+    renderer.step(2, 'Discover')
+
+    assert renderer.writes == 2
+    assert out.getvalue().count('📍 STEP') == 2 and 'line 49' in out.getvalue()
+
+
+def test_capture_restores_stdout():
+    original = sys.stdout
+    out = io.StringIO()
+
+    with Renderer(out).capture():
+        assert sys.stdout is not original
+        with Renderer(out).capture():
+            print('nested')
+        assert sys.stdout is not original
+        print('outer')
+
+    assert sys.stdout is original
+    assert render.real_stdout() is original
+    assert out.getvalue() == 'nested\nouter\n'
+
+
+def test_capture_collects_only_this_thread_by_default():
+    out = io.StringIO()
+
+    with Renderer(out).capture():
+        print('mine')
+        thread = threading.Thread(target=print, args=('other thread',))
+        thread.start()
+        thread.join()
+
+    assert out.getvalue() == 'mine\n'
+
+
+def test_all_threads_capture_keeps_order():
+    out = io.StringIO()
+
+    with Renderer(out).capture(all_threads=True):
+        print('before')
+        thread = threading.Thread(target=print, args=('handler',))
+        thread.start()
+        thread.join()
+        print('after')
+
+    assert out.getvalue() == 'before\nhandler\nafter\n'
+
+
+def test_overlapping_all_thread_captures_leave_no_stale_fallback():
+    first, second = Renderer(io.StringIO()), Renderer(io.StringIO())
+    entered, release = threading.Event(), threading.Event()
+
+    def session():
+        with first.capture(all_threads=True):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=session)
+    thread.start()
+    entered.wait(5)
+    with second.capture(all_threads=True):
+        # The first capture ends while the second is still running
+        release.set()
+        thread.join()
+        assert render._fallback is second
+
+    assert render._fallback is None
+    assert sys.stdout is not None and not isinstance(sys.stdout, render._ThreadRouter)
+
+
+def test_dashboard_appends_prefixed_lines_off_terminal():
+    original = sys.stdout
+    out = io.StringIO()
+
+    with Dashboard(out, refresh=0.01) as dashboard:
+        view = dashboard.session('sarah-1')
+        with view.capture():
+            print('offer $450')
+        view.finish()
+
+    assert sys.stdout is original
+    assert '[sarah-1] offer $450\n' in out.getvalue()
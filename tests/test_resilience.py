@@ -0,0 +1,124 @@
+"""Circuit breaker, session deadlines and hedged calls."""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from marketplace.resilience import (
+    CircuitBreaker, DeadlineExceeded, LatencyTracker, bounded_timeout, deadline_scope,
+    hedged_call, remaining_time,
+)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_opens_for_one_trial():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.02)
+    breaker.record_failure()
+    time.sleep(0.03)
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()          # one trial at a time
+    breaker.release()                   # trial slot given back unused
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=5, reset_timeout=0.02)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.03)
+
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+
+def test_nested_deadlines_only_tighten():
+    assert remaining_time() is None
+    assert bounded_timeout(5.0) == 5.0
+
+    with deadline_scope(0.5):
+        with deadline_scope(10):
+            assert remaining_time() <= 0.5
+            assert bounded_timeout(5.0) <= 0.5
+        with deadline_scope(0):
+            with pytest.raises(DeadlineExceeded):
+                bounded_timeout(5.0)
+
+    assert remaining_time() is None
+
+
+def test_hedge_returns_the_faster_attempt():
+    attempts = itertools.count()
+    release = threading.Event()
+
+    def call():
+        attempt = next(attempts)
+        if attempt == 0:
+            release.wait(5)
+        return attempt
+
+    start = time.monotonic()
+    result = hedged_call(call, hedge_after=0.02, timeout=2)
+    release.set()
+
+    assert result == 1
+    assert time.monotonic() - start < 1
+
+
+def test_hedge_raises_last_error_when_both_fail():
+    attempts = itertools.count()
+
+    def call():
+        attempt = next(attempts)
+        time.sleep(0.05 if attempt == 0 else 0.0)
+        raise ConnectionError(f"attempt {attempt}")
+
+    with pytest.raises(ConnectionError):
+        hedged_call(call, hedge_after=0.01, timeout=2)
+
+
+def test_hedge_times_out():
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        hedged_call(lambda: release.wait(5), hedge_after=0.01, timeout=0.05)
+    release.set()
+
+
+def test_hedging_disabled_calls_once():
+    calls = []
+
+    assert hedged_call(lambda: calls.append(1) or 'ok', hedge_after=None, timeout=1) == 'ok'
+    assert calls == [1]
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) is None
+
+    for i in range(9, 100):
+        tracker.record(i / 100)
+
+    assert tracker.percentile(95) == pytest.approx(0.95)
@@ -0,0 +1,81 @@
+"""ShardPool: warm per-worker state, key affinity, failures and the benchmark session."""
+
+import os
+
+import pytest
+
+from marketplace.sharding import ShardError, ShardPool, policy_session, policy_state
+
+
+def counter_state():
+    return {'pid': os.getpid(), 'tasks': 0}
+
+
+def count_task(state, item):
+    state['tasks'] += 1
+    return state['pid'], state['tasks'], item * 2
+
+
+def failing_task(state, message):
+    raise ValueError(message)
+
+
+def broken_state():
+    raise RuntimeError("no signing key")
+
+
+@pytest.fixture
+def pool():
+    with ShardPool(counter_state, workers=2, name='test') as pool:
+        assert pool.wait_ready(10)
+        yield pool
+
+
+def test_same_key_same_shard_with_warm_state(pool):
+    results = [pool.submit(count_task, i, key='agent_henri').result(10) for i in range(5)]
+
+    assert len({pid for pid, _, _ in results}) == 1
+    assert [tasks for _, tasks, _ in results] == [1, 2, 3, 4, 5]
+    assert [value for _, _, value in results] == [0, 2, 4, 6, 8]
+    assert os.getpid() not in {pid for pid, _, _ in results}
+
+
+def test_map_keeps_input_order(pool):
+    results = pool.map(count_task, range(20))
+
+    assert [value for _, _, value in results] == [i * 2 for i in range(20)]
+    assert sum(pool.completed) == 20
+
+
+def test_task_errors_reach_the_caller(pool):
+    with pytest.raises(ValueError, match='bad offer'):
+        pool.submit(failing_task, 'bad offer').result(10)
+
+    # The worker survives a failed task
+    assert pool.submit(count_task, 1).result(10)[2] == 2
+
+
+def test_closed_pool_rejects_tasks():
+    pool = ShardPool(counter_state, workers=1, name='test')
+    pool.close()
+
+    with pytest.raises(ShardError):
+        pool.submit(count_task, 1)
+
+
+def test_failed_init_fails_its_tasks():
+    with ShardPool(broken_state, workers=1, name='test') as pool:
+        assert not pool.wait_ready(10)
+        future = pool.submit(count_task, 1)
+
+        with pytest.raises(ShardError):
+            future.result(10)
+
+
+def test_policy_session_signs_a_verifiable_receipt():
+    state = policy_state(agent_count=50)
+
+    result = policy_session(state, 'session-1')
+
+    assert result['state'] == 'agreed' and result['verified']
+    assert result['receipt']['price'] <= 500
@@ -0,0 +1,101 @@
+"""SingleFlight: concurrent identical calls share one upstream call and its outcome."""
+
+import threading
+import time
+
+import pytest
+
+from marketplace.resilience import DeadlineExceeded, deadline_scope
+from marketplace.singleflight import SingleFlight
+
+
+def in_flight_call(group, key, result=None, error=None):
+    """Start a leader that holds `key` in flight until the returned event is set."""
+    release = threading.Event()
+    outcome = {}
+
+    def call():
+        release.wait(5)
+        if error:
+            raise error
+        return result
+
+    def lead():
+        try:
+            outcome['result'] = group.do(key, call)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    while not group.in_flight():
+        time.sleep(0.001)
+    return release, thread, outcome
+
+
+def join(group, key, results):
+    def run():
+        try:
+            results.append(group.do(key, lambda: pytest.fail("joined call ran upstream")))
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight('test')
+    release, leader, outcome = in_flight_call(group, 'agent_henri', {'trust_score': 4.8})
+    results = []
+    followers = [join(group, 'agent_henri', results) for _ in range(3)]
+    while group.shared < 3:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert outcome['result'] == {'trust_score': 4.8}
+    assert results == [{'trust_score': 4.8}] * 3
+    assert (group.calls, group.shared, group.in_flight()) == (1, 3, 0)
+    # Followers get copies: mutating one cannot affect the others
+    results[0]['trust_score'] = 0
+    assert outcome['result']['trust_score'] == 4.8
+
+
+def test_errors_reach_every_caller():
+    group = SingleFlight('test')
+    release, leader, outcome = in_flight_call(group, 'key', error=ConnectionError("directory down"))
+    results = []
+    follower = join(group, 'key', results)
+    while group.shared < 1:
+        time.sleep(0.001)
+
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert isinstance(outcome['error'], ConnectionError)
+    assert isinstance(results[0], ConnectionError)
+
+
+def test_nothing_is_cached_after_landing():
+    group = SingleFlight('test')
+    calls = []
+
+    for _ in range(3):
+        group.do('key', lambda: calls.append(1))
+
+    assert len(calls) == 3 and group.shared == 0
+
+
+def test_follower_deadline_raises_deadline_exceeded():
+    group = SingleFlight('test')
+    release, leader, _ = in_flight_call(group, 'key', 'late')
+    try:
+        with deadline_scope(0.05), pytest.raises(DeadlineExceeded):
+            group.do('key', lambda: pytest.fail("joined call ran upstream"))
+    finally:
+        release.set()
+        leader.join()